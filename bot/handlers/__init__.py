@@ -14,6 +14,7 @@ from . import (
     settings,
     alerts,
     threshold,
+    quiet,
     about
 )
 
@@ -30,6 +31,7 @@ __all__ = [
     "settings",
     "alerts",
     "threshold",
+    "quiet",
     "about"
 ]
 
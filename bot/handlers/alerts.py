@@ -24,6 +24,9 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         try:
             if action == "on":
                 await db.update_user_settings(user.id, notifications_enabled=True)
+                dispatcher = context.bot_data.get("alert_dispatcher")
+                if dispatcher:
+                    dispatcher.set_notifications(user.id, True)
                 await update.message.reply_text(
                     "✅ **Alerts Enabled!**\n\n"
                     "You'll now receive notifications for:\n"
@@ -36,6 +39,9 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
                 
             elif action == "off":
                 await db.update_user_settings(user.id, notifications_enabled=False)
+                dispatcher = context.bot_data.get("alert_dispatcher")
+                if dispatcher:
+                    dispatcher.set_notifications(user.id, False)
                 await update.message.reply_text(
                     "🔕 **Alerts Disabled!**\n\n"
                     "You won't receive any notifications.\n\n"
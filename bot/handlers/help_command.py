@@ -17,7 +17,7 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 `/track <address>` - Track a whale
 `/untrack <address>` - Stop tracking
 `/mywhales` - Your tracked whales
-`/top` - Whale leaderboard
+`/top [live|24h|7d|30d|all]` - Whale leaderboard
 
 **📊 Markets**
 `/markets` - Top active markets
@@ -26,6 +26,7 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 `/settings` - View your settings
 `/alerts on/off` - Toggle notifications
 `/threshold <amount>` - Set min trade size (default: $500)
+`/quiet <start> <end> [tz]` - Hold alerts overnight, get a digest
 
 **ℹ️ Info**
 `/help` - Show this help message
@@ -33,11 +33,17 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
             )
             return
 
-        # Fetch recent trades to get trader names
-        from bot.services.polymarket_api import PolymarketAPI
-        api = PolymarketAPI()
-        all_trades = await api.fetch_recent_trades(limit=500)
-        await api.close()
+        addresses = [w.address if hasattr(w, 'address') else w for w in tracked]
+
+        # Recent trades to get trader names: the tracker's live window, else a live fetch
+        from bot.services.trade_window import get_trade_window
+        window = get_trade_window(context.bot_data)
+        if window:
+            all_trades = [t for addr in addresses for t in window.by_trader(addr, limit=1)]
+        else:
+            from bot.services.polymarket_api import get_shared_api
+            api = get_shared_api(context.bot_data)
+            all_trades = await api.fetch_recent_trades(limit=500)
 
         # Build whale info map
         whale_info = {}
@@ -52,8 +58,6 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         # Format tracked whales message
         message = f"🐋 **Your Tracked Whales** ({len(tracked)})\n\n"
 
-        addresses = [w.address if hasattr(w, 'address') else w for w in tracked]
-
         for i, whale_addr in enumerate(addresses, 1):
             addr_lower = whale_addr.lower()
             if addr_lower in whale_info:
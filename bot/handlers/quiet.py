@@ -0,0 +1,86 @@
+"""
+/quiet command handler - Set quiet hours
+"""
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from telegram import Update
+from telegram.ext import ContextTypes
+from loguru import logger
+
+
+USAGE = (
+    "Usage: `/quiet <start> <end> [timezone]`\n"
+    "Example: `/quiet 23 7 Europe/Berlin`\n\n"
+    "Alerts during quiet hours are held and sent as one digest when they end.\n"
+    "Use `/quiet off` to disable."
+)
+
+
+async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handle /quiet <start> <end> [timezone] | /quiet off command"""
+    user = update.effective_user
+
+    if not context.args:
+        await update.message.reply_text(f"🌙 **Quiet Hours**\n\n{USAGE}", parse_mode="Markdown")
+        return
+
+    if context.args[0].lower() == "off":
+        quiet_hours = None
+        timezone_name = None
+    else:
+        try:
+            start, end = int(context.args[0]), int(context.args[1])
+            if not (0 <= start <= 23 and 0 <= end <= 23) or start == end:
+                raise ValueError
+        except (ValueError, IndexError):
+            await update.message.reply_text(
+                "⚠️ Please provide start and end hours (0-23) that differ.\n\n" + USAGE,
+                parse_mode="Markdown"
+            )
+            return
+
+        timezone_name = context.args[2] if len(context.args) > 2 else "UTC"
+        try:
+            ZoneInfo(timezone_name)
+        except (ZoneInfoNotFoundError, ValueError):
+            await update.message.reply_text(
+                f"⚠️ Unknown timezone `{timezone_name}`.\n\n"
+                "Use a name like `Europe/London` or `America/New_York`.",
+                parse_mode="Markdown"
+            )
+            return
+        quiet_hours = [start, end]
+
+    # Get database from context
+    if "db" not in context.bot_data:
+        await update.message.reply_text("⚠️ Database not available. Please try again later.")
+        return
+
+    db = context.bot_data["db"]
+
+    try:
+        if quiet_hours is None:
+            await db.update_user_settings(user.id, quiet_hours=None)
+        else:
+            await db.update_user_settings(user.id, quiet_hours=quiet_hours, timezone=timezone_name)
+        dispatcher = context.bot_data.get("alert_dispatcher")
+        if dispatcher:
+            dispatcher.set_quiet_hours(user.id, {"quiet_hours": quiet_hours, "timezone": timezone_name})
+
+        if quiet_hours is None:
+            await update.message.reply_text("🔔 Quiet hours disabled. Alerts will be sent immediately.")
+        else:
+            await update.message.reply_text(
+                f"🌙 **Quiet Hours Set**\n\n"
+                f"From **{quiet_hours[0]:02d}:00** to **{quiet_hours[1]:02d}:00** ({timezone_name}).\n\n"
+                f"Alerts in this window will arrive as one digest when it ends.",
+                parse_mode="Markdown"
+            )
+
+        logger.info(f"User {user.id} quiet hours set to {quiet_hours} {timezone_name or ''}")
+
+    except Exception as e:
+        logger.error(f"Error setting quiet hours: {e}")
+        await update.message.reply_text(
+            "⚠️ Error updating quiet hours. Please try again later."
+        )
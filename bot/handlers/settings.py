@@ -31,6 +31,11 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         user_settings = user_data.settings if user_data and hasattr(user_data, 'settings') else {}
         whale_threshold = user_settings.get('whale_threshold', 500)  # Default to 500
         notifications_enabled = user_settings.get('notifications_enabled', True)
+        quiet_hours = user_settings.get('quiet_hours')
+        quiet_text = (
+            f"{quiet_hours[0]:02d}:00–{quiet_hours[1]:02d}:00 ({user_settings.get('timezone') or 'UTC'})"
+            if quiet_hours else "Off"
+        )
 
         settings_message = f"""
 ⚙️ **Your Settings**
@@ -40,12 +45,16 @@ Only trades above this amount will trigger alerts.
 
 **Notifications:** {'✅ Enabled' if notifications_enabled else '❌ Disabled'}
 
+**Quiet Hours:** {quiet_text}
+
 **Available Commands:**
 • `/threshold <amount>` - Set minimum trade size
   Example: `/threshold 25000`
 
 • `/alerts on` - Enable notifications
 • `/alerts off` - Disable notifications
+• `/quiet 23 7 Europe/Berlin` - Quiet hours with a morning digest
+• `/quiet off` - Disable quiet hours
 
 • `/mywhales` - View tracked whales
 • `/track <address>` - Track a whale
@@ -5,6 +5,8 @@ from telegram import Update
 from telegram.ext import ContextTypes
 from loguru import logger
 
+from config.settings import settings
+
 
 async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /threshold <amount> command"""
@@ -24,9 +26,11 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     try:
         amount = int(context.args[0].replace(',', '').replace('$', ''))
         
-        if amount < 500:
+        # Only trades of at least WHALE_THRESHOLD are tracked, so a lower value could never fire
+        minimum = settings.WHALE_THRESHOLD
+        if amount < minimum:
             await update.message.reply_text(
-                "⚠️ Threshold must be at least $500.\n\n"
+                f"⚠️ Threshold must be at least ${minimum:,}: smaller trades are not tracked.\n\n"
                 "Recommended: $1,000+ for whale tracking",
                 parse_mode="Markdown"
             )
@@ -60,6 +64,9 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     try:
         # Update user threshold
         await db.update_user_settings(user.id, whale_threshold=amount)
+        dispatcher = context.bot_data.get("alert_dispatcher")
+        if dispatcher:
+            dispatcher.set_threshold(user.id, amount)
         
         # Determine whale tier with new thresholds
         if amount >= 10000:
@@ -20,28 +20,6 @@ def get_whale_emoji(volume: float) -> str:
         return "🐟"
 
 
-def aggregate_whales(trades, threshold: int = settings.WHALE_THRESHOLD):
-    """Aggregate trades by trader"""
-    whale_stats = {}
-    for trade in trades:
-        if trade.size >= threshold:
-            addr = trade.trader_address
-            if addr not in whale_stats:
-                whale_stats[addr] = {
-                    'total_volume': 0,
-                    'trade_count': 0,
-                    'largest_trade': 0,
-                    'trader_name': trade.trader_name or '',
-                    'trader_pseudonym': trade.trader_pseudonym or '',
-                    'profile_url': trade.get_profile_url()
-                }
-            whale_stats[addr]['total_volume'] += trade.size
-            whale_stats[addr]['trade_count'] += 1
-            whale_stats[addr]['largest_trade'] = max(whale_stats[addr]['largest_trade'], trade.size)
-
-    return sorted(whale_stats.items(), key=lambda x: x[1]['total_volume'], reverse=True)
-
-
 def format_whale_entry(rank: int, address: str, stats: dict, compact=False) -> str:
     """Format a single whale entry"""
     emoji = get_whale_emoji(stats['total_volume'])
@@ -78,11 +56,29 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     db = context.bot_data["db"]
 
     try:
-        # Optional window argument: /top [24h|7d|30d|all]; default 24h
+        # Optional window argument: /top [live|24h|7d|30d|all]; default 24h
         text = (update.message.text or "").strip().lower()
         parts = text.split()
         arg = parts[1] if len(parts) > 1 else "24h"
 
+        if arg in ("live", "now"):
+            from bot.services.trade_window import get_trade_window
+            window = get_trade_window(context.bot_data)
+            if window:
+                # Computed from the tracker's in-memory window, no database round-trip
+                leaders = window.leaderboard(limit=10)
+                message = f"🏆 **Top 10 Whales — live** (last {len(window)} trades)\n\n"
+                if leaders:
+                    for i, (address, stats) in enumerate(leaders, 1):
+                        message += format_whale_entry(i, address, stats, compact=True) + "\n"
+                else:
+                    message += "_No whale trades in the live window_\n"
+                message += f"\n_Threshold: ${settings.WHALE_THRESHOLD}+_"
+                await update.message.reply_text(message, parse_mode="Markdown")
+                return
+            # Window not filled yet (or tracker not running here): use the last 24h instead
+            arg = "24h"
+
         now = datetime.now()
         label = "last 24h"
         if arg in ("24h", "1d", "day"):
@@ -32,11 +32,16 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     
     try:
         # Verify whale exists by checking recent trades
-        from bot.services.polymarket_api import PolymarketAPI
-        api = PolymarketAPI()
-        all_trades = await api.fetch_recent_trades(limit=500)
-        whale_trades = [t for t in all_trades if t.trader_address.lower() == address.lower()]
-        await api.close()
+        from bot.services.trade_window import get_trade_window
+        window = get_trade_window(context.bot_data)
+        if window:
+            whale_trades = window.by_trader(address, limit=1)
+        else:
+            from bot.services.polymarket_api import get_shared_api
+            from bot.services.trade_parser import promote
+            api = get_shared_api(context.bot_data)
+            records = await api.fetch_recent_records(limit=500)
+            whale_trades = promote(r for r in records if r.trader_address.lower() == address.lower())
 
         if not whale_trades:
             await update.message.reply_text(
@@ -48,6 +53,9 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 
         # Track the whale
         await db.track_whale(user.id, address)
+        dispatcher = context.bot_data.get("alert_dispatcher")
+        if dispatcher:
+            dispatcher.track(user.id, address)
 
         # Get trader info from first trade
         first_trade = whale_trades[0]
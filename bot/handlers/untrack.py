@@ -33,6 +33,9 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     try:
         # Untrack the whale
         result = await db.untrack_whale(user.id, address)
+        dispatcher = context.bot_data.get("alert_dispatcher")
+        if dispatcher:
+            dispatcher.untrack(user.id, address)
         
         short_addr = f"{address[:6]}...{address[-4:]}"
         
@@ -31,15 +31,24 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     db = context.bot_data["db"]
     
     try:
-        # Fetch recent trades by this whale from Polymarket API
-        from bot.services.polymarket_api import PolymarketAPI
-        api = PolymarketAPI()
+        # Recent trades by this whale from the tracker's live window
+        from bot.services.trade_window import get_trade_window
+        window = get_trade_window(context.bot_data)
 
-        # Fetch more trades to find this whale
-        all_trades = await api.fetch_recent_trades(limit=500)
-        whale_trades = [t for t in all_trades if t.trader_address.lower() == address.lower()]
+        if window:
+            whale_trades = window.by_trader(address, limit=5)
+            total_volume, trade_count = window.trader_totals(address)
+        else:
+            # Window not filled yet - fetch from Polymarket API
+            from bot.services.polymarket_api import get_shared_api
+            from bot.services.trade_parser import promote
+            api = get_shared_api(context.bot_data)
 
-        await api.close()
+            # Fetch more trades to find this whale
+            records = await api.fetch_recent_records(limit=500)
+            whale_trades = promote(r for r in records if r.trader_address.lower() == address.lower())
+            total_volume = sum(t.size for t in whale_trades)
+            trade_count = len(whale_trades)
 
         if not whale_trades:
             await update.message.reply_text(
@@ -49,10 +58,6 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
             )
             return
 
-        # Calculate stats
-        total_volume = sum(t.size for t in whale_trades)
-        trade_count = len(whale_trades)
-
         # Determine whale tier with lower thresholds
         if total_volume >= 10000:
             emoji = "🐋"
@@ -26,15 +26,18 @@ async def handle(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         trades = await db.get_recent_whale_trades(since, limit=10)
 
         if not trades:
-            # No trades in database yet - fetch live from Polymarket
-            from bot.services.polymarket_api import PolymarketAPI
-            api = PolymarketAPI()
-
-            live_trades = await api.fetch_recent_trades(limit=500)  # Increased from 50 to 500
-            await api.close()
-
-            # Filter for whale trades using configured threshold
-            whale_trades = [t for t in live_trades if t.is_whale_trade]
+            # No trades in database yet - use the tracker's live window (or fetch from Polymarket)
+            from bot.services.trade_window import get_trade_window
+            window = get_trade_window(context.bot_data)
+
+            if window:
+                whale_trades = window.recent(min_size=settings.WHALE_THRESHOLD)
+            else:
+                from bot.services.polymarket_api import get_shared_api
+                api = get_shared_api(context.bot_data)
+
+                # Filter for whale trades using configured threshold (before parsing them fully)
+                whale_trades = await api.fetch_recent_trades(limit=500, min_size=settings.WHALE_THRESHOLD)
 
             if not whale_trades:
                 await update.message.reply_text(
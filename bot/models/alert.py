@@ -17,14 +17,17 @@ class Alert(BaseModel):
     def matches_trade(self, trade: Any) -> bool:
         """Check if a trade matches this alert's filters"""
         # Check minimum size
-        min_size = self.filters.get("min_size", 10000)
+        min_size = self.filters.get("min_size")
+        if min_size is None:
+            min_size = 10000
         if trade.size < min_size:
             return False
         
         # Check market category
         categories = self.filters.get("categories", [])
-        if categories and hasattr(trade, "category"):
-            if trade.category not in categories:
+        category = getattr(trade, "category", None)
+        if categories and category is not None:
+            if category not in categories:
                 return False
         
         # Check specific markets
@@ -1,8 +1,9 @@
 """
 User model
 """
-from datetime import datetime
+from datetime import datetime, timedelta, timezone, tzinfo
 from typing import Optional, Dict, Any
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from pydantic import BaseModel, Field
 
 
@@ -40,19 +41,55 @@ class User(BaseModel):
         """Get user's whale threshold setting"""
         return self.get_setting("whale_threshold", 500)
 
-    def get_quiet_hours(self) -> tuple:
-        """Get user's quiet hours (start, end)"""
-        return self.get_setting("quiet_hours", (23, 7))
-    
-    def is_quiet_time(self) -> bool:
-        """Check if current time is in quiet hours"""
-        start, end = self.get_quiet_hours()
-        current_hour = datetime.now().hour
-        
+    def get_quiet_hours(self) -> Optional[tuple]:
+        """Get user's quiet hours (start, end), or None if disabled"""
+        hours = self.get_setting("quiet_hours", (23, 7))
+        return tuple(hours) if hours else None
+
+    def get_timezone(self) -> tzinfo:
+        """Get user's timezone (IANA name in settings, UTC if unset or unknown)"""
+        name = self.get_setting("timezone")
+        if name:
+            try:
+                return ZoneInfo(name)
+            except (ZoneInfoNotFoundError, ValueError):
+                pass
+        return timezone.utc
+
+    def is_quiet_time(self, now: Optional[datetime] = None) -> bool:
+        """Check if a moment (default: now) is in the user's quiet hours, in the user's timezone"""
+        return self.quiet_time_end(now) is not None
+
+    def quiet_time_end(self, now: Optional[datetime] = None) -> Optional[datetime]:
+        """When the current quiet window ends (naive UTC), or None if not in quiet hours.
+
+        `now` is naive UTC (like trade timestamps) or timezone-aware.
+        """
+        hours = self.get_quiet_hours()
+        if not hours:
+            return None
+        start, end = int(hours[0]), int(hours[1])
+        if start == end:
+            return None
+
+        if now is None:
+            now = datetime.now(timezone.utc)
+        elif now.tzinfo is None:
+            now = now.replace(tzinfo=timezone.utc)
+        local = now.astimezone(self.get_timezone())
+        current_hour = local.hour
+
         if start < end:
-            return start <= current_hour < end
+            quiet = start <= current_hour < end
         else:  # Quiet hours span midnight
-            return current_hour >= start or current_hour < end
+            quiet = current_hour >= start or current_hour < end
+        if not quiet:
+            return None
+
+        window_end = local.replace(hour=end, minute=0, second=0, microsecond=0)
+        if window_end <= local:
+            window_end += timedelta(days=1)
+        return window_end.astimezone(timezone.utc).replace(tzinfo=None)
     
     class Config:
         json_encoders = {
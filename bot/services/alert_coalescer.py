@@ -0,0 +1,69 @@
+"""
+Alert coalescer - merges a whale's rapid fills in one market into a single alert per user
+"""
+import asyncio
+from typing import Callable, Dict, List, Optional, Tuple
+
+from bot.models import Trade
+
+# (user_id, trader address, market id, side, outcome)
+CoalesceKey = Tuple[int, str, str, str, str]
+
+
+def vwap(trades: List[Trade]) -> float:
+    """Volume-weighted average price of fills (size is USD notional, price per share)"""
+    shares = sum(trade.size / trade.price for trade in trades if trade.price > 0)
+    if shares <= 0:
+        return trades[-1].price
+    return sum(trade.size for trade in trades if trade.price > 0) / shares
+
+
+class AlertCoalescer:
+    """Per-user coalescing window for alerts.
+
+    The first fill for a (user, whale, market, side, outcome) opens a window of
+    `window` seconds; fills arriving before it closes join the same group. When
+    the window closes the group is handed to `emit` once, so a whale splitting
+    an order into dozens of fills costs one send per subscriber instead of one
+    per fill. The window is fixed from the first fill, which bounds the added
+    latency to `window` seconds.
+    """
+
+    def __init__(self, window: float, emit: Callable[[int, str, List[Trade]], None]):
+        self.window = window
+        self.emit = emit
+        self._groups: Dict[CoalesceKey, Tuple[str, List[Trade]]] = {}
+        self._timers: Dict[CoalesceKey, asyncio.TimerHandle] = {}
+        self.fills = 0
+        self.emitted = 0
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def add(self, user_id: int, kind: str, trade: Trade) -> None:
+        """Add a fill for a recipient; opens a window if none is open for its group"""
+        key = (user_id, trade.trader_address.lower(), trade.market_id, trade.side or "", trade.outcome or "")
+        self.fills += 1
+        group = self._groups.get(key)
+        if group is not None:
+            group[1].append(trade)
+            return
+        self._groups[key] = (kind, [trade])
+        self._timers[key] = asyncio.get_running_loop().call_later(self.window, self._flush, key)
+
+    def _flush(self, key: CoalesceKey) -> None:
+        self._timers.pop(key, None)
+        group = self._groups.pop(key, None)
+        if group is None:
+            return
+        kind, trades = group
+        self.emitted += 1
+        self.emit(key[0], kind, trades)
+
+    def flush_all(self) -> None:
+        """Emit every open group now (e.g. on shutdown)"""
+        for key in list(self._groups):
+            timer: Optional[asyncio.TimerHandle] = self._timers.get(key)
+            if timer is not None:
+                timer.cancel()
+            self._flush(key)
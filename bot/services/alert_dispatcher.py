@@ -0,0 +1,259 @@
+"""
+Alert dispatcher - fans new whale trades out to subscribed users
+"""
+import asyncio
+import json
+from bisect import bisect_right, insort
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from loguru import logger
+
+from config.settings import settings
+from bot.models import Trade, User
+from bot.services.alert_coalescer import AlertCoalescer, vwap
+from bot.services.alert_matcher import CompiledAlertMatcher
+from bot.services.database import Database
+from bot.services.deferred_delivery import DeferredDeliveryQueue
+from bot.services.send_queue import PRIORITY_THRESHOLD, PRIORITY_TRACKED, MessageScheduler
+from bot.utils.formatters import escape_md, format_price, format_size, md_link
+
+ALERT_TRACKED = "tracked_whale"
+ALERT_THRESHOLD = "threshold"
+ALERT_CUSTOM = "custom_alert"
+
+
+class AlertDispatcher:
+    """Resolves each whale trade to its recipients through in-memory reverse indexes.
+
+    * whale address -> users tracking it (from tracked_whales)
+    * threshold bucket -> users with that /threshold (from users.settings)
+    * custom rules from the alerts table, via a CompiledAlertMatcher
+
+    Resolving a trade costs O(buckets + recipients) instead of a scan over users;
+    messages go out through the rate-limited MessageScheduler.
+    Threshold alerts go to users who set an explicit whale_threshold; users with
+    notifications disabled get nothing. Handlers keep the indexes current through
+    track/untrack/set_threshold/set_notifications, and a periodic full reload
+    picks up changes made by other instances.
+    Alerts for users inside their quiet hours are handed to the
+    DeferredDeliveryQueue instead of being sent. With ALERT_COALESCE_SECONDS
+    set, a whale's fills in one market are merged per user into one message.
+    """
+
+    def __init__(self, db: Database, sender: MessageScheduler,
+                 deferred: Optional[DeferredDeliveryQueue] = None):
+        self.db = db
+        self.sender = sender
+        self.deferred = deferred
+        self.coalescer: Optional[AlertCoalescer] = None
+        if settings.ALERT_COALESCE_SECONDS > 0:
+            self.coalescer = AlertCoalescer(settings.ALERT_COALESCE_SECONDS, self._send)
+        self.is_running = False
+        self._by_whale: Dict[str, Set[int]] = {}
+        self._buckets: Dict[int, Set[int]] = {}
+        self._bucket_keys: List[int] = []
+        self._user_threshold: Dict[int, int] = {}
+        self._muted: Set[int] = set()
+        self._quiet: Dict[int, User] = {}
+        self._matcher = CompiledAlertMatcher([])
+
+    # Index maintenance
+    async def load(self) -> None:
+        """Rebuild every index from the database"""
+        tracked = await self.db.get_all_tracked_whales()
+        users = await self.db.get_active_user_settings()
+        alerts = await self.db.get_active_alerts()
+
+        by_whale: Dict[str, Set[int]] = {}
+        for user_id, address in tracked:
+            by_whale.setdefault(address.lower(), set()).add(user_id)
+
+        buckets: Dict[int, Set[int]] = {}
+        user_threshold: Dict[int, int] = {}
+        muted: Set[int] = set()
+        quiet: Dict[int, User] = {}
+        for user_id, user_settings in users:
+            if isinstance(user_settings, str):
+                user_settings = json.loads(user_settings or "{}")
+            user_settings = user_settings or {}
+            if not user_settings.get("notifications_enabled", True):
+                muted.add(user_id)
+            threshold = user_settings.get("whale_threshold")
+            if threshold is not None:
+                threshold = int(threshold)
+                user_threshold[user_id] = threshold
+                buckets.setdefault(threshold, set()).add(user_id)
+            # Only explicitly configured quiet hours hold alerts back
+            if user_settings.get("quiet_hours"):
+                quiet[user_id] = User(user_id=user_id, settings=user_settings)
+
+        self._by_whale = by_whale
+        self._buckets = buckets
+        self._bucket_keys = sorted(buckets)
+        self._user_threshold = user_threshold
+        self._muted = muted
+        self._quiet = quiet
+        self._matcher = CompiledAlertMatcher(alerts)
+        logger.info(
+            f"Alert index loaded: {sum(len(u) for u in by_whale.values())} whale subscriptions, "
+            f"{len(user_threshold)} threshold subscribers, {len(buckets)} buckets, "
+            f"{len(self._matcher)} custom alerts, {len(quiet)} users with quiet hours"
+        )
+
+    def track(self, user_id: int, address: str) -> None:
+        self._by_whale.setdefault(address.lower(), set()).add(user_id)
+
+    def untrack(self, user_id: int, address: str) -> None:
+        key = address.lower()
+        users = self._by_whale.get(key)
+        if users:
+            users.discard(user_id)
+            if not users:
+                del self._by_whale[key]
+
+    def set_threshold(self, user_id: int, threshold: int) -> None:
+        previous = self._user_threshold.get(user_id)
+        if previous is not None:
+            bucket = self._buckets.get(previous)
+            if bucket:
+                bucket.discard(user_id)
+                if not bucket:
+                    del self._buckets[previous]
+                    self._bucket_keys.remove(previous)
+        self._user_threshold[user_id] = threshold
+        if threshold not in self._buckets:
+            self._buckets[threshold] = set()
+            insort(self._bucket_keys, threshold)
+        self._buckets[threshold].add(user_id)
+
+    def set_notifications(self, user_id: int, enabled: bool) -> None:
+        if enabled:
+            self._muted.discard(user_id)
+        else:
+            self._muted.add(user_id)
+
+    def set_quiet_hours(self, user_id: int, user_settings: Dict) -> None:
+        """Update a user's quiet hours from their (merged) settings"""
+        if user_settings.get("quiet_hours"):
+            self._quiet[user_id] = User(user_id=user_id, settings=dict(user_settings))
+        else:
+            self._quiet.pop(user_id, None)
+
+    # Resolution and delivery
+    def resolve(self, trade: Trade, alert_ids: Optional[List[int]] = None) -> Dict[int, str]:
+        """Map each recipient of a trade to its alert type.
+
+        Tracked-whale wins over custom alerts, which win over threshold alerts.
+        alert_ids are the trade's custom-alert matches when already computed in a batch.
+        """
+        recipients: Dict[int, str] = {}
+        for user_id in self._by_whale.get(trade.trader_address.lower(), ()):
+            if user_id not in self._muted:
+                recipients[user_id] = ALERT_TRACKED
+        if alert_ids is None:
+            alert_ids = self._matcher.match(trade)
+        for alert_id in alert_ids:
+            user_id = self._matcher.user_of(alert_id)
+            if user_id not in self._muted:
+                recipients.setdefault(user_id, ALERT_CUSTOM)
+        # Buckets are sorted, so every bucket up to the trade size matches
+        for threshold in self._bucket_keys[:bisect_right(self._bucket_keys, trade.size)]:
+            for user_id in self._buckets[threshold]:
+                if user_id not in self._muted:
+                    recipients.setdefault(user_id, ALERT_THRESHOLD)
+        return recipients
+
+    def dispatch(self, trades: List[Trade]) -> None:
+        """Queue alerts for new whale trades (never blocks the poll loop)"""
+        queued = deferred = 0
+        now = datetime.utcnow()
+        # Quiet window end per user for this batch (None = not quiet right now)
+        quiet_until: Dict[int, Optional[datetime]] = {}
+        matches = self._matcher.match_batch(trades)
+        for trade, alert_ids in zip(trades, matches):
+            for user_id, kind in self.resolve(trade, alert_ids).items():
+                if self.deferred is not None and user_id in self._quiet:
+                    if user_id not in quiet_until:
+                        quiet_until[user_id] = self._quiet[user_id].quiet_time_end(now)
+                    deliver_at = quiet_until[user_id]
+                    if deliver_at is not None:
+                        self.deferred.defer(user_id, trade.id, kind, self.format_summary(trade), deliver_at)
+                        deferred += 1
+                        continue
+                if self.coalescer is not None:
+                    self.coalescer.add(user_id, kind, trade)
+                else:
+                    self._send(user_id, kind, [trade])
+                queued += 1
+        if queued or deferred:
+            logger.info(f"Queued {queued} whale alerts ({deferred} deferred) for {len(trades)} trades")
+
+    def _send(self, user_id: int, kind: str, trades: List[Trade]) -> None:
+        """Enqueue one message for a trade, or a summary for coalesced fills"""
+        text = self.format_alert(trades[0], kind) if len(trades) == 1 else self.format_coalesced(trades, kind)
+        self.sender.enqueue(
+            user_id,
+            text,
+            priority=PRIORITY_TRACKED if kind == ALERT_TRACKED else PRIORITY_THRESHOLD,
+            user_id=user_id,
+            trade_id=trades[-1].id,
+            notification_type=kind,
+            parse_mode="Markdown",
+            disable_web_page_preview=True,
+        )
+
+    def format_alert(self, trade: Trade, kind: str) -> str:
+        header = "👀 Tracked whale trade" if kind == ALERT_TRACKED else f"{trade.whale_emoji} Whale alert"
+        market_name = trade.market_name or trade.market_id
+        lines = [
+            f"{header}",
+            f"• Trader: {md_link(trade.get_trader_display_name(), trade.get_profile_url())}",
+            f"• Trade: {trade.format_size()} — {escape_md((trade.side or '').upper())} "
+            f"{escape_md(trade.outcome)} @ {trade.format_price()}",
+            f"• Market: {md_link(market_name[:60], trade.get_market_url())}",
+        ]
+        return "\n".join(lines)
+
+    def format_coalesced(self, trades: List[Trade], kind: str) -> str:
+        """Summary of several fills by one whale in one market"""
+        first = trades[0]
+        total = sum(trade.size for trade in trades)
+        largest = max(trades, key=lambda trade: trade.size)
+        header = "👀 Tracked whale trade" if kind == ALERT_TRACKED else f"{largest.whale_emoji} Whale alert"
+        market_name = first.market_name or first.market_id
+        lines = [
+            f"{header}",
+            f"• Trader: {md_link(first.get_trader_display_name(), first.get_profile_url())}",
+            f"• Trade: {format_size(total)} — {escape_md((first.side or '').upper())} {escape_md(first.outcome)} "
+            f"@ {format_price(vwap(trades))} VWAP ({len(trades)} fills)",
+            f"• Market: {md_link(market_name[:60], first.get_market_url())}",
+        ]
+        return "\n".join(lines)
+
+    def format_summary(self, trade: Trade) -> str:
+        """One-line form of an alert, used in quiet-hours digests"""
+        market_name = trade.market_name or trade.market_id
+        return (
+            f"{trade.whale_emoji} {trade.format_size()} {escape_md((trade.side or '').upper())} "
+            f"{escape_md(trade.outcome)} @ {trade.format_price()} — {md_link(market_name[:40], trade.get_market_url())}"
+        )
+
+    # Background refresh
+    async def start(self) -> None:
+        """Load the indexes, then reload periodically to pick up other instances' changes"""
+        self.is_running = True
+        interval = settings.ALERT_INDEX_REFRESH_INTERVAL
+        while self.is_running:
+            try:
+                await self.load()
+            except Exception as e:
+                logger.error(f"Failed to load alert index: {e}")
+            if interval <= 0:
+                return
+            await asyncio.sleep(interval)
+
+    async def stop(self) -> None:
+        self.is_running = False
+        if self.coalescer is not None:
+            self.coalescer.flush_all()
@@ -0,0 +1,123 @@
+"""
+Compiled alert matcher - evaluates every active alert rule against trades in one pass
+"""
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from loguru import logger
+
+from bot.models import Alert
+
+DEFAULT_MIN_SIZE = 10000
+
+
+def _string_list(filters: Dict[str, Any], name: str) -> List[str]:
+    """A list filter as a list of strings (empty when unset); raises ValueError if malformed"""
+    values = filters.get(name) or []
+    if not isinstance(values, (list, tuple, set)) or not all(isinstance(v, str) for v in values):
+        raise ValueError(f"{name} must be a list of strings, got {values!r}")
+    return list(values)
+
+
+class CompiledAlertMatcher:
+    """Set and interval indexes over all active alerts' filters.
+
+    Same semantics as Alert.matches_trade: a trade must reach min_size (10000
+    when unset; 0 matches any size) and be in every non-empty `whales` / `markets` / `categories` list;
+    the category filter only applies to trades that carry a category. Alerts
+    with malformed filters are skipped with a warning.
+
+    Alerts with list filters are found through hash indexes and a hit counter;
+    alerts with only a size filter sit in arrays sorted by min_size, so the
+    matches for a trade are a bisected prefix. Cost per trade is O(index hits +
+    matches), independent of the total number of rules.
+    """
+
+    def __init__(self, alerts: Iterable[Alert]):
+        self._by_whale: Dict[str, List[int]] = defaultdict(list)
+        self._by_market: Dict[str, List[int]] = defaultdict(list)
+        self._by_category: Dict[str, List[int]] = defaultdict(list)
+        # alert id -> (min_size, list dims without category, has category filter)
+        self._constrained: Dict[int, Tuple[float, int, bool]] = {}
+        self._user_of: Dict[int, int] = {}
+
+        # Size-only alerts: always size-only, and those whose only list filter is category
+        size_only: List[Tuple[float, int]] = []
+        category_only: List[Tuple[float, int]] = []
+
+        for alert in alerts:
+            if not alert.is_active:
+                continue
+            filters = alert.filters or {}
+            try:
+                min_size = filters.get("min_size")
+                min_size = float(DEFAULT_MIN_SIZE if min_size is None else min_size)
+                whales = _string_list(filters, "whales")
+                markets = _string_list(filters, "markets")
+                categories = _string_list(filters, "categories")
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Skipping alert {alert.id} with malformed filters: {e}")
+                continue
+            self._user_of[alert.id] = alert.user_id
+
+            for whale in set(whales):
+                self._by_whale[whale].append(alert.id)
+            for market in set(markets):
+                self._by_market[market].append(alert.id)
+            for category in set(categories):
+                self._by_category[category].append(alert.id)
+
+            dims = (1 if whales else 0) + (1 if markets else 0)
+            if dims:
+                self._constrained[alert.id] = (min_size, dims, bool(categories))
+            elif categories:
+                self._constrained[alert.id] = (min_size, 0, True)
+                category_only.append((min_size, alert.id))
+            else:
+                size_only.append((min_size, alert.id))
+
+        size_only.sort()
+        category_only.sort()
+        self._size_only_keys = [m for m, _ in size_only]
+        self._size_only_ids = [a for _, a in size_only]
+        self._category_only_keys = [m for m, _ in category_only]
+        self._category_only_ids = [a for _, a in category_only]
+
+    def __len__(self) -> int:
+        return len(self._user_of)
+
+    def user_of(self, alert_id: int) -> int:
+        """Owner of an alert"""
+        return self._user_of[alert_id]
+
+    def match(self, trade: Any) -> List[int]:
+        """Ids of all active alerts matching a trade"""
+        size = trade.size
+        category = getattr(trade, "category", None)
+        has_category = category is not None
+
+        matched = self._size_only_ids[:bisect_right(self._size_only_keys, size)]
+        if not has_category:
+            # Category filters don't apply, so category-only alerts are size-only here
+            matched += self._category_only_ids[:bisect_right(self._category_only_keys, size)]
+
+        hits: Dict[int, int] = defaultdict(int)
+        for alert_id in self._by_whale.get(trade.trader_address, ()):
+            hits[alert_id] += 1
+        for alert_id in self._by_market.get(trade.market_id, ()):
+            hits[alert_id] += 1
+        if has_category:
+            for alert_id in self._by_category.get(category, ()):
+                hits[alert_id] += 1
+
+        for alert_id, count in hits.items():
+            min_size, dims, has_category_filter = self._constrained[alert_id]
+            required = dims + (1 if has_category and has_category_filter else 0)
+            if count == required and size >= min_size:
+                matched.append(alert_id)
+        return matched
+
+    def match_batch(self, trades: Sequence[Any]) -> List[List[int]]:
+        """Matching alert ids for each trade, in order"""
+        return [self.match(trade) for trade in trades]
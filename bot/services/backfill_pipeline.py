@@ -0,0 +1,356 @@
+"""
+Pipelined, resumable trade backfill - fetch, parse and write run as concurrent stages
+"""
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from config.settings import settings
+from bot.models import Trade
+from bot.services.database import Database
+from bot.services.polymarket_api import PolymarketAPI
+from bot.services.send_queue import TokenBucket
+from bot.services.trade_pagination import TradePaginator, oldest_item_timestamp
+from bot.services.trade_parser import parse_trade_page, promote
+
+_DONE = None  # queue sentinel
+
+
+@dataclass
+class BackfillSlice:
+    """One independently fetchable part of the backfill and how far it has got.
+
+    key is "cursor", "offset" or the ISO start of a time slice; position is the
+    cursor, the next offset, or the `before` timestamp of the next page.
+    """
+    key: str
+    position: Optional[str] = None
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    done: bool = False
+
+
+class PaginationMismatch(RuntimeError):
+    """The API stopped honouring the pagination the run was planned with"""
+
+
+# (slice key, position after the page, slice finished with this page)
+PageToken = Tuple[str, Optional[str], bool]
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(tzinfo=None) if moment.tzinfo else moment
+
+
+def _utc_iso(value: str) -> str:
+    """ISO timestamp with an explicit UTC offset (naive values are taken as UTC)"""
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.isoformat()
+
+
+class BackfillPipeline:
+    """Bounded producer/consumer backfill connected by asyncio queues.
+
+    fetch (N workers) -> raw pages -> parse -> whale trades -> write (COPY chunks)
+
+    How fetching fans out depends on the pagination the API offers: with
+    `before` the window is cut into time slices walked concurrently, with
+    `offset` workers claim page offsets from a shared counter, and a `cursor`
+    chain is inherently sequential. All workers share one request rate limit.
+    After each chunk is committed, the writer checkpoints every slice's position
+    in backfill_state, so a run restarted with resume=True continues from there;
+    pages fetched again after a crash are harmless since loads are idempotent.
+    Each page is retried with exponential backoff; a slice whose page still
+    fails is abandoned (left unfinished in its checkpoint) while the others carry
+    on, and `failed` in the result tells the caller to resume.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        api: PolymarketAPI,
+        cutoff: datetime,
+        run_id: str,
+        limit: int = 200,
+        concurrency: int = 4,
+        chunk_size: int = 5000,
+        max_pages: int = 1000,
+        slice_hours: int = 24,
+        rate: Optional[float] = None,
+        resume: bool = False,
+    ):
+        self.db = db
+        self.api = api
+        self.cutoff = cutoff
+        self.run_id = run_id
+        self.limit = limit
+        self.concurrency = max(1, concurrency)
+        self.chunk_size = chunk_size
+        self.pages_left = max_pages
+        self.slice_hours = slice_hours
+        self.resume = resume
+        self.rate_limiter = TokenBucket(rate or settings.BACKFILL_RATE_LIMIT)
+
+        self.raw_pages: "asyncio.Queue" = asyncio.Queue(maxsize=self.concurrency * 2)
+        self.parsed_pages: "asyncio.Queue" = asyncio.Queue(maxsize=self.concurrency * 2)
+        self.slices: Dict[str, BackfillSlice] = {}
+        self._stop_offsets = False
+        self._next_offset = 0
+        self._completed_offsets: Set[int] = set()
+        self._end_offset: Optional[int] = None
+
+        self.fetch_attempts = max(1, settings.BACKFILL_FETCH_ATTEMPTS)
+        self.retry_delay = settings.BACKFILL_RETRY_DELAY
+
+        self.pages = 0
+        self.seen = 0
+        self.whales = 0
+        self.saved = 0
+        self.failed = 0
+
+    # Planning and checkpoints
+    async def _plan(self) -> str:
+        """Load the run's slices from backfill_state, or plan fresh ones; returns the strategy"""
+        if self.resume:
+            rows = await self.db.get_backfill_state(self.run_id)
+            if rows:
+                for row in rows:
+                    self.slices[row["slice_key"]] = BackfillSlice(
+                        key=row["slice_key"], position=row["position"],
+                        start=row["slice_start"], end=row["slice_end"], done=row["done"],
+                    )
+                pending = sum(1 for s in self.slices.values() if not s.done)
+                logger.info(f"Resuming run {self.run_id}: {pending}/{len(self.slices)} slices left")
+                return self._strategy_of_slices()
+            logger.info(f"No saved state for run {self.run_id}; starting fresh")
+
+        # Probe one page to learn which pagination the API supports
+        probe = TradePaginator(limit=self.limit)
+        items, next_cursor = await self._fetch(probe.params())
+        probe.advance(items, next_cursor)
+        strategy = probe.strategy
+
+        if strategy == "before":
+            newest = datetime.utcnow()
+            end = newest
+            while end > self.cutoff:
+                start = max(self.cutoff, end - timedelta(hours=self.slice_hours))
+                key = start.isoformat()
+                self.slices[key] = BackfillSlice(key=key, position=_utc_iso(end.isoformat()), start=start, end=end)
+                end = start
+        elif strategy == "offset":
+            self.slices["offset"] = BackfillSlice(key="offset", position="0")
+        else:
+            self.slices["cursor"] = BackfillSlice(key="cursor")
+        await self.db.clear_backfill_state(self.run_id)
+        await self._checkpoint(list(self.slices.values()))
+        logger.info(f"Backfill run {self.run_id}: strategy={strategy}, slices={len(self.slices)}")
+        return strategy
+
+    def _strategy_of_slices(self) -> str:
+        if "cursor" in self.slices:
+            return "cursor"
+        if "offset" in self.slices:
+            return "offset"
+        return "before"
+
+    async def _checkpoint(self, slices: List[BackfillSlice]) -> None:
+        await self.db.save_backfill_state(
+            self.run_id, [(s.key, s.start, s.end, s.position, s.done) for s in slices]
+        )
+
+    # Fetch stage
+    async def _fetch(self, params: Dict[str, str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page, retried with exponential backoff; raises once every attempt failed"""
+        attempt = 1
+        while True:
+            await self.rate_limiter.acquire()
+            try:
+                return await self.api.fetch_trades_page(params)
+            except Exception as e:
+                if attempt >= self.fetch_attempts:
+                    raise
+                delay = self.retry_delay * 2 ** (attempt - 1)
+                logger.warning(f"Page fetch failed ({e}); retry {attempt}/{self.fetch_attempts - 1} in {delay:.0f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def _take_page_budget(self) -> bool:
+        if self.pages_left <= 0:
+            return False
+        self.pages_left -= 1
+        self.pages += 1
+        return True
+
+    async def _walk_time_slices(self, pending: "asyncio.Queue[BackfillSlice]") -> None:
+        """Worker: walk whole time slices backwards with `before`"""
+        while not pending.empty():
+            slice_ = pending.get_nowait()
+            try:
+                await self._walk_time_slice(slice_)
+            except PaginationMismatch:
+                raise
+            except Exception as e:
+                # Its checkpoint stays at the last committed page; the other slices carry on
+                self.failed += 1
+                logger.error(f"Giving up on slice {slice_.key} for this run: {e}")
+
+    async def _walk_time_slice(self, slice_: BackfillSlice) -> None:
+        paginator = TradePaginator(limit=self.limit)
+        paginator.strategy = "before"
+        paginator.before_iso = _utc_iso(slice_.position) if slice_.position else None
+        while self._take_page_budget():
+            items, next_cursor = await self._fetch(paginator.params())
+            oldest = oldest_item_timestamp(items)
+            if items:
+                paginator.advance(items, next_cursor)
+                if paginator.strategy != "before":
+                    raise PaginationMismatch("API ignored 'before'; rerun with --concurrency 1")
+            finished = not items or oldest is None or _naive_utc(oldest) < slice_.start
+            await self.raw_pages.put((items, (slice_.key, paginator.before_iso, finished)))
+            if finished:
+                break
+
+    async def _walk_offsets(self) -> None:
+        """Worker: claim page offsets from the shared counter until the window is covered"""
+        while not self._stop_offsets and self._take_page_budget():
+            offset = self._next_offset
+            self._next_offset += self.limit
+            try:
+                items, _ = await self._fetch({"limit": str(self.limit), "offset": str(offset)})
+            except Exception as e:
+                # The checkpoint can't move past a missing offset, so fetching further is wasted
+                self._stop_offsets = True
+                self.failed += 1
+                logger.error(f"Giving up at offset {offset} for this run: {e}")
+                return
+            oldest = oldest_item_timestamp(items)
+            finished = not items or (oldest is not None and _naive_utc(oldest) < self.cutoff)
+            if finished:
+                self._stop_offsets = True
+            await self.raw_pages.put((items, ("offset", str(offset), finished)))
+
+    async def _walk_cursor(self, slice_: BackfillSlice) -> None:
+        """Single worker: follow the cursor chain (it can't be parallelised)"""
+        paginator = TradePaginator(limit=self.limit)
+        paginator.strategy = "cursor"
+        paginator.cursor = slice_.position
+        while self._take_page_budget():
+            try:
+                items, next_cursor = await self._fetch(paginator.params())
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Giving up on the cursor chain for this run: {e}")
+                return
+            has_more = bool(items) and paginator.advance(items, next_cursor)
+            oldest = oldest_item_timestamp(items)
+            finished = not has_more or (oldest is not None and _naive_utc(oldest) < self.cutoff)
+            await self.raw_pages.put((items, ("cursor", paginator.cursor, finished)))
+            if finished:
+                break
+
+    async def _run_fetchers(self, strategy: str) -> None:
+        try:
+            pending = [s for s in self.slices.values() if not s.done]
+            if strategy == "before":
+                queue: "asyncio.Queue[BackfillSlice]" = asyncio.Queue()
+                for slice_ in pending:
+                    queue.put_nowait(slice_)
+                await asyncio.gather(*(self._walk_time_slices(queue) for _ in range(self.concurrency)))
+            elif strategy == "offset" and pending:
+                self._next_offset = int(pending[0].position or 0)
+                await asyncio.gather(*(self._walk_offsets() for _ in range(self.concurrency)))
+            elif pending:
+                await self._walk_cursor(pending[0])
+        finally:
+            await self.raw_pages.put(_DONE)
+
+    # Parse stage
+    async def _run_parser(self) -> None:
+        while True:
+            page = await self.raw_pages.get()
+            if page is _DONE:
+                await self.parsed_pages.put(_DONE)
+                return
+            items, token = page
+            self.seen += len(items)
+            # Size filter runs before any record is built; only in-window whales become Trades
+            records = parse_trade_page(items, min_size=settings.WHALE_THRESHOLD)
+            trades = promote(r for r in records if r.timestamp >= self.cutoff)
+            self.whales += len(trades)
+            await self.parsed_pages.put((trades, token))
+
+    # Write stage
+    def _apply_token(self, token: PageToken) -> BackfillSlice:
+        key, position, finished = token
+        slice_ = self.slices[key]
+        if key == "offset":
+            # Concurrent offsets complete out of order: only checkpoint the contiguous prefix
+            offset = int(position)
+            if finished and (self._end_offset is None or offset < self._end_offset):
+                self._end_offset = offset
+            self._completed_offsets.add(offset)
+            watermark = int(slice_.position or 0)
+            while watermark in self._completed_offsets:
+                self._completed_offsets.discard(watermark)
+                watermark += self.limit
+            slice_.position = str(watermark)
+            slice_.done = self._end_offset is not None and watermark > self._end_offset
+        else:
+            slice_.position = position
+            slice_.done = finished
+        return slice_
+
+    async def _flush(self, trades: List[Trade], tokens: List[PageToken]) -> None:
+        if trades:
+            self.saved += await self.db.bulk_load_trades(trades)
+        touched = {slice_.key: slice_ for slice_ in map(self._apply_token, tokens)}
+        if touched:
+            await self._checkpoint(list(touched.values()))
+        logger.info(
+            f"Chunk committed: pages={self.pages}, seen={self.seen}, whales={self.whales}, saved={self.saved}"
+        )
+
+    async def _run_writer(self) -> None:
+        trades: List[Trade] = []
+        tokens: List[PageToken] = []
+        while True:
+            page = await self.parsed_pages.get()
+            if page is _DONE:
+                break
+            page_trades, token = page
+            trades.extend(page_trades)
+            tokens.append(token)
+            if len(trades) >= self.chunk_size:
+                await self._flush(trades, tokens)
+                trades, tokens = [], []
+        await self._flush(trades, tokens)
+
+    async def run(self) -> Dict[str, int]:
+        """Run the backfill to completion; returns counters"""
+        await self.db.ensure_backfill_state_table()
+        strategy = await self._plan()
+        stages = [
+            asyncio.create_task(self._run_fetchers(strategy)),
+            asyncio.create_task(self._run_parser()),
+            asyncio.create_task(self._run_writer()),
+        ]
+        try:
+            await asyncio.gather(*stages)
+        except Exception:
+            for task in stages:
+                task.cancel()
+            raise
+
+        # One set-based recompute instead of per-trade whale updates
+        updated = await self.db.reconcile_whale_stats()
+        logger.info(f"Whale stats recomputed: {updated} whales updated")
+        if self.failed:
+            logger.warning(f"{self.failed} slices failed; rerun with --resume to finish them")
+        return {"pages": self.pages, "seen": self.seen, "whales": self.whales, "saved": self.saved,
+                "failed": self.failed}
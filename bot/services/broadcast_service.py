@@ -3,22 +3,70 @@ Broadcast service: periodically posts real-time whale highlights to a Telegram c
 """
 import asyncio
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Iterable, List, Optional
 from loguru import logger
 
 from config.settings import settings
+from bot.models import Trade
 from bot.services.database import Database
+from bot.services.send_queue import PRIORITY_CHANNEL, MessageScheduler
+from bot.utils.top_k import TopK
+
+
+class TopTradesFeed:
+    """Largest whale trades ingested since the broadcaster last drained it.
+
+    The tracker pushes each poll's new whale trades and marks the feed active
+    while it is the instance polling Polymarket. A window can only be served
+    from the feed if the feed was active for all of it; otherwise (standby
+    instance, first tick after startup) the broadcaster falls back to Postgres.
+    """
+
+    def __init__(self, k: int = 1, min_amount: float = 0):
+        self.min_amount = min_amount
+        self._top: TopK[Trade] = TopK(k)
+        self.active_since: Optional[datetime] = None
+
+    def set_active(self, active: bool) -> None:
+        if not active:
+            self.active_since = None
+        elif self.active_since is None:
+            self.active_since = datetime.utcnow()
+            # Anything pushed before this is from an earlier, interrupted stretch
+            self._top.drain()
+
+    def covers(self, start: datetime) -> bool:
+        """Whether every trade ingested since `start` went through this feed"""
+        return self.active_since is not None and self.active_since <= start
+
+    def push(self, trades: Iterable[Trade]) -> None:
+        for trade in trades:
+            if trade.size >= self.min_amount:
+                self._top.push(trade.size, trade)
+
+    def drain(self) -> List[Trade]:
+        """Top trades of the window, largest first; starts the next window"""
+        return self._top.drain()
 
 
 class BroadcastService:
-    """Posts the largest whale trade in the last interval to a channel."""
+    """Posts the largest whale trades of the last interval to a channel.
 
-    def __init__(self, db: Database, bot):
+    The top BROADCAST_TOP_N trades come straight from the tracker's feed when
+    this instance is polling, or from Postgres when it isn't.
+    """
+
+    def __init__(self, db: Database, bot, sender: Optional[MessageScheduler] = None):
         self.db = db
         self.bot = bot
+        # Rate-limited send queue (channel broadcasts use the top-priority lane)
+        self.sender = sender
         self.is_running = False
         self.interval = int(getattr(settings, "BROADCAST_INTERVAL_SECONDS", 60) or 60)
         self.min_amount = int(getattr(settings, "BROADCAST_MIN_USD", 1000) or 1000)
+        self.top_n = max(1, settings.BROADCAST_TOP_N)
+        # Filled by the whale tracker (main wires tracker.broadcast_feed = service.feed)
+        self.feed = TopTradesFeed(self.top_n, self.min_amount)
         self.last_sent_trade_id: Optional[str] = None
         self._application = None  # set in start()
         # Track last tick to use non-overlapping time windows
@@ -80,41 +128,65 @@ class BroadcastService:
         # Move window forward for the next tick
         self._last_tick_at = end
 
-        trade = await self.db.get_largest_whale_trade_between(start, end, self.min_amount)
-        if not trade:
+        if self.feed.covers(start):
+            trades = self.feed.drain()
+        else:
+            self.feed.drain()
+            trades = await self.db.get_largest_whale_trades_between(start, end, self.min_amount, limit=self.top_n)
+        if not trades:
             logger.debug(
                 f"BroadcastService: no qualifying trade in window {start.isoformat()} → {end.isoformat()}"
             )
             return
 
         # In-process guard against accidental double-send
-        if trade.id == self.last_sent_trade_id:
-            logger.debug("BroadcastService: trade already sent in this window; skipping")
-            return
-
+        trades = [t for t in trades if t.id != self.last_sent_trade_id]
         # Cross-process dedup: only one instance should broadcast a given trade id
-        inserted = await self.db.try_record_broadcast(trade.id)
-        if not inserted:
-            logger.debug("BroadcastService: trade already broadcasted previously; skipping")
+        fresh = []
+        for trade in trades:
+            if await self.db.try_record_broadcast(trade.id):
+                fresh.append(trade)
+        if not fresh:
+            logger.debug("BroadcastService: trades already broadcasted previously; skipping")
             return
 
-        agg = await self.db.get_trader_aggregate(trade.trader_address)
-        message = self._format_message(trade, agg)
+        if len(fresh) == 1:
+            trade = fresh[0]
+            agg = await self.db.get_trader_aggregate(trade.trader_address)
+            message = self._format_message(trade, agg)
+        else:
+            message = self._format_top_message(fresh)
 
         try:
-            await self.bot.send_message(chat_id=channel_id, text=message, parse_mode="Markdown")
-            self.last_sent_trade_id = trade.id
+            if self.sender is not None:
+                delivered = await self.sender.send(
+                    channel_id,
+                    message,
+                    priority=PRIORITY_CHANNEL,
+                    trade_id=fresh[0].id,
+                    notification_type="broadcast",
+                    parse_mode="Markdown",
+                )
+                if not delivered:
+                    return
+            else:
+                await self.bot.send_message(chat_id=channel_id, text=message, parse_mode="Markdown")
+            self.last_sent_trade_id = fresh[0].id
             logger.info(
-                f"BroadcastService: posted trade {trade.id} (${trade.size:,.0f}) to channel {channel_id}"
+                f"BroadcastService: posted {len(fresh)} trade(s), largest {fresh[0].id} "
+                f"(${fresh[0].size:,.0f}) to channel {channel_id}"
             )
         except Exception as e:
             logger.error(f"BroadcastService: failed to send message: {e}")
 
-    def _format_message(self, trade, agg) -> str:
-        # Profile URL
+    @staticmethod
+    def _trader_link(trade) -> str:
         profile_url = f"https://polymarket.com/profile/{trade.trader_address}"
-        # Trader display
-        trader_display = f"[{trade.trader_address[:6]}...{trade.trader_address[-4:]}]({profile_url})"
+        return f"[{trade.trader_address[:6]}...{trade.trader_address[-4:]}]({profile_url})"
+
+    def _format_message(self, trade, agg) -> str:
+        # Trader display (links to the profile)
+        trader_display = self._trader_link(trade)
         # Side/price text
         side = (trade.side or "").upper()
         price_txt = f" @ {float(trade.price):.2f}" if trade.price is not None else ""
@@ -134,3 +206,13 @@ class BroadcastService:
         ]
         return "\n".join(lines)
 
+    def _format_top_message(self, trades: List[Trade]) -> str:
+        lines = [f"🔥 Top {len(trades)} Whale Trades in the last {self.interval} seconds"]
+        for rank, trade in enumerate(trades, 1):
+            side = (trade.side or "").upper()
+            market_name = trade.market_name or trade.market_id
+            lines.append(
+                f"{rank}. ${float(trade.size):,.0f} — {side} @ {float(trade.price):.2f} "
+                f"by {self._trader_link(trade)} on {market_name}"
+            )
+        return "\n".join(lines)
@@ -3,12 +3,98 @@ Database service for PolyWhale bot
 """
 import asyncpg
 import json
-from typing import List, Optional, Dict, Any, Union
-from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple, Union
+from datetime import datetime, timedelta
 from loguru import logger
 
 from config.settings import settings
-from bot.models import Trade, Whale, Market, User
+from bot.models import Trade, Whale, Market, User, Alert
+from bot.utils.ttl_cache import TTLCache, cached
+
+
+def next_hour_boundary(moment: datetime) -> datetime:
+    """`moment` if it is on the hour, otherwise the start of the following hour"""
+    floored = moment.replace(minute=0, second=0, microsecond=0)
+    return floored if floored == moment else floored + timedelta(hours=1)
+
+
+# Whale activity per (market, side) since $1: whole hours from market_hourly_stats
+# (from $2 on) plus raw whale trades (>= $3) in the partial hour before $2
+MARKET_ACTIVITY_SQL = """
+    SELECT market_id, side, whale_trades, whale_volume, last_trade_at, market_name, market_slug, event_slug
+    FROM market_hourly_stats
+    WHERE hour >= $2
+    UNION ALL
+    SELECT market_id, COALESCE(side, ''), 1, size, timestamp, market_name, NULL, NULL
+    FROM trades
+    WHERE timestamp >= $1 AND timestamp < $2 AND size >= $3
+"""
+
+
+def trade_merge_ctes(threshold: str) -> List[str]:
+    """CTEs that insert the rows of an `input` relation into trades and fold the
+    newly inserted ones (never conflicting duplicates) into the hourly rollups.
+
+    Each id is first claimed in trade_ids: the partitioned trades table can only
+    enforce (id, timestamp), so a trade seen again with another timestamp would
+    otherwise be inserted, and counted in the rollups, twice.
+    threshold is the placeholder bound to WHALE_THRESHOLD, e.g. "$10".
+    """
+    return [
+        """
+        claimed AS (
+            INSERT INTO trade_ids (id, timestamp)
+            SELECT id, timestamp FROM input
+            ON CONFLICT (id) DO NOTHING
+            RETURNING id
+        )
+        """,
+        """
+        inserted AS (
+            INSERT INTO trades (id, trader_address, market_id, market_name, side, size, price, timestamp, transaction_hash)
+            SELECT id, trader_address, market_id, market_name, side, size, price, timestamp, transaction_hash
+            FROM input
+            WHERE id IN (SELECT id FROM claimed)
+            ON CONFLICT DO NOTHING
+            RETURNING id, trader_address, market_id, market_name, side, size, timestamp
+        )
+        """,
+        f"""
+        whale_hourly AS (
+            INSERT INTO whale_hourly_stats (hour, trader_address, total_volume, trade_count, largest_trade)
+            SELECT date_trunc('hour', timestamp), trader_address, SUM(size), COUNT(*), MAX(size)
+            FROM inserted
+            WHERE size >= {threshold}::float8
+            GROUP BY 1, 2
+            ON CONFLICT (hour, trader_address)
+            DO UPDATE SET
+                total_volume = whale_hourly_stats.total_volume + EXCLUDED.total_volume,
+                trade_count = whale_hourly_stats.trade_count + EXCLUDED.trade_count,
+                largest_trade = GREATEST(whale_hourly_stats.largest_trade, EXCLUDED.largest_trade)
+        )
+        """,
+        f"""
+        market_hourly AS (
+            INSERT INTO market_hourly_stats (hour, market_id, side, whale_trades, whale_volume,
+                                             last_trade_at, market_name, market_slug, event_slug)
+            SELECT date_trunc('hour', i.timestamp), i.market_id, COALESCE(i.side, ''),
+                   COUNT(*), SUM(i.size), MAX(i.timestamp), MAX(i.market_name),
+                   MAX(NULLIF(s.market_slug, '')), MAX(NULLIF(s.event_slug, ''))
+            FROM inserted i
+            JOIN input s ON s.id = i.id
+            WHERE i.size >= {threshold}::float8
+            GROUP BY 1, 2, 3
+            ON CONFLICT (hour, market_id, side)
+            DO UPDATE SET
+                whale_trades = market_hourly_stats.whale_trades + EXCLUDED.whale_trades,
+                whale_volume = market_hourly_stats.whale_volume + EXCLUDED.whale_volume,
+                last_trade_at = GREATEST(market_hourly_stats.last_trade_at, EXCLUDED.last_trade_at),
+                market_name = COALESCE(EXCLUDED.market_name, market_hourly_stats.market_name),
+                market_slug = COALESCE(EXCLUDED.market_slug, market_hourly_stats.market_slug),
+                event_slug = COALESCE(EXCLUDED.event_slug, market_hourly_stats.event_slug)
+        )
+        """,
+    ]
 
 
 class Database:
@@ -16,6 +102,10 @@ class Database:
 
     def __init__(self):
         self.pool: Optional[asyncpg.Pool] = None
+        # Read-through cache for aggregate queries (see CACHE_TTL_* settings)
+        self.cache = TTLCache(max_entries=settings.CACHE_MAX_ENTRIES)
+        # Optional cross-instance cache consulted on local misses (RedisCache)
+        self.shared_cache = None
 
     async def connect(self):
         """Create database connection pool"""
@@ -77,24 +167,110 @@ class Database:
     # Trade operations
     async def save_trade(self, trade: Trade) -> None:
         """Save a trade to database"""
-        query = """
-            INSERT INTO trades (id, trader_address, market_id, market_name, side, size, price, timestamp, transaction_hash)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-            ON CONFLICT (id) DO NOTHING
+        # Same path as batches so the hourly rollups stay in step
+        await self.save_trades([trade])
+
+    async def save_trades(self, trades: List[Trade], incremental_stats: bool = False) -> List[Trade]:
+        """Save a batch of trades in a single multi-row insert.
+
+        With incremental_stats, whale totals are bumped by deltas of the rows that were
+        actually inserted (in the same statement) instead of being recomputed from history.
+        The hourly whale and market rollups are always updated from the inserted rows.
+        Returns the trades that were actually inserted (ids already present are skipped).
         """
+        # Deduplicate by id, keeping the first occurrence
+        unique: Dict[str, Trade] = {}
+        for trade in trades:
+            unique.setdefault(trade.id, trade)
+        if not unique:
+            return []
+
+        batch = list(unique.values())
+        # Conflicting (already stored) rows are not RETURNed, so they never count twice
+        ctes = ["""
+            input AS (
+                SELECT * FROM unnest(
+                    $1::text[], $2::text[], $3::text[], $4::text[], $5::text[],
+                    $6::float8[], $7::float8[], $8::timestamp[], $9::text[], $11::text[], $12::text[]
+                ) AS t(id, trader_address, market_id, market_name, side, size, price, timestamp,
+                       transaction_hash, market_slug, event_slug)
+            )
+        """] + trade_merge_ctes("$10")
+        if incremental_stats:
+            ctes.append("""
+                whale_deltas AS (
+                    INSERT INTO whales (address, total_volume, total_trades, last_trade_at)
+                    SELECT trader_address, SUM(size), COUNT(*), MAX(timestamp)
+                    FROM inserted
+                    GROUP BY trader_address
+                    ON CONFLICT (address)
+                    DO UPDATE SET
+                        total_volume = whales.total_volume + EXCLUDED.total_volume,
+                        total_trades = whales.total_trades + EXCLUDED.total_trades,
+                        last_trade_at = GREATEST(whales.last_trade_at, EXCLUDED.last_trade_at)
+                )
+            """)
+        query = "WITH " + ",".join(ctes) + " SELECT id FROM inserted"
+
         async with self.pool.acquire() as conn:
-            await conn.execute(
+            rows = await conn.fetch(
                 query,
-                trade.id,
-                trade.trader_address,
-                trade.market_id,
-                trade.market_name,
-                trade.side,
-                trade.size,
-                trade.price,
-                trade.timestamp,
-                trade.transaction_hash
+                [t.id for t in batch],
+                [t.trader_address for t in batch],
+                [t.market_id for t in batch],
+                [t.market_name for t in batch],
+                [t.side for t in batch],
+                [t.size for t in batch],
+                [t.price for t in batch],
+                [t.timestamp for t in batch],
+                [t.transaction_hash for t in batch],
+                float(settings.WHALE_THRESHOLD),
+                [t.market_slug for t in batch],
+                [t.event_slug for t in batch],
             )
+        inserted_ids = {row["id"] for row in rows}
+        return [t for t in batch if t.id in inserted_ids]
+
+    async def bulk_load_trades(self, trades: List[Trade]) -> int:
+        """Load a chunk of trades via COPY into a staging table and one set-based merge.
+
+        Meant for backfills: rollups are maintained like in save_trades, whale stats
+        are not (run reconcile_whale_stats once when the load is done).
+        Returns the number of trades actually inserted.
+        """
+        if not trades:
+            return 0
+        records = [
+            (t.id, t.trader_address, t.market_id, t.market_name, t.side, float(t.size), float(t.price),
+             t.timestamp, t.transaction_hash, t.market_slug, t.event_slug)
+            for t in trades
+        ]
+        query = "WITH " + ",".join([
+            # Duplicates inside a chunk would double count in the rollup join
+            "input AS (SELECT DISTINCT ON (id) * FROM trades_staging ORDER BY id)",
+        ] + trade_merge_ctes("$1")) + " SELECT COUNT(*) FROM inserted"
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("""
+                    CREATE TEMP TABLE trades_staging (
+                        id TEXT, trader_address TEXT, market_id TEXT, market_name TEXT, side TEXT,
+                        size FLOAT8, price FLOAT8, timestamp TIMESTAMP, transaction_hash TEXT,
+                        market_slug TEXT, event_slug TEXT
+                    ) ON COMMIT DROP
+                """)
+                await conn.copy_records_to_table("trades_staging", records=records)
+                return int(await conn.fetchval(query, float(settings.WHALE_THRESHOLD)))
+
+    async def get_recent_trade_ids(self, limit: int = 1000) -> List[str]:
+        """Most recent trade ids, newest first"""
+        query = """
+            SELECT id FROM trades
+            ORDER BY timestamp DESC
+            LIMIT $1
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(query, limit)
+            return [row["id"] for row in rows]
 
     async def get_recent_whale_trades(self, since: datetime, limit: int = 10) -> List[Trade]:
         """Get recent whale trades"""
@@ -123,16 +299,23 @@ class Database:
 
     async def get_largest_whale_trade_between(self, start: datetime, end: datetime, min_size: Optional[Union[int, float]] = None) -> Optional[Trade]:
         """Return the largest whale trade in [start, end) window (by size)."""
+        trades = await self.get_largest_whale_trades_between(start, end, min_size, limit=1)
+        return trades[0] if trades else None
+
+    async def get_largest_whale_trades_between(self, start: datetime, end: datetime,
+                                               min_size: Optional[Union[int, float]] = None,
+                                               limit: int = 1) -> List[Trade]:
+        """Return the `limit` largest whale trades in [start, end) window, largest first."""
         min_amt = float(min_size) if min_size is not None else float(settings.WHALE_THRESHOLD)
         query = """
             SELECT * FROM trades
             WHERE timestamp >= $1 AND timestamp < $2 AND size >= $3
             ORDER BY size DESC, timestamp DESC
-            LIMIT 1
+            LIMIT $4
         """
         async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(query, start, end, min_amt)
-            return Trade(**dict(row)) if row else None
+            rows = await conn.fetch(query, start, end, min_amt, limit)
+            return [Trade(**dict(row)) for row in rows]
 
     async def ensure_broadcast_log_table(self) -> None:
         """Ensure broadcast_log table exists for deduplication across restarts/instances."""
@@ -157,6 +340,274 @@ class Database:
             # asyncpg returns a command tag like 'INSERT 0 1' or 'INSERT 0 0'
             return result.strip().endswith("1")
 
+    async def ensure_rollup_tables(self) -> None:
+        """Ensure the hourly rollup tables exist"""
+        query = """
+            CREATE TABLE IF NOT EXISTS whale_hourly_stats (
+                hour TIMESTAMP NOT NULL,
+                trader_address VARCHAR(66) NOT NULL,
+                total_volume DECIMAL(20, 2) NOT NULL DEFAULT 0,
+                trade_count INTEGER NOT NULL DEFAULT 0,
+                largest_trade DECIMAL(20, 2) NOT NULL DEFAULT 0,
+                PRIMARY KEY (hour, trader_address)
+            );
+            CREATE TABLE IF NOT EXISTS market_hourly_stats (
+                hour TIMESTAMP NOT NULL,
+                market_id VARCHAR(255) NOT NULL,
+                side VARCHAR(10) NOT NULL DEFAULT '',
+                whale_trades INTEGER NOT NULL DEFAULT 0,
+                whale_volume DECIMAL(20, 2) NOT NULL DEFAULT 0,
+                last_trade_at TIMESTAMP,
+                market_name TEXT,
+                market_slug TEXT,
+                event_slug TEXT,
+                PRIMARY KEY (hour, market_id, side)
+            );
+        """
+        async with self.pool.acquire() as conn:
+            await conn.execute(query)
+
+    async def rollup_needs_rebuild(self, table: str) -> bool:
+        """True when a rollup table is empty although trades is not (e.g. first start after an upgrade)"""
+        query = f"SELECT NOT EXISTS (SELECT 1 FROM {table}) AND EXISTS (SELECT 1 FROM trades)"
+        async with self.pool.acquire() as conn:
+            return bool(await conn.fetchval(query))
+
+    async def rebuild_whale_rollup(self, since: Optional[datetime] = None) -> int:
+        """Recompute whale_hourly_stats from trades (all hours, or those from `since` on).
+
+        Needed after trades were loaded outside save_trades or WHALE_THRESHOLD changed.
+        Returns the number of rollup rows written.
+        """
+        start = (since or datetime(1970, 1, 1)).replace(minute=0, second=0, microsecond=0)
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("DELETE FROM whale_hourly_stats WHERE hour >= $1", start)
+                result = await conn.execute(
+                    """
+                    INSERT INTO whale_hourly_stats (hour, trader_address, total_volume, trade_count, largest_trade)
+                    SELECT date_trunc('hour', timestamp), trader_address, SUM(size), COUNT(*), MAX(size)
+                    FROM trades
+                    WHERE timestamp >= $1 AND size >= $2
+                    GROUP BY 1, 2
+                    """,
+                    start, settings.WHALE_THRESHOLD,
+                )
+        # Command tag is 'INSERT 0 <n>'
+        return int(result.split()[-1])
+
+    async def rebuild_market_rollup(self, since: Optional[datetime] = None) -> int:
+        """Recompute market_hourly_stats from trades (all hours, or those from `since` on).
+
+        Slugs are not stored on trades, so rebuilt hours keep the slugs they already had.
+        Returns the number of rollup rows written.
+        """
+        start = (since or datetime(1970, 1, 1)).replace(minute=0, second=0, microsecond=0)
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                # Drop buckets with no whale trades left, then overwrite the rest in place
+                await conn.execute(
+                    """
+                    DELETE FROM market_hourly_stats m
+                    WHERE m.hour >= $1
+                      AND NOT EXISTS (
+                          SELECT 1 FROM trades t
+                          WHERE t.market_id = m.market_id
+                            AND COALESCE(t.side, '') = m.side
+                            AND t.timestamp >= m.hour AND t.timestamp < m.hour + INTERVAL '1 hour'
+                            AND t.size >= $2
+                      )
+                    """,
+                    start, settings.WHALE_THRESHOLD,
+                )
+                result = await conn.execute(
+                    """
+                    INSERT INTO market_hourly_stats (hour, market_id, side, whale_trades, whale_volume,
+                                                     last_trade_at, market_name)
+                    SELECT date_trunc('hour', timestamp), market_id, COALESCE(side, ''),
+                           COUNT(*), SUM(size), MAX(timestamp), MAX(market_name)
+                    FROM trades
+                    WHERE timestamp >= $1 AND size >= $2
+                    GROUP BY 1, 2, 3
+                    ON CONFLICT (hour, market_id, side)
+                    DO UPDATE SET
+                        whale_trades = EXCLUDED.whale_trades,
+                        whale_volume = EXCLUDED.whale_volume,
+                        last_trade_at = EXCLUDED.last_trade_at,
+                        market_name = COALESCE(EXCLUDED.market_name, market_hourly_stats.market_name)
+                    """,
+                    start, settings.WHALE_THRESHOLD,
+                )
+        return int(result.split()[-1])
+
+    # Trades partitions (database/migrations/001_partition_trades.sql)
+    async def trades_partitioned(self) -> bool:
+        """Whether trades is a partitioned table (migration applied)"""
+        query = "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('trades')"
+        async with self.pool.acquire() as conn:
+            return bool(await conn.fetchval(query))
+
+    async def ensure_trade_partitions(self, start: datetime, end: datetime) -> int:
+        """Create any missing trades partitions covering [start, end); returns how many were created"""
+        query = "SELECT ensure_trade_partitions($1, $2, $3)"
+        async with self.pool.acquire() as conn:
+            return int(await conn.fetchval(query, start, end, settings.TRADES_PARTITION_INTERVAL))
+
+    async def drop_trade_partitions_before(self, cutoff: datetime) -> int:
+        """Drop trades partitions that end at or before cutoff; returns how many were dropped"""
+        query = "SELECT drop_trade_partitions_before($1)"
+        async with self.pool.acquire() as conn:
+            return int(await conn.fetchval(query, cutoff))
+
+    async def ensure_deferred_alerts_table(self) -> None:
+        """Ensure deferred_alerts table exists (alerts held during quiet hours)"""
+        query = """
+            CREATE TABLE IF NOT EXISTS deferred_alerts (
+                id BIGSERIAL PRIMARY KEY,
+                user_id BIGINT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+                trade_id VARCHAR(255),
+                notification_type VARCHAR(50) NOT NULL,
+                summary TEXT NOT NULL,
+                deliver_at TIMESTAMP NOT NULL,
+                claimed_until TIMESTAMP,
+                created_at TIMESTAMP DEFAULT NOW()
+            );
+            ALTER TABLE deferred_alerts ADD COLUMN IF NOT EXISTS claimed_until TIMESTAMP;
+            CREATE INDEX IF NOT EXISTS idx_deferred_alerts_user_deliver
+                ON deferred_alerts(user_id, deliver_at);
+        """
+        async with self.pool.acquire() as conn:
+            await conn.execute(query)
+
+    async def save_deferred_alerts(self, alerts: List[Tuple[int, Optional[str], str, str, datetime]]) -> None:
+        """Persist (user_id, trade_id, notification_type, summary, deliver_at) rows"""
+        if not alerts:
+            return
+        user_ids, trade_ids, kinds, summaries, deliver_ats = (list(column) for column in zip(*alerts))
+        query = """
+            INSERT INTO deferred_alerts (user_id, trade_id, notification_type, summary, deliver_at)
+            SELECT * FROM unnest($1::bigint[], $2::text[], $3::text[], $4::text[], $5::timestamp[])
+        """
+        async with self.pool.acquire() as conn:
+            await conn.execute(query, user_ids, trade_ids, kinds, summaries, deliver_ats)
+
+    async def get_deferred_alerts(self) -> List[Tuple[int, Optional[str], str, str, datetime]]:
+        """Every pending deferred alert, oldest first"""
+        query = """
+            SELECT user_id, trade_id, notification_type, summary, deliver_at
+            FROM deferred_alerts
+            ORDER BY id
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(query)
+            return [tuple(row) for row in rows]
+
+    async def claim_deferred_alerts(
+        self, user_id: int, until: datetime, lease_seconds: float
+    ) -> List[Tuple[int, int, Optional[str], str, str, datetime]]:
+        """Claim a user's unclaimed alerts due at or before `until`, oldest first.
+
+        Returns (id, user_id, trade_id, notification_type, summary, deliver_at)
+        rows. Claimed rows are skipped by every other caller until the lease runs
+        out, so only one instance sends a digest; the claimer deletes them after
+        sending (or releases them on failure).
+        """
+        query = """
+            WITH due AS (
+                SELECT id FROM deferred_alerts
+                WHERE user_id = $1 AND deliver_at <= $2
+                  AND (claimed_until IS NULL OR claimed_until < NOW())
+                ORDER BY id
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE deferred_alerts d
+            SET claimed_until = NOW() + make_interval(secs => $3)
+            FROM due
+            WHERE d.id = due.id
+            RETURNING d.id, d.user_id, d.trade_id, d.notification_type, d.summary, d.deliver_at
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(query, user_id, until, float(lease_seconds))
+            return sorted((tuple(row) for row in rows), key=lambda row: row[0])
+
+    async def delete_deferred_alerts(self, ids: List[int]) -> None:
+        """Drop deferred alerts by id (after their digest went out)"""
+        if not ids:
+            return
+        async with self.pool.acquire() as conn:
+            await conn.execute("DELETE FROM deferred_alerts WHERE id = ANY($1::bigint[])", ids)
+
+    async def release_deferred_alerts(self, ids: List[int]) -> None:
+        """Give up the claim on deferred alerts whose digest could not be sent"""
+        if not ids:
+            return
+        query = "UPDATE deferred_alerts SET claimed_until = NULL WHERE id = ANY($1::bigint[])"
+        async with self.pool.acquire() as conn:
+            await conn.execute(query, ids)
+
+    async def ensure_backfill_state_table(self) -> None:
+        """Ensure backfill_state table exists (resumable backfill checkpoints)"""
+        query = """
+            CREATE TABLE IF NOT EXISTS backfill_state (
+                run_id VARCHAR(100) NOT NULL,
+                slice_key VARCHAR(100) NOT NULL,
+                slice_start TIMESTAMP,
+                slice_end TIMESTAMP,
+                position TEXT,
+                done BOOLEAN NOT NULL DEFAULT FALSE,
+                updated_at TIMESTAMP DEFAULT NOW(),
+                PRIMARY KEY (run_id, slice_key)
+            )
+        """
+        async with self.pool.acquire() as conn:
+            await conn.execute(query)
+
+    async def get_backfill_state(self, run_id: str) -> List[Dict[str, Any]]:
+        """Checkpointed slices of a backfill run, newest slice first"""
+        query = """
+            SELECT slice_key, slice_start, slice_end, position, done
+            FROM backfill_state
+            WHERE run_id = $1
+            ORDER BY slice_end DESC NULLS FIRST, slice_key
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(query, run_id)
+            return [dict(row) for row in rows]
+
+    async def save_backfill_state(
+        self, run_id: str, slices: List[Tuple[str, Optional[datetime], Optional[datetime], Optional[str], bool]]
+    ) -> None:
+        """Upsert (slice_key, slice_start, slice_end, position, done) checkpoints of a run"""
+        if not slices:
+            return
+        keys, starts, ends, positions, dones = (list(column) for column in zip(*slices))
+        query = """
+            INSERT INTO backfill_state (run_id, slice_key, slice_start, slice_end, position, done, updated_at)
+            SELECT $1, s.*, NOW()
+            FROM unnest($2::text[], $3::timestamp[], $4::timestamp[], $5::text[], $6::boolean[]) AS s
+            ON CONFLICT (run_id, slice_key) DO UPDATE SET
+                position = EXCLUDED.position,
+                done = EXCLUDED.done,
+                updated_at = NOW()
+        """
+        async with self.pool.acquire() as conn:
+            await conn.execute(query, run_id, keys, starts, ends, positions, dones)
+
+    async def clear_backfill_state(self, run_id: str) -> None:
+        """Forget a backfill run's checkpoints"""
+        async with self.pool.acquire() as conn:
+            await conn.execute("DELETE FROM backfill_state WHERE run_id = $1", run_id)
+
+    async def log_notification(self, user_id: int, trade_id: Optional[str],
+                               notification_type: str, success: bool = True) -> None:
+        """Record a notification attempt in the notifications log"""
+        query = """
+            INSERT INTO notifications (user_id, trade_id, notification_type, sent_at, success)
+            VALUES ($1, $2, $3, NOW(), $4)
+        """
+        async with self.pool.acquire() as conn:
+            await conn.execute(query, user_id, trade_id, notification_type, success)
+
     async def get_trader_aggregate(self, address: str) -> Dict[str, Any]:
         """Aggregate lifetime stats for a trader from trades table."""
         query = """
@@ -171,22 +622,35 @@ class Database:
                 "total_volume": float(row["total_volume"]) if row else 0.0,
             }
 
+    @cached(ttl=settings.CACHE_TTL_LEADERBOARD)
     async def get_top_whales_since(self, since: datetime, limit: int = 5) -> List[Dict[str, Any]]:
-        """Aggregate top whales by total volume since a timestamp"""
+        """Aggregate top whales by total volume since a timestamp.
+
+        Whole hours come from whale_hourly_stats; only the partial hour at the
+        start of the window is read from raw trades, so the result is exact.
+        """
         query = """
+            WITH parts AS (
+                SELECT trader_address, total_volume, trade_count, largest_trade
+                FROM whale_hourly_stats
+                WHERE hour >= $2
+                UNION ALL
+                SELECT trader_address, size, 1, size
+                FROM trades
+                WHERE timestamp >= $1 AND timestamp < $2 AND size >= $3
+            )
             SELECT
                 trader_address AS address,
-                SUM(size) AS total_volume,
-                COUNT(*) AS trade_count,
-                MAX(size) AS largest_trade
-            FROM trades
-            WHERE timestamp >= $1 AND size >= $2
+                SUM(total_volume) AS total_volume,
+                SUM(trade_count) AS trade_count,
+                MAX(largest_trade) AS largest_trade
+            FROM parts
             GROUP BY trader_address
             ORDER BY total_volume DESC
-            LIMIT $3
+            LIMIT $4
         """
         async with self.pool.acquire() as conn:
-            rows = await conn.fetch(query, since, settings.WHALE_THRESHOLD, limit)
+            rows = await conn.fetch(query, since, next_hour_boundary(since), settings.WHALE_THRESHOLD, limit)
             results: List[Dict[str, Any]] = []
             for row in rows:
                 results.append({
@@ -197,36 +661,39 @@ class Database:
                 })
             return results
 
+    @cached(ttl=settings.CACHE_TTL_WHALE_STATS)
     async def count_whale_trades_since(self, since: datetime) -> int:
-        """Count whale trades (>= threshold) since a timestamp"""
+        """Count whale trades (>= threshold) since a timestamp (rollup plus the partial first hour)"""
         query = """
-            SELECT COUNT(*) AS cnt
-            FROM trades
-            WHERE timestamp >= $1 AND size >= $2
+            SELECT
+                (SELECT COALESCE(SUM(trade_count), 0) FROM whale_hourly_stats WHERE hour >= $2)
+                + (SELECT COUNT(*) FROM trades WHERE timestamp >= $1 AND timestamp < $2 AND size >= $3)
+                AS cnt
         """
         async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(query, since, settings.WHALE_THRESHOLD)
+            row = await conn.fetchrow(query, since, next_hour_boundary(since), settings.WHALE_THRESHOLD)
             return int(row["cnt"]) if row and "cnt" in row else 0
 
+    @cached(ttl=settings.CACHE_TTL_MARKETS)
     async def get_top_markets_from_trades_since(self, since: datetime, limit: int = 10) -> List[Dict[str, Any]]:
-        """Aggregate markets by whale activity since a given time using only the trades table."""
-        query = """
+        """Aggregate markets by whale activity since a given time (hourly market rollup)."""
+        query = f"""
+            WITH activity AS ({MARKET_ACTIVITY_SQL})
             SELECT
                 market_id,
                 COALESCE(MAX(market_name), 'Unknown Market') AS market_name,
                 COALESCE(MAX(market_slug), '') AS market_slug,
                 COALESCE(MAX(event_slug), '') AS event_slug,
-                COUNT(*) FILTER (WHERE size >= $2) AS whale_trades,
-                COALESCE(SUM(size) FILTER (WHERE size >= $2), 0) AS whale_volume,
-                MAX(timestamp) AS last_whale_trade
-            FROM trades
-            WHERE timestamp >= $1
+                SUM(whale_trades) AS whale_trades,
+                COALESCE(SUM(whale_volume), 0) AS whale_volume,
+                MAX(last_trade_at) AS last_whale_trade
+            FROM activity
             GROUP BY market_id
             ORDER BY whale_volume DESC
-            LIMIT $3
+            LIMIT $4
         """
         async with self.pool.acquire() as conn:
-            rows = await conn.fetch(query, since, settings.WHALE_THRESHOLD, limit)
+            rows = await conn.fetch(query, since, next_hour_boundary(since), settings.WHALE_THRESHOLD, limit)
             return [dict(row) for row in rows]
 
 
@@ -304,6 +771,74 @@ class Database:
         async with self.pool.acquire() as conn:
             await conn.execute(query, address)
 
+    async def update_whales_stats(self, addresses: List[str]) -> None:
+        """Recalculate statistics for several whales in one round-trip, creating missing rows"""
+        if not addresses:
+            return
+        create_query = """
+            INSERT INTO whales (address)
+            SELECT unnest($1::text[])
+            ON CONFLICT (address) DO NOTHING
+        """
+        update_query = """
+            UPDATE whales w SET
+                total_volume = agg.total_volume,
+                total_trades = agg.total_trades,
+                last_trade_at = agg.last_trade_at
+            FROM (
+                SELECT
+                    trader_address,
+                    COALESCE(SUM(size), 0) AS total_volume,
+                    COUNT(*) AS total_trades,
+                    MAX(timestamp) AS last_trade_at
+                FROM trades
+                WHERE trader_address = ANY($1::text[])
+                GROUP BY trader_address
+            ) agg
+            WHERE w.address = agg.trader_address
+        """
+        unique = list(dict.fromkeys(addresses))
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(create_query, unique)
+                await conn.execute(update_query, unique)
+
+    async def reconcile_whale_stats(self) -> int:
+        """Full recompute of every whale's stats from trades (periodic reconciliation job).
+
+        Corrects any drift left by incremental updates; returns the number of whales updated.
+        """
+        create_query = """
+            INSERT INTO whales (address)
+            SELECT DISTINCT trader_address FROM trades
+            ON CONFLICT (address) DO NOTHING
+        """
+        update_query = """
+            UPDATE whales w SET
+                total_volume = agg.total_volume,
+                total_trades = agg.total_trades,
+                last_trade_at = agg.last_trade_at
+            FROM (
+                SELECT
+                    trader_address,
+                    COALESCE(SUM(size), 0) AS total_volume,
+                    COUNT(*) AS total_trades,
+                    MAX(timestamp) AS last_trade_at
+                FROM trades
+                GROUP BY trader_address
+            ) agg
+            WHERE w.address = agg.trader_address
+              AND (w.total_volume IS DISTINCT FROM agg.total_volume
+                   OR w.total_trades IS DISTINCT FROM agg.total_trades
+                   OR w.last_trade_at IS DISTINCT FROM agg.last_trade_at)
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(create_query)
+                result = await conn.execute(update_query)
+        # Command tag looks like 'UPDATE 42'
+        return int(result.split()[-1]) if result else 0
+
     # Market operations
     async def save_market(self, market: Market) -> None:
         """Save or update market"""
@@ -336,26 +871,44 @@ class Database:
 
     async def get_top_markets_by_whale_activity(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get top markets by whale activity"""
-        query = """
+        query = f"""
+            WITH activity AS ({MARKET_ACTIVITY_SQL}),
+            per_market AS (
+                SELECT market_id, SUM(whale_trades) AS whale_trades, SUM(whale_volume) AS whale_volume
+                FROM activity
+                GROUP BY market_id
+            )
             SELECT
                 m.market_id,
                 m.question,
                 m.category,
                 m.end_date,
-                COUNT(t.id) as whale_trades_24h,
-                COALESCE(SUM(t.size), 0) as whale_volume_24h,
+                COALESCE(a.whale_trades, 0) as whale_trades_24h,
+                COALESCE(a.whale_volume, 0) as whale_volume_24h,
                 m.volume as total_volume
             FROM markets m
-            LEFT JOIN trades t ON m.market_id = t.market_id
-                AND t.timestamp > NOW() - INTERVAL '24 hours'
-                AND t.size >= $1
+            LEFT JOIN per_market a ON a.market_id = m.market_id
             WHERE m.active = TRUE
-            GROUP BY m.market_id, m.question, m.category, m.end_date, m.volume
             ORDER BY whale_volume_24h DESC
-            LIMIT $2
+            LIMIT $4
+        """
+        since = datetime.utcnow() - timedelta(hours=24)
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(query, since, next_hour_boundary(since), settings.WHALE_THRESHOLD, limit)
+            return [dict(row) for row in rows]
+
+    async def get_market_side_volumes_since(self, since: datetime, limit: int = 20) -> List[Dict[str, Any]]:
+        """Whale volume per (market, side) since a timestamp, largest first"""
+        query = f"""
+            WITH activity AS ({MARKET_ACTIVITY_SQL})
+            SELECT market_id, MAX(market_name) AS market_name, side, SUM(whale_volume) AS volume
+            FROM activity
+            GROUP BY market_id, side
+            ORDER BY volume DESC
+            LIMIT $4
         """
         async with self.pool.acquire() as conn:
-            rows = await conn.fetch(query, settings.WHALE_THRESHOLD, limit)
+            rows = await conn.fetch(query, since, next_hour_boundary(since), settings.WHALE_THRESHOLD, limit)
             return [dict(row) for row in rows]
 
     # Tracked whales operations
@@ -375,6 +928,35 @@ class Database:
         async with self.pool.acquire() as conn:
             await conn.execute(query, user_id, whale_address)
 
+    async def get_all_tracked_whales(self) -> List[Tuple[int, str]]:
+        """All (user_id, whale_address) tracking pairs"""
+        query = "SELECT user_id, whale_address FROM tracked_whales"
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(query)
+            return [(row["user_id"], row["whale_address"]) for row in rows]
+
+    async def get_active_user_settings(self) -> List[Tuple[int, Any]]:
+        """(user_id, settings) for every active user"""
+        query = "SELECT user_id, settings FROM users WHERE is_active = TRUE"
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(query)
+            return [(row["user_id"], row["settings"]) for row in rows]
+
+    async def get_active_alerts(self) -> List[Alert]:
+        """All active alert rules"""
+        query = "SELECT id, user_id, alert_type, filters, is_active FROM alerts WHERE is_active = TRUE"
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(query)
+            alerts = []
+            for row in rows:
+                data = dict(row)
+                # JSONB arrives as text unless a codec is registered
+                if isinstance(data["filters"], str):
+                    data["filters"] = json.loads(data["filters"] or "{}")
+                data["filters"] = data["filters"] or {}
+                alerts.append(Alert(**data))
+            return alerts
+
     async def get_tracked_whales(self, user_id: int) -> List[Whale]:
         """Get user's tracked whales"""
         query = """
@@ -0,0 +1,217 @@
+"""
+Deferred delivery - holds alerts during users' quiet hours and sends one digest when they end
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from config.settings import settings
+from bot.services.database import Database
+from bot.services.send_queue import PRIORITY_DIGEST, MessageScheduler
+from bot.utils.timer_wheel import TimerWheel
+
+# (user_id, trade_id, notification_type, summary, deliver_at)
+DeferredAlert = Tuple[int, Optional[str], str, str, datetime]
+
+
+def _epoch(moment: datetime) -> float:
+    """UNIX timestamp of a naive UTC datetime"""
+    return moment.replace(tzinfo=timezone.utc).timestamp()
+
+
+class DeferredDeliveryQueue:
+    """Persistent, time-bucketed queue of alerts held back by quiet hours.
+
+    Held alerts are written to `deferred_alerts` and scheduled on a timer wheel
+    under their user at the end of that user's quiet window. Each tick only
+    looks at the wheel slots that came due, never at the user list; every user
+    whose window ended gets a single digest at the lowest send priority, so
+    live alerts keep going out first while the morning backlog drains.
+    Pending rows are reloaded on startup, so a restart neither loses nor
+    resends a digest. Rows are claimed before sending and deleted only once the
+    digest was delivered, so several instances never send the same digest; a
+    failed send goes back on the wheel and is retried with backoff. Alerts the
+    database has not accepted yet are retried in the background and, if their
+    digest comes due first, sent from memory.
+    """
+
+    def __init__(self, db: Database, sender: MessageScheduler):
+        self.db = db
+        self.sender = sender
+        self.wheel: TimerWheel = TimerWheel(resolution=settings.QUIET_HOURS_TICK_SECONDS)
+        self.is_running = False
+        # Entries not written to deferred_alerts yet; the lock covers each write attempt
+        self._unsaved: List[DeferredAlert] = []
+        self._save_lock = asyncio.Lock()
+        self._save_task: Optional[asyncio.Task] = None
+        self._failed_sends: Dict[int, int] = {}
+        self._deliveries: Set[asyncio.Task] = set()
+        self.digests_sent = 0
+
+    def defer(self, user_id: int, trade_id: Optional[str], notification_type: str,
+              summary: str, deliver_at: datetime) -> None:
+        """Hold an alert until deliver_at (naive UTC); persisted in the background"""
+        entry = (user_id, trade_id, notification_type, summary, deliver_at)
+        self.wheel.schedule(_epoch(deliver_at), user_id, entry)
+        self._persist([entry])
+
+    def _persist(self, entries: List[DeferredAlert]) -> None:
+        if not entries:
+            return
+        self._unsaved.extend(entries)
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.get_running_loop().create_task(self._save_pending())
+
+    async def _save_pending(self) -> None:
+        """Write unsaved entries until none are left, backing off while the database fails"""
+        delay = 1.0
+        while self._unsaved:
+            async with self._save_lock:
+                batch = list(self._unsaved)
+                try:
+                    await self.db.save_deferred_alerts(batch)
+                except Exception as e:
+                    error = e
+                else:
+                    # Entries deferred (or sent from memory) meanwhile stay as they are
+                    written = {id(entry) for entry in batch}
+                    self._unsaved = [entry for entry in self._unsaved if id(entry) not in written]
+                    delay = 1.0
+                    continue
+            # Still on the wheel, so a digest due before the write succeeds is sent from memory
+            logger.error(f"Failed to persist {len(batch)} deferred alerts, retrying in {delay:.0f}s: {error}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.wheel.resolution)
+
+    async def load(self) -> int:
+        """Schedule every pending row from the database; returns how many"""
+        rows = await self.db.get_deferred_alerts()
+        for entry in rows:
+            self.wheel.schedule(_epoch(entry[4]), entry[0], entry)
+        if rows:
+            logger.info(f"Loaded {len(rows)} deferred alerts")
+        return len(rows)
+
+    async def flush_due(self, now: Optional[datetime] = None) -> int:
+        """Start a digest for every user whose quiet window has ended; returns how many"""
+        now = now or datetime.utcnow()
+        due: Dict[int, List[DeferredAlert]] = self.wheel.advance(_epoch(now))
+        for user_id, entries in due.items():
+            task = asyncio.get_running_loop().create_task(self._deliver(user_id, entries))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+        if due:
+            logger.info(f"Sending {len(due)} quiet-hours digests")
+        return len(due)
+
+    async def _deliver(self, user_id: int, entries: List[DeferredAlert]) -> None:
+        """Claim the user's due rows, send their digest and delete the rows once it went out.
+
+        The rows, not the in-memory entries, make up the digest: every instance
+        schedules every pending row, and the claim lets exactly one of them send
+        it. Entries that never made it into the database are taken off the save
+        queue and sent from memory. If the database is unreachable the in-memory
+        entries are sent and the rows are left for a later load to clean up. A
+        failed send is rescheduled.
+        """
+        async with self._save_lock:
+            # No write is in flight here, so an entry is either in the table or in _unsaved
+            unsaved = {id(entry) for entry in self._unsaved}
+            from_memory = [entry for entry in entries if id(entry) in unsaved]
+            if from_memory:
+                taken = {id(entry) for entry in from_memory}
+                self._unsaved = [entry for entry in self._unsaved if id(entry) not in taken]
+        stored = [entry for entry in entries if id(entry) not in unsaved]
+
+        rows = []
+        digest = list(from_memory)
+        if stored:
+            until = max(entry[4] for entry in stored)
+            try:
+                rows = await self.db.claim_deferred_alerts(user_id, until, settings.QUIET_DIGEST_CLAIM_SECONDS)
+            except Exception as e:
+                logger.warning(f"Failed to claim deferred alerts for {user_id}, sending from memory: {e}")
+                rows = None
+            # No rows means another instance has sent (or is sending) those alerts
+            digest = (stored if rows is None else [row[1:] for row in rows]) + digest
+        if not digest:
+            return
+
+        sent = await self.sender.enqueue(
+            user_id,
+            self.format_digest(entries),
+            priority=PRIORITY_DIGEST,
+            user_id=user_id,
+            notification_type="quiet_digest",
+            parse_mode="Markdown",
+            disable_web_page_preview=True,
+        )
+        if sent:
+            self.digests_sent += 1
+            self._failed_sends.pop(user_id, None)
+        else:
+            self._retry_later(user_id, digest, from_memory)
+        if not rows:
+            return
+        ids = [row[0] for row in rows]
+        try:
+            if sent:
+                await self.db.delete_deferred_alerts(ids)
+            else:
+                await self.db.release_deferred_alerts(ids)
+        except Exception as e:
+            logger.warning(f"Failed to update deferred alerts for {user_id}: {e}")
+
+    def _retry_later(self, user_id: int, digest: List[DeferredAlert], from_memory: List[DeferredAlert]) -> None:
+        """Put a digest that could not be sent back on the wheel, backing off per failure"""
+        failures = self._failed_sends[user_id] = self._failed_sends.get(user_id, 0) + 1
+        delay = min(
+            settings.QUIET_DIGEST_RETRY_SECONDS * 2 ** min(failures - 1, 16),
+            settings.QUIET_DIGEST_RETRY_MAX_SECONDS,
+        )
+        retry_at = time.time() + delay
+        for entry in digest:
+            self.wheel.schedule(retry_at, user_id, entry)
+        # Entries that were only in memory go back on the save queue
+        memory_ids = {id(entry) for entry in from_memory}
+        self._persist([entry for entry in digest if id(entry) in memory_ids])
+        logger.warning(f"Quiet-hours digest for {user_id} not sent, retrying in {delay:.0f}s")
+
+    def format_digest(self, entries: List[DeferredAlert]) -> str:
+        limit = settings.QUIET_DIGEST_MAX_ITEMS
+        count = len(entries)
+        lines = [f"🌅 *While you were away* — {count} whale alert{'s' if count != 1 else ''}", ""]
+        lines.extend(entry[3] for entry in entries[:limit])
+        if count > limit:
+            lines.append(f"…and {count - limit} more")
+        return "\n".join(lines)
+
+    async def start(self) -> None:
+        """Flush due digests every tick (call load() first, before alerts are deferred)"""
+        self.is_running = True
+        while self.is_running:
+            try:
+                await self.flush_due()
+            except Exception as e:
+                logger.error(f"Deferred delivery error: {e}")
+            await asyncio.sleep(self.wheel.resolution)
+
+    async def stop(self) -> None:
+        self.is_running = False
+        async with self._save_lock:
+            # Between write attempts: stop retrying and make one last attempt
+            if self._save_task is not None:
+                self._save_task.cancel()
+            if self._unsaved:
+                try:
+                    await self.db.save_deferred_alerts(self._unsaved)
+                    self._unsaved = []
+                except Exception as e:
+                    logger.error(f"Dropping {len(self._unsaved)} deferred alerts that could not be persisted: {e}")
+        # Digests still waiting to be sent keep their rows; the claim lease lets them be resent later
+        for task in list(self._deliveries):
+            task.cancel()
+        logger.info(f"DeferredDeliveryQueue stopped: digests={self.digests_sent}, pending={len(self.wheel)}")
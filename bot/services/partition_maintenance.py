@@ -0,0 +1,51 @@
+"""
+Trades partition maintenance - keeps future partitions ahead of ingest and applies retention
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from loguru import logger
+
+from config.settings import settings
+from bot.services.database import Database
+
+
+class PartitionMaintainer:
+    """Periodically creates upcoming trades partitions and drops expired ones.
+
+    Does nothing (and stops) when trades isn't partitioned yet, i.e. before
+    scripts/migrate.py has been run. Both operations are idempotent, so several
+    instances may run this concurrently.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+        self.is_running = False
+
+    async def run_once(self) -> None:
+        now = datetime.utcnow()
+        created = await self.db.ensure_trade_partitions(
+            now - timedelta(days=1), now + timedelta(days=settings.TRADES_PARTITIONS_AHEAD_DAYS)
+        )
+        if created:
+            logger.info(f"Created {created} trades partitions")
+        if settings.TRADES_RETENTION_DAYS > 0:
+            dropped = await self.db.drop_trade_partitions_before(now - timedelta(days=settings.TRADES_RETENTION_DAYS))
+            if dropped:
+                logger.info(f"Dropped {dropped} expired trades partitions")
+
+    async def start(self) -> None:
+        """Run maintenance now and then every TRADES_PARTITION_MAINTENANCE_INTERVAL seconds"""
+        if not await self.db.trades_partitioned():
+            logger.info("trades is not partitioned (run scripts/migrate.py); partition maintenance disabled")
+            return
+        self.is_running = True
+        while self.is_running:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Partition maintenance failed: {e}")
+            await asyncio.sleep(settings.TRADES_PARTITION_MAINTENANCE_INTERVAL)
+
+    async def stop(self) -> None:
+        self.is_running = False
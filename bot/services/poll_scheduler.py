@@ -0,0 +1,58 @@
+"""
+Adaptive poll scheduler - sizes the whale tracker's sleep to market activity
+"""
+import random
+from typing import Optional
+
+from config.settings import settings
+
+
+class AdaptivePollScheduler:
+    """Decides how long to sleep between polls.
+
+    Busy polls shrink the interval, empty polls stretch it, and failures back off
+    exponentially with jitter. Time already spent polling is deducted from the sleep.
+    """
+
+    def __init__(
+        self,
+        base_interval: Optional[float] = None,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        busy_threshold: Optional[int] = None,
+        max_backoff: Optional[float] = None,
+    ):
+        self.base_interval = float(base_interval if base_interval is not None else settings.POLL_INTERVAL)
+        self.min_interval = float(min_interval if min_interval is not None else settings.POLL_INTERVAL_MIN)
+        self.max_interval = float(max_interval if max_interval is not None else settings.POLL_INTERVAL_MAX)
+        self.busy_threshold = int(busy_threshold if busy_threshold is not None else settings.POLL_BUSY_THRESHOLD)
+        self.max_backoff = float(max_backoff if max_backoff is not None else settings.POLL_MAX_BACKOFF)
+        self.interval = min(max(self.base_interval, self.min_interval), self.max_interval)
+        self.consecutive_failures = 0
+
+    def record_success(self, new_trades: int) -> None:
+        """Adapt the interval to how many new trades the poll returned"""
+        self.consecutive_failures = 0
+        if new_trades >= self.busy_threshold:
+            # Busy market: poll faster
+            self.interval = max(self.min_interval, self.interval / 2)
+        elif new_trades == 0:
+            # Quiet market: poll slower
+            self.interval = min(self.max_interval, self.interval * 1.5)
+        else:
+            # Normal activity: drift back toward the configured interval
+            self.interval += (self.base_interval - self.interval) / 2
+
+    def record_failure(self) -> None:
+        """Count a failed poll (drives exponential backoff)"""
+        self.consecutive_failures += 1
+
+    def next_delay(self, elapsed: float = 0.0) -> float:
+        """Seconds to sleep before the next poll, given the time the last poll took"""
+        if self.consecutive_failures:
+            # Exponential backoff with "equal jitter" so instances don't retry in lockstep;
+            # the exponent is capped so a long outage can't overflow the float conversion
+            exponent = min(self.consecutive_failures - 1, 32)
+            backoff = min(self.max_backoff, self.base_interval * (2 ** exponent))
+            return random.uniform(backoff / 2, backoff)
+        return max(0.0, self.interval - elapsed)
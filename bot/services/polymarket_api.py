@@ -2,108 +2,264 @@
 Polymarket API client
 """
 import aiohttp
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timezone
+from typing import AsyncIterator, FrozenSet, Iterable, List, Dict, Any, NamedTuple, Optional, Set, Tuple
+from datetime import datetime
 from loguru import logger
 
 from config.settings import settings
 from bot.models import Trade, Market
+from bot.services.trade_pagination import TradePaginator, extract_page
+from bot.services.trade_parser import TradeRecord, parse_trade_page, promote
+from bot.utils.json_codec import JsonArrayStreamDecoder, get_decoder
+from bot.utils.singleflight import SingleFlight
+from bot.utils.ttl_cache import TTLCache, cached
+
+
+class HighWaterMark(NamedTuple):
+    """Newest trade timestamp of a poll and the ids at exactly that timestamp"""
+    ts: datetime
+    ids: FrozenSet[str]
+
+
+def create_session() -> aiohttp.ClientSession:
+    """Create a keep-alive HTTP session with a tuned connection pool and explicit timeouts"""
+    connector = aiohttp.TCPConnector(
+        limit=settings.HTTP_POOL_LIMIT,
+        limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+        ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+        keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+        enable_cleanup_closed=True,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=settings.HTTP_TIMEOUT_TOTAL,
+        connect=settings.HTTP_TIMEOUT_CONNECT,
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+def get_shared_api(bot_data: Dict[str, Any]) -> "PolymarketAPI":
+    """Return the application-wide client stored in bot_data (created on first use)"""
+    api = bot_data.get("polymarket_api")
+    if api is None:
+        api = PolymarketAPI()
+        bot_data["polymarket_api"] = api
+    return api
 
 
 class PolymarketAPI:
-    """Client for Polymarket APIs"""
+    """Client for Polymarket APIs
+    
+    One instance is meant to be shared application-wide (see get_shared_api) so all
+    callers reuse the same pooled connections. Do not close the shared instance
+    from request handlers.
+    """
     
     def __init__(self):
         self.data_api_url = settings.POLYMARKET_DATA_API
         self.gamma_api_url = settings.POLYMARKET_GAMMA_API
         self.session: Optional[aiohttp.ClientSession] = None
+        # High-water mark for incremental polling: newest timestamp seen and the ids at it
+        self._high_water_ts: Optional[datetime] = None
+        self._high_water_ids: Set[str] = set()
+        # Coalesces identical concurrent GETs into a single upstream request
+        self._single_flight = SingleFlight()
+        # Short-lived cache for slow-changing endpoints (markets)
+        self.cache = TTLCache(max_entries=settings.CACHE_MAX_ENTRIES)
+        # Decodes raw response bytes (orjson when installed, see JSON_DECODER)
+        self.decode_json = get_decoder(settings.JSON_DECODER)
     
     async def __aenter__(self):
         """Async context manager entry"""
-        self.session = aiohttp.ClientSession()
+        await self.get_session()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit"""
-        if self.session:
-            await self.session.close()
+        await self.close()
     
     async def get_session(self) -> aiohttp.ClientSession:
         """Get or create session"""
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+        if not self.session or self.session.closed:
+            self.session = create_session()
         return self.session
     
-    async def fetch_recent_trades(self, limit: int = 100) -> List[Trade]:
+    async def _get_json(self, url: str, params: Optional[Dict[str, str]] = None) -> Any:
+        """
+        GET a URL and decode its JSON body
+        
+        Concurrent calls for the same URL and params share one in-flight request
+        and receive the same decoded object, which callers must not mutate.
+        Raises on HTTP/transport errors.
+        """
+        key = (url, tuple(sorted(params.items())) if params else ())
+        return await self._single_flight.do(key, lambda: self._request_json(url, params))
+    
+    async def _request_json(self, url: str, params: Optional[Dict[str, str]]) -> Any:
+        session = await self.get_session()
+        async with session.get(url, params=params) as response:
+            if response.status != 200:
+                logger.error(f"API error: {response.status}")
+                response.raise_for_status()
+            return self.decode_json(await response.read())
+    
+    async def stream_json_array(self, url: str, params: Optional[Dict[str, str]] = None) -> AsyncIterator[List[Any]]:
+        """
+        GET a URL and yield the elements of its top-level JSON array in batches
+        
+        Elements are decoded as the body arrives (one batch per network chunk), so
+        the whole page is never held at once. Not coalesced itself (callers such as
+        fetch_recent_records coalesce the parsed result). A body
+        that is not an array (e.g. a {"data": [...]} wrapper) is yielded via
+        extract_page once complete. Raises on HTTP/transport errors.
+        """
+        session = await self.get_session()
+        async with session.get(url, params=params) as response:
+            if response.status != 200:
+                logger.error(f"API error: {response.status}")
+                response.raise_for_status()
+            decoder = JsonArrayStreamDecoder()
+            async for chunk in response.content.iter_chunked(settings.JSON_STREAM_CHUNK_SIZE):
+                items = decoder.feed(chunk)
+                if items:
+                    yield items
+            items = decoder.close()
+            if not decoder.is_array:
+                items, _ = extract_page(decoder.document)
+            if items:
+                yield items
+    
+    async def fetch_recent_trades(self, limit: int = 100, min_size: Optional[float] = None) -> List[Trade]:
         """
         Fetch recent trades from Polymarket
         
         Args:
             limit: Maximum number of trades to fetch
+            min_size: Only return trades of at least this USD size
             
         Returns:
             List of Trade objects
         """
-        url = f"{self.data_api_url}/trades?limit={limit}"
+        return promote(await self.fetch_recent_records(limit, min_size=min_size))
+    
+    async def fetch_recent_records(self, limit: int = 100, min_size: Optional[float] = None) -> List[TradeRecord]:
+        """
+        Like fetch_recent_trades, but lean TradeRecords (no per-item validation)
+        
+        With min_size the page is streamed and filtered as it arrives, so only the
+        surviving items are ever kept. Concurrent identical calls share one request
+        either way, and the returned list must not be mutated.
+        """
+        url = f"{self.data_api_url}/trades"
+        params = {"limit": str(limit)}
         
         try:
-            session = await self.get_session()
-            async with session.get(url) as response:
-                if response.status != 200:
-                    logger.error(f"API error: {response.status}")
-                    return []
-                
-                data = await response.json()
-                
-                trades = []
-                for item in data:
-                    try:
-                        # Parse timestamp - can be Unix timestamp (int) or ISO string
-                        timestamp = item.get("timestamp")
-                        if isinstance(timestamp, int):
-                            # Convert to UTC and store as naive UTC
-                            timestamp = datetime.fromtimestamp(timestamp, tz=timezone.utc).replace(tzinfo=None)
-                        elif isinstance(timestamp, str):
-                            # Parse as aware then convert to naive UTC
-                            aware = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-                            timestamp = (aware.astimezone(timezone.utc).replace(tzinfo=None)
-                                         if aware.tzinfo is not None else aware)
-                        else:
-                            timestamp = datetime.utcnow()
-
-                        # Calculate trade size in USD
-                        size = float(item.get("size", 0))
-                        price = float(item.get("price", 0))
-                        trade_value = size * price  # Approximate USD value
-
-                        trade = Trade(
-                            id=item.get("transactionHash", item.get("transaction_hash", "")),
-                            trader_address=item.get("proxyWallet", item.get("trader_address", "")),
-                            trader_name=item.get("name", ""),
-                            trader_pseudonym=item.get("pseudonym", ""),
-                            market_id=item.get("conditionId", item.get("asset", "")),
-                            market_name=item.get("title", item.get("market", "Unknown Market")),
-                            market_slug=item.get("slug", ""),
-                            event_slug=item.get("eventSlug", ""),
-                            outcome=item.get("outcome", ""),
-                            side=item.get("side", "BUY"),
-                            size=trade_value,  # Use calculated USD value
-                            price=price,
-                            timestamp=timestamp,
-                            transaction_hash=item.get("transactionHash", item.get("transaction_hash", ""))
-                        )
-                        trades.append(trade)
-                    except Exception as e:
-                        logger.warning(f"Failed to parse trade: {e}")
-                        continue
-                
-                logger.info(f"Fetched {len(trades)} trades from Polymarket")
-                return trades
+            if min_size is None:
+                records = parse_trade_page(await self._get_json(url, params))
+            else:
+                key = ("stream", url, tuple(params.items()), min_size)
+                records = await self._single_flight.do(
+                    key, lambda: self._stream_records(url, params, min_size)
+                )
+            logger.info(f"Fetched {len(records)} trades from Polymarket")
+            return records
                 
         except Exception as e:
             logger.error(f"Error fetching trades: {e}")
             return []
     
+    async def _stream_records(self, url: str, params: Dict[str, str], min_size: float) -> List[TradeRecord]:
+        records: List[TradeRecord] = []
+        async for items in self.stream_json_array(url, params):
+            records.extend(parse_trade_page(items, min_size=min_size))
+        return records
+    
+    async def fetch_trades_page(self, params: Dict[str, str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Fetch one raw page from the trades endpoint
+        
+        Args:
+            params: Query parameters (see TradePaginator.params)
+            
+        Returns:
+            (items, next_cursor); raises on HTTP/transport errors
+        """
+        url = f"{self.data_api_url}/trades"
+        data = await self._get_json(url, params)
+        return extract_page(data)
+    
+    async def fetch_new_records(self, limit: int = 100, max_pages: int = 10) -> Tuple[List[TradeRecord], Optional[HighWaterMark]]:
+        """
+        Fetch every trade newer than the committed high-water mark
+        
+        Pages backward (reusing the /trades pagination detection) until the mark is
+        reached, so each poll returns exactly the new trades. With no mark yet a
+        single page is returned. The mark itself is NOT moved: the caller passes the
+        returned candidate to commit_high_water once the trades are persisted, so a
+        failed save makes the next poll fetch the same trades again. Errors propagate.
+        
+        Args:
+            limit: Trades per page
+            max_pages: Upper bound on pages fetched in one call
+            
+        Returns:
+            (new TradeRecords newest first, candidate mark or None if there were none)
+        """
+        mark_ts = self._high_water_ts
+        mark_ids = self._high_water_ids
+        paginator = TradePaginator(limit=limit)
+        collected: Dict[str, TradeRecord] = {}
+        reached_mark = mark_ts is None
+        pages = 0
+        
+        while pages < max_pages:
+            items, next_cursor = await self.fetch_trades_page(paginator.params())
+            pages += 1
+            if not items:
+                break
+            
+            for trade in parse_trade_page(items):
+                if mark_ts is not None and (
+                    trade.timestamp < mark_ts
+                    or (trade.timestamp == mark_ts and trade.id in mark_ids)
+                ):
+                    reached_mark = True
+                    continue
+                # Offset paging can shift while new trades arrive; keep the first copy
+                collected.setdefault(trade.id, trade)
+            
+            if reached_mark or not paginator.advance(items, next_cursor):
+                break
+        
+        if not reached_mark:
+            logger.warning(
+                f"High-water mark not reached after {pages} pages; some trades may have been missed"
+            )
+        
+        trades = sorted(collected.values(), key=lambda t: t.timestamp, reverse=True)
+        mark = None
+        if trades:
+            newest = trades[0].timestamp
+            mark = HighWaterMark(newest, frozenset(t.id for t in trades if t.timestamp == newest))
+        
+        logger.info(f"Fetched {len(trades)} new trades from Polymarket ({pages} pages)")
+        return trades, mark
+    
+    def commit_high_water(self, ts: datetime, ids: Iterable[str]):
+        """
+        Advance the high-water mark to a candidate returned by fetch_new_records
+        
+        Call only after the trades up to it are persisted. A mark older than the
+        current one is ignored; one at the same timestamp adds its ids.
+        """
+        if self._high_water_ts is not None and ts < self._high_water_ts:
+            return
+        if ts == self._high_water_ts:
+            self._high_water_ids = self._high_water_ids | set(ids)
+        else:
+            self._high_water_ts = ts
+            self._high_water_ids = set(ids)
+    
+    @cached(ttl=settings.CACHE_TTL_MARKETS, cache_empty=False)
     async def fetch_markets(self, limit: int = 50, active: bool = True) -> List[Market]:
         """
         Fetch markets from Polymarket
@@ -116,43 +272,37 @@ class PolymarketAPI:
             List of Market objects
         """
         closed = "false" if active else "true"
-        url = f"{self.gamma_api_url}/markets?limit={limit}&closed={closed}"
+        url = f"{self.gamma_api_url}/markets"
         
         try:
-            session = await self.get_session()
-            async with session.get(url) as response:
-                if response.status != 200:
-                    logger.error(f"API error: {response.status}")
-                    return []
-                
-                data = await response.json()
-                
-                markets = []
-                for item in data:
-                    try:
-                        # Parse end date
-                        end_date = None
-                        if item.get("end_date_iso"):
-                            end_date = datetime.fromisoformat(item["end_date_iso"].replace("Z", "+00:00"))
-                        
-                        market = Market(
-                            market_id=item.get("id", item.get("condition_id", "")),
-                            question=item.get("question", "Unknown Question"),
-                            slug=item.get("slug", ""),
-                            description=item.get("description", ""),
-                            category=item.get("category", "Other"),
-                            end_date=end_date,
-                            volume=float(item.get("volume", 0)),
-                            liquidity=float(item.get("liquidity", 0)),
-                            active=item.get("active", True)
-                        )
-                        markets.append(market)
-                    except Exception as e:
-                        logger.warning(f"Failed to parse market: {e}")
-                        continue
-                
-                logger.info(f"Fetched {len(markets)} markets from Polymarket")
-                return markets
+            data = await self._get_json(url, {"limit": str(limit), "closed": closed})
+            
+            markets = []
+            for item in data:
+                try:
+                    # Parse end date
+                    end_date = None
+                    if item.get("end_date_iso"):
+                        end_date = datetime.fromisoformat(item["end_date_iso"].replace("Z", "+00:00"))
+                    
+                    market = Market(
+                        market_id=item.get("id", item.get("condition_id", "")),
+                        question=item.get("question", "Unknown Question"),
+                        slug=item.get("slug", ""),
+                        description=item.get("description", ""),
+                        category=item.get("category", "Other"),
+                        end_date=end_date,
+                        volume=float(item.get("volume", 0)),
+                        liquidity=float(item.get("liquidity", 0)),
+                        active=item.get("active", True)
+                    )
+                    markets.append(market)
+                except Exception as e:
+                    logger.warning(f"Failed to parse market: {e}")
+                    continue
+            
+            logger.info(f"Fetched {len(markets)} markets from Polymarket")
+            return markets
                 
         except Exception as e:
             logger.error(f"Error fetching markets: {e}")
@@ -168,18 +318,12 @@ class PolymarketAPI:
         Returns:
             List of positions
         """
-        url = f"{self.data_api_url}/positions?user={address}"
+        url = f"{self.data_api_url}/positions"
         
         try:
-            session = await self.get_session()
-            async with session.get(url) as response:
-                if response.status != 200:
-                    logger.error(f"API error: {response.status}")
-                    return []
-                
-                data = await response.json()
-                logger.info(f"Fetched {len(data)} positions for whale {address}")
-                return data
+            data = await self._get_json(url, {"user": address})
+            logger.info(f"Fetched {len(data)} positions for whale {address}")
+            return data
                 
         except Exception as e:
             logger.error(f"Error fetching whale positions: {e}")
@@ -195,18 +339,12 @@ class PolymarketAPI:
         Returns:
             List of holders
         """
-        url = f"{self.data_api_url}/holders?id={market_id}"
+        url = f"{self.data_api_url}/holders"
         
         try:
-            session = await self.get_session()
-            async with session.get(url) as response:
-                if response.status != 200:
-                    logger.error(f"API error: {response.status}")
-                    return []
-                
-                data = await response.json()
-                logger.info(f"Fetched {len(data)} holders for market {market_id}")
-                return data
+            data = await self._get_json(url, {"id": market_id})
+            logger.info(f"Fetched {len(data)} holders for market {market_id}")
+            return data
                 
         except Exception as e:
             logger.error(f"Error fetching market holders: {e}")
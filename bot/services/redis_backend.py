@@ -0,0 +1,207 @@
+"""
+Optional Redis backend (enabled by REDIS_URL) shared by horizontally scaled instances:
+recent-trade dedup, a shared query cache and a lock electing a single poller
+"""
+import hashlib
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Type
+
+from loguru import logger
+from pydantic import BaseModel
+
+from config.settings import settings
+from bot.models import Alert, Market, Trade, User, Whale
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Redis is optional; everything falls back to in-process state
+    aioredis = None
+
+
+class RedisBackend:
+    """Owns the Redis connection and the key prefix"""
+
+    def __init__(self, url: str, prefix: Optional[str] = None, client: Any = None):
+        self.url = url
+        self.prefix = prefix if prefix is not None else settings.REDIS_KEY_PREFIX
+        # A pre-built client (e.g. fakeredis.aioredis.FakeRedis) can be injected for tests
+        self.client = client
+
+    def key(self, *parts: str) -> str:
+        return self.prefix + ":".join(parts)
+
+    async def connect(self) -> None:
+        """Create the client and check the server is reachable"""
+        if self.client is None:
+            if aioredis is None:
+                raise RuntimeError("REDIS_URL is set but the 'redis' package is not installed")
+            self.client = aioredis.from_url(self.url)
+        await self.client.ping()
+        logger.info("Redis connected")
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.close()
+            logger.info("Redis connection closed")
+
+
+async def create_redis_backend() -> Optional[RedisBackend]:
+    """Connect to Redis when REDIS_URL is configured; returns None otherwise or on failure"""
+    if not settings.REDIS_URL:
+        return None
+    backend = RedisBackend(settings.REDIS_URL)
+    try:
+        await backend.connect()
+        return backend
+    except Exception as e:
+        logger.warning(f"Redis unavailable, using in-process state only: {e}")
+        return None
+
+
+class RedisSeenTrades:
+    """Cross-instance dedup of recently seen trade ids (one key per id with a TTL)"""
+
+    def __init__(self, backend: RedisBackend, ttl: Optional[int] = None):
+        self.backend = backend
+        self.ttl = ttl if ttl is not None else settings.REDIS_SEEN_TRADE_TTL
+
+    async def claim(self, trade_ids: List[str]) -> List[str]:
+        """Atomically mark ids as seen; returns the ids no instance had seen before"""
+        if not trade_ids:
+            return []
+        pipe = self.backend.client.pipeline(transaction=False)
+        for trade_id in trade_ids:
+            pipe.set(self.backend.key("seen", trade_id), 1, nx=True, ex=self.ttl)
+        results = await pipe.execute()
+        return [trade_id for trade_id, created in zip(trade_ids, results) if created]
+
+    async def release(self, trade_ids: List[str]) -> None:
+        """Forget claimed ids (e.g. their save failed) so a later poll can claim them again"""
+        if trade_ids:
+            await self.backend.client.delete(*(self.backend.key("seen", trade_id) for trade_id in trade_ids))
+
+
+# Models a cached value may contain; anything else is refused rather than trusted
+CACHEABLE_MODELS: Dict[str, Type[BaseModel]] = {
+    model.__name__: model for model in (Trade, Whale, Market, User, Alert)
+}
+
+
+def _encode_cache_value(value: Any) -> Any:
+    """json.dumps default hook: tags datetimes and known models so they can be rebuilt"""
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, BaseModel) and type(value).__name__ in CACHEABLE_MODELS:
+        return {"__model__": type(value).__name__, "data": value.model_dump(mode="json")}
+    raise TypeError(f"{type(value).__name__} values cannot be stored in the shared cache")
+
+
+def _decode_cache_object(obj: Dict[str, Any]) -> Any:
+    """json.loads object hook reversing _encode_cache_value"""
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    if "__model__" in obj:
+        model = CACHEABLE_MODELS.get(obj["__model__"])
+        if model is None:
+            raise ValueError(f"Unknown cached model {obj['__model__']!r}")
+        return model.model_validate(obj["data"])
+    return obj
+
+
+def dump_cache_value(value: Any) -> bytes:
+    return json.dumps(value, default=_encode_cache_value, separators=(",", ":")).encode()
+
+
+def load_cache_value(raw: bytes) -> Any:
+    return json.loads(raw, object_hook=_decode_cache_object)
+
+
+class RedisCache:
+    """Shared second-level cache behind the per-process TTLCache.
+
+    Values are stored as JSON, never pickled: Redis may be reachable by more than
+    our own instances, so reading a value must not be able to execute code.
+    Datetimes and the bot's models are tagged and rebuilt explicitly; tuples come
+    back as lists.
+    """
+
+    def __init__(self, backend: RedisBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: Hashable) -> str:
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return self.backend.key("cache", digest)
+
+    async def lookup(self, key: Hashable) -> Tuple[bool, Any]:
+        raw = await self.backend.client.get(self._key(key))
+        if raw is None:
+            self.misses += 1
+            return False, None
+        try:
+            value = load_cache_value(raw)
+        except ValueError as e:
+            # Corrupt or foreign entry: treat as a miss, the caller recomputes and overwrites it
+            logger.warning(f"Ignoring unreadable shared cache entry: {e}")
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, value
+
+    async def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        await self.backend.client.set(self._key(key), dump_cache_value(value), ex=max(int(ttl), 1))
+
+
+class RedisLock:
+    """Lease-based lock; the holder must renew it within ttl seconds"""
+
+    _RENEW = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('pexpire', KEYS[1], ARGV[2])
+        end
+        return 0
+    """
+    _RELEASE = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('del', KEYS[1])
+        end
+        return 0
+    """
+
+    def __init__(self, backend: RedisBackend, name: str, ttl: Optional[int] = None):
+        self.backend = backend
+        self.key = backend.key("lock", name)
+        self.ttl = ttl if ttl is not None else settings.POLLER_LOCK_TTL
+        self.token = uuid.uuid4().hex
+        self.held = False
+
+    @property
+    def renew_interval(self) -> float:
+        """How often the holder should renew (a third of the lease)"""
+        return self.ttl / 3
+
+    async def ensure(self) -> bool:
+        """Acquire the lock or renew it if already held; returns whether we hold it"""
+        ttl_ms = int(self.ttl * 1000)
+        client = self.backend.client
+        if self.held:
+            renewed = await client.eval(self._RENEW, 1, self.key, self.token, ttl_ms)
+            self.held = bool(renewed)
+            if not self.held:
+                logger.warning(f"Lost lock {self.key}")
+        if not self.held:
+            self.held = bool(await client.set(self.key, self.token, nx=True, px=ttl_ms))
+            if self.held:
+                logger.info(f"Acquired lock {self.key}")
+        return self.held
+
+    async def release(self) -> None:
+        if self.held:
+            await self.backend.client.eval(self._RELEASE, 1, self.key, self.token)
+            self.held = False
@@ -0,0 +1,225 @@
+"""
+Outbound Telegram message scheduler - rate limited, prioritized delivery
+"""
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Union
+
+from loguru import logger
+from telegram.error import RetryAfter
+
+from config.settings import settings
+from bot.services.database import Database
+
+# Priority lanes (lower is sent first)
+PRIORITY_CHANNEL = 0
+PRIORITY_TRACKED = 1
+PRIORITY_THRESHOLD = 2
+PRIORITY_DIGEST = 3
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        now = time.monotonic()
+        self._refill(now)
+        wait = max(0.0, self.paused_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Block the bucket entirely for a while (e.g. after a flood-control error)"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> None:
+        while True:
+            wait = self.delay()
+            if wait <= 0:
+                self.take()
+                return
+            await asyncio.sleep(wait)
+
+
+@dataclass(order=True)
+class OutboundMessage:
+    priority: int
+    seq: int
+    chat_id: Union[int, str] = field(compare=False)
+    text: str = field(compare=False)
+    kwargs: Dict[str, Any] = field(compare=False, default_factory=dict)
+    user_id: Optional[int] = field(compare=False, default=None)
+    trade_id: Optional[str] = field(compare=False, default=None)
+    notification_type: str = field(compare=False, default="alert")
+    attempts: int = field(compare=False, default=0)
+    result: Optional[asyncio.Future] = field(compare=False, default=None)
+
+
+class MessageScheduler:
+    """Sends Telegram messages through a global and a per-chat token bucket.
+
+    Channel broadcasts and tracked-whale alerts have priority over threshold
+    alerts; quiet-hours digests go last. A chat that is over its own limit is
+    parked until its bucket refills instead of blocking other chats. RetryAfter is honoured with the delay the
+    server supplies; failed user alerts are logged to `notifications` with
+    success=false. Several workers send concurrently, sharing the buckets, so
+    one slow request does not hold up the whole queue.
+    """
+
+    def __init__(self, bot, db: Optional[Database] = None, workers: Optional[int] = None):
+        self.bot = bot
+        self.db = db
+        self.queue: "asyncio.PriorityQueue[OutboundMessage]" = asyncio.PriorityQueue()
+        self.global_bucket = TokenBucket(settings.TELEGRAM_GLOBAL_RATE)
+        self._chat_buckets: "OrderedDict[Union[int, str], TokenBucket]" = OrderedDict()
+        self._seq = itertools.count()
+        self.workers = max(1, workers if workers is not None else settings.TELEGRAM_SEND_WORKERS)
+        self._tasks: List[asyncio.Task] = []
+        self.is_running = False
+        self.sent = 0
+        self.failed = 0
+
+    def _chat_bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            # Groups/channels (negative ids or @usernames) have a much lower per-chat limit
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            rate = settings.TELEGRAM_GROUP_RATE_PER_MINUTE / 60 if is_group else settings.TELEGRAM_CHAT_RATE
+            bucket = TokenBucket(rate, capacity=1)
+            self._chat_buckets[chat_id] = bucket
+            # Keep the per-chat table bounded; idle buckets are full anyway
+            while len(self._chat_buckets) > 10000:
+                self._chat_buckets.popitem(last=False)
+        else:
+            self._chat_buckets.move_to_end(chat_id)
+        return bucket
+
+    def enqueue(
+        self,
+        chat_id: Union[int, str],
+        text: str,
+        priority: int = PRIORITY_THRESHOLD,
+        user_id: Optional[int] = None,
+        trade_id: Optional[str] = None,
+        notification_type: str = "alert",
+        **kwargs: Any,
+    ) -> asyncio.Future:
+        """Queue a message; the returned future resolves to True once sent, False if it failed"""
+        result = asyncio.get_running_loop().create_future()
+        message = OutboundMessage(
+            priority=priority,
+            seq=next(self._seq),
+            chat_id=chat_id,
+            text=text,
+            kwargs=kwargs,
+            user_id=user_id,
+            trade_id=trade_id,
+            notification_type=notification_type,
+            result=result,
+        )
+        self.queue.put_nowait(message)
+        return result
+
+    async def send(self, chat_id: Union[int, str], text: str, **kwargs: Any) -> bool:
+        """Queue a message and wait until it has been delivered (or has failed)"""
+        return await self.enqueue(chat_id, text, **kwargs)
+
+    def _requeue_later(self, message: OutboundMessage, delay: float) -> None:
+        asyncio.get_running_loop().call_later(delay, self.queue.put_nowait, message)
+
+    async def start(self) -> None:
+        """Run the delivery workers until stop()"""
+        self.is_running = True
+        logger.info(
+            f"MessageScheduler started: workers={self.workers}, global={settings.TELEGRAM_GLOBAL_RATE}/s, "
+            f"chat={settings.TELEGRAM_CHAT_RATE}/s, group={settings.TELEGRAM_GROUP_RATE_PER_MINUTE}/min"
+        )
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _worker(self) -> None:
+        while self.is_running:
+            message = await self.queue.get()
+            try:
+                await self._process(message)
+            except Exception as e:
+                logger.error(f"MessageScheduler error: {e}")
+
+    async def stop(self) -> None:
+        self.is_running = False
+        # Workers idle in queue.get() would never see is_running, so cancel them
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info(f"MessageScheduler stopped: sent={self.sent}, failed={self.failed}, pending={self.queue.qsize()}")
+
+    async def _process(self, message: OutboundMessage) -> None:
+        chat_bucket = self._chat_bucket(message.chat_id)
+        wait = chat_bucket.delay()
+        if wait > 0:
+            # Park this chat's message and keep serving others
+            self._requeue_later(message, wait)
+            return
+
+        # Take the chat token before awaiting the global one so no other worker
+        # can send to this chat in the meantime
+        chat_bucket.take()
+        await self.global_bucket.acquire()
+        message.attempts += 1
+        try:
+            await self.bot.send_message(chat_id=message.chat_id, text=message.text, **message.kwargs)
+        except RetryAfter as e:
+            retry_after = e.retry_after
+            if isinstance(retry_after, timedelta):
+                retry_after = retry_after.total_seconds()
+            retry_after = float(retry_after)
+            logger.warning(f"Flood control: retrying chat {message.chat_id} in {retry_after:.0f}s")
+            # Flood limits are bot-wide in practice: slow everything down, not just this chat
+            self.global_bucket.pause(retry_after)
+            chat_bucket.pause(retry_after)
+            if message.attempts < settings.TELEGRAM_SEND_MAX_ATTEMPTS:
+                self._requeue_later(message, retry_after)
+                return
+            await self._fail(message, e)
+            return
+        except Exception as e:
+            await self._fail(message, e)
+            return
+
+        self.sent += 1
+        if message.result is not None and not message.result.done():
+            message.result.set_result(True)
+
+    async def _fail(self, message: OutboundMessage, error: Exception) -> None:
+        self.failed += 1
+        logger.warning(f"Failed to send message to {message.chat_id}: {error}")
+        if message.result is not None and not message.result.done():
+            message.result.set_result(False)
+        if self.db is not None and message.user_id is not None:
+            try:
+                await self.db.log_notification(
+                    message.user_id, message.trade_id, message.notification_type, success=False
+                )
+            except Exception as e:
+                logger.warning(f"Failed to log failed notification: {e}")
@@ -0,0 +1,135 @@
+"""
+Pagination helpers for the Polymarket trades endpoint
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+
+def parse_iso(dt: str) -> datetime:
+    try:
+        return datetime.fromisoformat(dt.replace("Z", "+00:00"))
+    except Exception:
+        return datetime.now(timezone.utc)
+
+
+def extract_page(data: Any) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Split a raw /trades response into (items, next_cursor).
+
+    Many variants: list of trades OR dict with data + next/ cursor
+    """
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
+    if isinstance(data, list):
+        items = data
+    elif isinstance(data, dict):
+        if isinstance(data.get("data"), list):
+            items = data.get("data", [])
+        elif isinstance(data.get("trades"), list):
+            items = data.get("trades", [])
+        else:
+            # best effort: try to find a list value
+            items = []
+            for v in data.values():
+                if isinstance(v, list):
+                    items = v
+                    break
+        next_cursor = (
+            data.get("next")
+            or data.get("cursor")
+            or data.get("nextCursor")
+            or data.get("next_page_token")
+        )
+    else:
+        items = []
+
+    return items, next_cursor
+
+
+def oldest_item_timestamp(items: List[Dict[str, Any]]) -> Optional[datetime]:
+    """Oldest (timezone-aware) timestamp found in a page of raw items"""
+    timestamps = []
+    for it in items:
+        ts = it.get("timestamp")
+        if isinstance(ts, int):
+            timestamps.append(datetime.fromtimestamp(ts, tz=timezone.utc))
+        elif isinstance(ts, str):
+            timestamps.append(parse_iso(ts))
+    return min(timestamps) if timestamps else None
+
+
+class TradePaginator:
+    """Detects and follows the pagination strategy of /trades, newest to oldest.
+
+    The strategy starts as "auto" and locks in to one of: cursor | before | offset,
+    based on what the first page looks like.
+    """
+
+    def __init__(self, limit: int = 200):
+        self.limit = limit
+        self.strategy = "auto"
+        self.cursor: Optional[str] = None
+        self.before_iso: Optional[str] = None
+        self.offset: int = 0
+        self._prev_oldest: Optional[datetime] = None
+
+    def params(self) -> Dict[str, str]:
+        """Query parameters for the next page"""
+        params: Dict[str, str] = {"limit": str(self.limit)}
+        if self.before_iso:
+            params["before"] = self.before_iso
+        if self.strategy == "offset":
+            params["offset"] = str(self.offset)
+        if self.cursor:
+            params["cursor"] = self.cursor
+        return params
+
+    def advance(self, items: List[Dict[str, Any]], next_cursor: Optional[str]) -> bool:
+        """Move past the page just fetched. Returns False when there is nothing further back."""
+        # Detect and lock in strategy if auto
+        if self.strategy == "auto":
+            if next_cursor:
+                self.strategy = "cursor"
+                self.cursor = next_cursor
+                logger.debug("Pagination strategy: cursor")
+            else:
+                # Estimate using timestamps
+                oldest = oldest_item_timestamp(items)
+                if oldest:
+                    self.before_iso = (oldest - timedelta(seconds=1)).isoformat()
+                    self.strategy = "before"
+                    self._prev_oldest = oldest
+                    logger.debug("Pagination strategy: before=<iso>")
+                else:
+                    self.strategy = "offset"
+                    self.offset += self.limit
+                    logger.debug("Pagination strategy: offset")
+            return True
+
+        # Advance according to chosen strategy
+        if self.strategy == "cursor":
+            self.cursor = next_cursor
+            if not self.cursor:
+                logger.debug("Cursor exhausted")
+                return False
+        elif self.strategy == "before":
+            # compute next before from this page
+            oldest = oldest_item_timestamp(items)
+            if oldest:
+                # If not getting older, fallback to offset
+                if self._prev_oldest and oldest >= self._prev_oldest:
+                    logger.warning("'before' did not yield older data; switching to offset")
+                    self.strategy = "offset"
+                    self.offset += self.limit
+                else:
+                    self._prev_oldest = oldest
+                    self.before_iso = (oldest - timedelta(seconds=1)).isoformat()
+            else:
+                logger.warning("No timestamps found; switching to offset")
+                self.strategy = "offset"
+                self.offset += self.limit
+        elif self.strategy == "offset":
+            self.offset += self.limit
+        return True
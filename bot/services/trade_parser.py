@@ -0,0 +1,125 @@
+"""
+Fast-path parsing of raw Polymarket trade pages into lean records
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from loguru import logger
+
+from bot.models import Trade
+
+_UTC = timezone.utc
+
+
+class TradeRecord(NamedTuple):
+    """The fields the poll loop looks at, without pydantic validation.
+
+    Keeps a reference to the raw item so the remaining (display-only) fields are
+    read only when the record is promoted to a Trade.
+    """
+    id: str
+    trader_address: str
+    market_id: str
+    side: str
+    size: float  # USD value (shares * price)
+    price: float
+    timestamp: datetime  # naive UTC
+    raw: Dict[str, Any]
+
+    def to_trade(self) -> Trade:
+        """Promote to a full (validated) Trade"""
+        item = self.raw
+        return Trade(
+            id=self.id,
+            trader_address=self.trader_address,
+            trader_name=item.get("name", ""),
+            trader_pseudonym=item.get("pseudonym", ""),
+            market_id=self.market_id,
+            market_name=item.get("title", item.get("market", "Unknown Market")),
+            market_slug=item.get("slug", ""),
+            event_slug=item.get("eventSlug", ""),
+            outcome=item.get("outcome", ""),
+            side=self.side,
+            size=self.size,
+            price=self.price,
+            timestamp=self.timestamp,
+            transaction_hash=self.id,
+        )
+
+
+def parse_timestamp(value: Any) -> datetime:
+    """Naive UTC datetime from a Unix timestamp or ISO string.
+
+    Raises ValueError when the timestamp is missing or unreadable: stamping such
+    a trade with the current time would file it under the wrong hour and let a
+    re-fetch insert it again under another (id, timestamp).
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return datetime.fromtimestamp(value, tz=_UTC).replace(tzinfo=None)
+    if isinstance(value, str):
+        aware = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        return aware.astimezone(_UTC).replace(tzinfo=None) if aware.tzinfo is not None else aware
+    raise ValueError(f"Missing or invalid trade timestamp: {value!r}")
+
+
+def _parse_item(item: Dict[str, Any], min_size: Optional[float] = None) -> Optional[TradeRecord]:
+    """The one field mapping of a raw trade item; None if it falls below min_size.
+
+    Raises on malformed items. The size filter runs before the timestamp (the
+    costliest field) is parsed.
+    """
+    price = float(item.get("price", 0) or 0)
+    size = float(item.get("size", 0) or 0) * price
+    if min_size is not None and size < min_size:
+        return None
+    tx_hash = item.get("transactionHash")
+    if tx_hash is None:
+        tx_hash = item.get("transaction_hash", "")
+    trader = item.get("proxyWallet")
+    if trader is None:
+        trader = item.get("trader_address", "")
+    market_id = item.get("conditionId")
+    if market_id is None:
+        market_id = item.get("asset", "")
+    return TradeRecord(
+        tx_hash, trader, market_id, item.get("side", "BUY"),
+        size, price, parse_timestamp(item.get("timestamp")), item,
+    )
+
+
+def parse_record(item: Dict[str, Any]) -> TradeRecord:
+    """Parse one raw trade item (raises on malformed items)"""
+    return _parse_item(item)
+
+
+def parse_trade_page(items: Iterable[Dict[str, Any]], min_size: Optional[float] = None) -> List[TradeRecord]:
+    """Parse a page of raw items in one pass, in page order.
+
+    With min_size, items whose USD value falls below it are dropped before any
+    record (or timestamp) is built. Malformed items are skipped and counted.
+    """
+    records: List[TradeRecord] = []
+    append = records.append
+    skipped = 0
+    for item in items:
+        try:
+            record = _parse_item(item, min_size)
+        except Exception:
+            skipped += 1
+            continue
+        if record is not None:
+            append(record)
+    if skipped:
+        logger.warning(f"Skipped {skipped} malformed trade items")
+    return records
+
+
+def promote(records: Iterable[TradeRecord]) -> List[Trade]:
+    """Promote records to Trades, skipping any that fail validation"""
+    trades: List[Trade] = []
+    for record in records:
+        try:
+            trades.append(record.to_trade())
+        except Exception as e:
+            logger.warning(f"Failed to parse trade: {e}")
+    return trades
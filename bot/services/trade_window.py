@@ -0,0 +1,303 @@
+"""
+In-memory rolling window of recent trades, filled by the whale tracker poll loop
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from config.settings import settings
+from bot.models import Trade
+from bot.services.trade_parser import TradeRecord
+
+# The poll loop stores lean records; anything else adding to the window may store Trades
+WindowEntry = Union[Trade, TradeRecord]
+
+_EPOCH = datetime(1970, 1, 1)
+BUY_SIDES = ("BUY", "YES")
+SELL_SIDES = ("SELL", "NO")
+
+
+def _as_trade(entry: WindowEntry) -> Trade:
+    return entry.to_trade() if isinstance(entry, TradeRecord) else entry
+
+
+def _epoch(moment: datetime) -> float:
+    """Seconds since the epoch of a naive UTC datetime"""
+    return (moment - _EPOCH).total_seconds()
+
+
+def group_sum(codes: np.ndarray, weights: Optional[np.ndarray] = None, size: int = 0) -> np.ndarray:
+    """Sum of weights (or row count) per dictionary code, indexed by code"""
+    return np.bincount(codes, weights=weights, minlength=size)
+
+
+def top_k(values: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest values, largest first"""
+    k = min(k, len(values))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    candidates = np.argpartition(-values, k - 1)[:k]
+    return candidates[np.argsort(-values[candidates], kind="stable")]
+
+
+class StringDictionary:
+    """Dictionary encoding of strings to dense int codes"""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def code_of(self, value: str) -> int:
+        """Code of a value, or -1 if it was never encoded"""
+        return self.codes.get(value, -1)
+
+
+class RecentTradeWindow:
+    """Columnar ring buffer of the most recent trades.
+
+    Size, price, timestamp and side live in NumPy arrays, trader addresses and
+    market ids are dictionary-encoded into int32 codes, so lookups and group-bys
+    over the whole window are vectorized (bincount for sums, argpartition for
+    top-k) instead of Python loops over Trade objects. The entries themselves
+    are kept only to hand out Trades; TradeRecords are promoted when read, so
+    the bulk of non-whale trades never pays for validation. Lookups return
+    Trades newest first.
+    """
+
+    def __init__(self, capacity: int = 5000):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._size = np.zeros(capacity, dtype=np.float64)
+        self._price = np.zeros(capacity, dtype=np.float64)
+        self._ts = np.zeros(capacity, dtype=np.float64)
+        self._side = np.zeros(capacity, dtype=np.int8)  # +1 buy/yes, -1 sell/no, 0 other
+        self._trader = np.zeros(capacity, dtype=np.int32)
+        self._market = np.zeros(capacity, dtype=np.int32)
+        self._entries = np.empty(capacity, dtype=object)
+        self._traders = StringDictionary()
+        self._markets = StringDictionary()
+        self._ids: Set[str] = set()
+        self._next = 0  # slot the next trade is written to
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, trade: WindowEntry) -> bool:
+        """Append a trade as the newest entry; returns False if it is already present"""
+        return self.add_many([trade]) == 1
+
+    def add_many(self, trades: Iterable[WindowEntry]) -> int:
+        """Append trades given oldest first; returns how many new trades were kept"""
+        fresh: List[WindowEntry] = []
+        batch_ids = set()
+        for trade in trades:
+            if trade.id in self._ids or trade.id in batch_ids:
+                continue
+            batch_ids.add(trade.id)
+            fresh.append(trade)
+        if not fresh:
+            return 0
+        # Only the newest `capacity` of an oversized batch can survive
+        fresh = fresh[-self.capacity:]
+        slots = (self._next + np.arange(len(fresh))) % self.capacity
+
+        encode_trader = self._traders.encode
+        encode_market = self._markets.encode
+        trader_codes = []
+        market_codes = []
+        sides = []
+        for slot, trade in zip(slots.tolist(), fresh):
+            evicted = self._entries[slot]
+            if evicted is not None:
+                self._ids.discard(evicted.id)
+            self._entries[slot] = trade
+            self._ids.add(trade.id)
+            trader_codes.append(encode_trader(trade.trader_address.lower()))
+            market_codes.append(encode_market(trade.market_id))
+            side = (trade.side or "").upper()
+            sides.append(1 if side in BUY_SIDES else -1 if side in SELL_SIDES else 0)
+        self._size[slots] = [trade.size for trade in fresh]
+        self._price[slots] = [trade.price for trade in fresh]
+        self._ts[slots] = [_epoch(trade.timestamp) for trade in fresh]
+        self._side[slots] = sides
+        self._trader[slots] = trader_codes
+        self._market[slots] = market_codes
+
+        self._next = (self._next + len(fresh)) % self.capacity
+        self._count = min(self.capacity, self._count + len(fresh))
+        # Codes of evicted traders/markets are never reused; re-encode once they dominate
+        if len(self._traders) > 4 * self.capacity:
+            self._traders = self._recode(self._trader, self._traders)
+        if len(self._markets) > 4 * self.capacity:
+            self._markets = self._recode(self._market, self._markets)
+        return len(fresh)
+
+    def _recode(self, column: np.ndarray, dictionary: StringDictionary) -> StringDictionary:
+        """Rebuild a dictionary from the codes still in the window"""
+        slots = self._slots()
+        live, inverse = np.unique(column[slots], return_inverse=True)
+        recoded = StringDictionary()
+        for code in live.tolist():
+            recoded.encode(dictionary.values[code])
+        column[slots] = inverse
+        return recoded
+
+    def _slots(self) -> np.ndarray:
+        """Occupied slots, oldest first"""
+        return (self._next - self._count + np.arange(self._count)) % self.capacity
+
+    def _select(self, since: Optional[datetime] = None, min_size: Optional[float] = None) -> np.ndarray:
+        """Occupied slots (oldest first) at or after `since` and of at least min_size"""
+        slots = self._slots()
+        if since is not None:
+            slots = slots[self._ts[slots] >= _epoch(since)]
+        if min_size is not None:
+            slots = slots[self._size[slots] >= min_size]
+        return slots
+
+    def _newest_first(self, slots: np.ndarray, limit: Optional[int]) -> List[Trade]:
+        slots = slots[::-1]
+        if limit is not None:
+            slots = slots[:limit]
+        return [_as_trade(self._entries[slot]) for slot in slots.tolist()]
+
+    def recent(self, limit: Optional[int] = None, min_size: Optional[float] = None) -> List[Trade]:
+        """Most recent trades, optionally only those of at least min_size"""
+        return self._newest_first(self._select(min_size=min_size), limit)
+
+    def by_trader(self, address: str, limit: Optional[int] = None) -> List[Trade]:
+        """Recent trades by a trader address (case-insensitive)"""
+        code = self._traders.code_of(address.lower())
+        if code < 0:
+            return []
+        slots = self._slots()
+        return self._newest_first(slots[self._trader[slots] == code], limit)
+
+    def by_market(self, market_id: str, limit: Optional[int] = None) -> List[Trade]:
+        """Recent trades in a market"""
+        code = self._markets.code_of(market_id)
+        if code < 0:
+            return []
+        slots = self._slots()
+        return self._newest_first(slots[self._market[slots] == code], limit)
+
+    def trader_totals(self, address: str) -> Tuple[float, int]:
+        """(total volume, trade count) of a trader across the window"""
+        code = self._traders.code_of(address.lower())
+        if code < 0:
+            return 0.0, 0
+        slots = self._slots()
+        sizes = self._size[slots][self._trader[slots] == code]
+        return float(sizes.sum()), len(sizes)
+
+    def _latest(self, slots: np.ndarray, column: np.ndarray, code: int) -> Trade:
+        """Newest trade among `slots` whose `column` has `code`"""
+        return _as_trade(self._entries[slots[column[slots] == code][-1]])
+
+    def leaderboard(self, since: Optional[datetime] = None, limit: int = 10,
+                    min_size: float = settings.WHALE_THRESHOLD) -> List[Tuple[str, Dict[str, Any]]]:
+        """Top traders by volume of trades >= min_size, as (address, stats) pairs.
+
+        stats has total_volume, trade_count, largest_trade, trader_name,
+        trader_pseudonym and profile_url (names from the trader's newest trade).
+        """
+        slots = self._select(since, min_size)
+        if not len(slots):
+            return []
+        codes = self._trader[slots]
+        sizes = self._size[slots]
+        groups = len(self._traders)
+        volume = group_sum(codes, sizes, groups)
+        counts = group_sum(codes, None, groups)
+        largest = np.zeros(groups)
+        np.maximum.at(largest, codes, sizes)
+
+        leaders = []
+        for code in top_k(volume, limit).tolist():
+            if counts[code] == 0:
+                break
+            trade = self._latest(slots, self._trader, code)
+            leaders.append((trade.trader_address, {
+                'total_volume': float(volume[code]),
+                'trade_count': int(counts[code]),
+                'largest_trade': float(largest[code]),
+                'trader_name': trade.trader_name or '',
+                'trader_pseudonym': trade.trader_pseudonym or '',
+                'profile_url': trade.get_profile_url(),
+            }))
+        return leaders
+
+    def consensus(self, market_id: str, since: Optional[datetime] = None,
+                  min_size: float = settings.WHALE_THRESHOLD) -> Dict[str, Dict[str, float]]:
+        """Distinct whales and volume on each side of a market (same shape as
+        WhaleTracker.get_whale_consensus; BUY counts as YES, SELL as NO)"""
+        consensus = {"YES": {"count": 0, "volume": 0}, "NO": {"count": 0, "volume": 0}}
+        code = self._markets.code_of(market_id)
+        if code >= 0:
+            slots = self._select(since, min_size)
+            slots = slots[self._market[slots] == code]
+            for key, sign in (("YES", 1), ("NO", -1)):
+                side_slots = slots[self._side[slots] == sign]
+                consensus[key]["count"] = len(np.unique(self._trader[side_slots]))
+                consensus[key]["volume"] = float(self._size[side_slots].sum())
+
+        total_count = consensus["YES"]["count"] + consensus["NO"]["count"]
+        for key in ("YES", "NO"):
+            consensus[key]["percentage"] = (consensus[key]["count"] / total_count) * 100 if total_count else 0
+        return consensus
+
+    def flow(self, since: Optional[datetime] = None, limit: int = 5,
+             min_size: float = settings.WHALE_THRESHOLD) -> Dict[str, List[Dict[str, Any]]]:
+        """Markets with the largest net whale buying and selling (same shape as
+        WhaleTracker.get_smart_money_flow)"""
+        slots = self._select(since, min_size)
+        if not len(slots):
+            return {"buying": [], "selling": []}
+        codes = self._market[slots]
+        sizes = self._size[slots]
+        sides = self._side[slots]
+        groups = len(self._markets)
+        yes = group_sum(codes, sizes * (sides == 1), groups)
+        no = group_sum(codes, sizes * (sides == -1), groups)
+        net = yes - no
+
+        def entries(ranked: np.ndarray, keep) -> List[Dict[str, Any]]:
+            result = []
+            for code in ranked.tolist():
+                if not keep(net[code]):
+                    break
+                trade = self._latest(slots, self._market, code)
+                result.append({
+                    "market_id": trade.market_id,
+                    "market_name": trade.market_name,
+                    "net_flow": float(net[code]),
+                    "yes_volume": float(yes[code]),
+                    "no_volume": float(no[code]),
+                })
+            return result
+
+        return {
+            "buying": entries(top_k(net, limit), lambda value: value > 0),
+            "selling": entries(top_k(-net, limit), lambda value: value < 0),
+        }
+
+
+def get_trade_window(bot_data: Dict[str, Any]) -> Optional[RecentTradeWindow]:
+    """Return the shared trade window from bot_data, or None until the tracker has filled it"""
+    window = bot_data.get("trade_window")
+    if window is None or not len(window):
+        return None
+    return window
@@ -2,94 +2,285 @@
 Whale tracker service - monitors and detects whale trades
 """
 import asyncio
-from typing import List, Set
+import time
+from typing import Iterable, List, Optional, Union
 from datetime import datetime, timedelta
 from loguru import logger
 
 from config.settings import settings
 from bot.models import Trade, Whale
+from bot.services.alert_dispatcher import AlertDispatcher
+from bot.services.broadcast_service import TopTradesFeed
 from bot.services.database import Database
 from bot.services.polymarket_api import PolymarketAPI
+from bot.services.poll_scheduler import AdaptivePollScheduler
+from bot.services.redis_backend import RedisLock, RedisSeenTrades
+from bot.services.trade_parser import TradeRecord, promote
+from bot.services.trade_window import RecentTradeWindow
+from bot.utils.recent_ids import RecentIdSet
 
 
 class WhaleTracker:
     """Service to track whale trades"""
     
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, api: Optional[PolymarketAPI] = None):
         self.db = db
-        self.api = PolymarketAPI()
-        self.seen_trade_ids: Set[str] = set()
+        # Share the application-wide client when given; otherwise own a private one
+        self._owns_api = api is None
+        self.api = api or PolymarketAPI()
+        self.trade_window = RecentTradeWindow(capacity=settings.TRADE_WINDOW_SIZE)
+        self.seen_trade_ids = RecentIdSet(capacity=settings.SEEN_TRADE_IDS_CAPACITY)
         self.is_running = False
+        self.scheduler = AdaptivePollScheduler()
+        # Optional Redis coordination (set by main when REDIS_URL is configured)
+        self.leader_lock: Optional[RedisLock] = None
+        self.shared_seen: Optional[RedisSeenTrades] = None
+        # Fans new whale trades out to subscribed users (set by main)
+        self.alert_dispatcher: Optional[AlertDispatcher] = None
+        # Top-k of each broadcast interval, drained by the BroadcastService (set by main)
+        self.broadcast_feed: Optional[TopTradesFeed] = None
+        self._last_reconciled_at: Optional[float] = None
+        self._window_refreshed_at: Optional[float] = None
     
     async def start(self):
         """Start whale tracking loop"""
         self.is_running = True
+        await self.seed_seen_trade_ids()
+        await self.prime_trade_window()
         logger.info("Whale tracker started")
         
         while self.is_running:
+            is_leader = await self.ensure_leadership()
+            if self.broadcast_feed is not None:
+                self.broadcast_feed.set_active(is_leader)
+            if not is_leader:
+                # Another instance is polling; keep the window fresh and check again before its lease runs out
+                await self.maybe_refresh_trade_window()
+                await asyncio.sleep(self.leader_lock.renew_interval)
+                continue
+            
+            started = time.monotonic()
+            # A poll plus reconcile can outlast the lease; keep renewing it meanwhile
+            renewal = asyncio.create_task(self._renew_lease()) if self.leader_lock is not None else None
             try:
-                await self.check_for_whale_trades()
-                await asyncio.sleep(settings.POLL_INTERVAL)
+                new_trades = await self.check_for_whale_trades()
+                self.scheduler.record_success(new_trades)
+                await self.maybe_reconcile_stats()
             except Exception as e:
                 logger.error(f"Error in whale tracker loop: {e}")
-                await asyncio.sleep(settings.POLL_INTERVAL)
+                self.scheduler.record_failure()
+            finally:
+                if renewal is not None:
+                    renewal.cancel()
+            delay = self.scheduler.next_delay(elapsed=time.monotonic() - started)
+            logger.debug(f"Next poll in {delay:.1f}s")
+            await self._sleep(delay)
+    
+    async def ensure_leadership(self) -> bool:
+        """With a Redis lock configured, only the lock holder polls; without one, always True"""
+        if self.leader_lock is None:
+            return True
+        was_leader = self.leader_lock.held
+        try:
+            is_leader = await self.leader_lock.ensure()
+        except Exception as e:
+            # Redis is down: keep polling (DB ON CONFLICT still dedups) rather than stall
+            logger.error(f"Poller lock check failed, polling without coordination: {e}")
+            return True
+        if is_leader and not was_leader:
+            # Taking over from another instance: catch up on what it already handled
+            await self.seed_seen_trade_ids()
+        return is_leader
+    
+    async def _renew_lease(self):
+        """Renew the poller lease every renew_interval while a poll is running"""
+        while True:
+            await asyncio.sleep(self.leader_lock.renew_interval)
+            try:
+                if not await self.leader_lock.ensure():
+                    logger.warning("Lost the poller lock during a poll")
+                    return
+            except Exception as e:
+                logger.error(f"Failed to renew poller lock during a poll: {e}")
+    
+    async def _sleep(self, delay: float):
+        """Sleep, renewing the poller lease in between when running under a lock"""
+        if self.leader_lock is None:
+            await asyncio.sleep(delay)
+            return
+        deadline = time.monotonic() + delay
+        while self.is_running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining, self.leader_lock.renew_interval))
+            if not await self.ensure_leadership():
+                return
     
     async def stop(self):
         """Stop whale tracking loop"""
         self.is_running = False
-        await self.api.close()
+        if self.broadcast_feed is not None:
+            self.broadcast_feed.set_active(False)
+        if self.leader_lock is not None:
+            try:
+                await self.leader_lock.release()
+            except Exception as e:
+                logger.warning(f"Failed to release poller lock: {e}")
+        if self._owns_api:
+            await self.api.close()
         logger.info("Whale tracker stopped")
     
-    async def check_for_whale_trades(self):
-        """Check for new whale trades"""
+    async def seed_seen_trade_ids(self):
+        """Pre-load the dedup set with the newest stored trade ids so a restart doesn't re-process them"""
         try:
-            # Fetch recent trades
-            trades = await self.api.fetch_recent_trades(limit=100)
-            
-            new_whale_trades = []
-            
-            for trade in trades:
-                # Skip if already seen
-                if trade.id in self.seen_trade_ids:
-                    continue
-                
-                # Check if it's a whale trade
-                if self.is_whale_trade(trade):
-                    new_whale_trades.append(trade)
-                    self.seen_trade_ids.add(trade.id)
-                    
-                    # Save trade to database
-                    await self.db.save_trade(trade)
-                    
-                    # Update whale stats
-                    await self.update_whale_stats(trade.trader_address)
+            ids = await self.db.get_recent_trade_ids(limit=self.seen_trade_ids.capacity)
+            # Oldest first so the newest ids are the last to be evicted
+            self.seen_trade_ids.update(reversed(ids))
+            logger.info(f"Seeded {len(ids)} recent trade ids for deduplication")
+        except Exception as e:
+            logger.warning(f"Failed to seed recent trade ids: {e}")
+    
+    async def prime_trade_window(self):
+        """Fill the recent-trades window with one large snapshot so handlers have data right away"""
+        records = await self.api.fetch_recent_records(limit=500)
+        # API returns newest first; the window takes oldest first
+        self.trade_window.add_many(reversed(records))
+        self._window_refreshed_at = time.monotonic()
+        logger.info(f"Primed trade window with {len(self.trade_window)} trades")
+    
+    async def maybe_refresh_trade_window(self):
+        """On a standby instance, top up the window from the newest trades every TRADE_WINDOW_REFRESH_SECONDS.
+
+        Only the leader polls, so without this the standby's window would stop at
+        its startup snapshot while its handlers keep serving from it.
+        """
+        now = time.monotonic()
+        last = self._window_refreshed_at
+        if last is not None and now - last < settings.TRADE_WINDOW_REFRESH_SECONDS:
+            return
+        self._window_refreshed_at = now
+        try:
+            records = await self.api.fetch_recent_records(limit=500)
+            added = self.trade_window.add_many(reversed(records))
+            logger.debug(f"Refreshed trade window with {added} trades")
+        except Exception as e:
+            logger.warning(f"Failed to refresh trade window: {e}")
+    
+    async def check_for_whale_trades(self) -> int:
+        """Check for new whale trades
+        
+        Returns the number of new (unseen) trades in this poll; errors propagate
+        so the poll loop can back off.
+        """
+        # Fetch every trade since the previous poll's high-water mark, as lean records
+        records, mark = await self.api.fetch_new_records(
+            limit=settings.POLL_PAGE_SIZE,
+            max_pages=settings.POLL_MAX_PAGES
+        )
+        
+        # Feed every trade (not just whales) into the window handlers read from
+        self.trade_window.add_many(reversed(records))
+        
+        new_trades = 0
+        whale_records = []
+        
+        for record in records:
+            # Skip if already seen
+            if record.id in self.seen_trade_ids:
+                continue
+            new_trades += 1
             
-            if new_whale_trades:
-                logger.info(f"Detected {len(new_whale_trades)} new whale trades")
-                
-                # TODO: Send alerts to users
-                # await self.send_whale_alerts(new_whale_trades)
+            # Check if it's a whale trade
+            if self.is_whale_trade(record):
+                whale_records.append(record)
+        
+        # Only whale trades are promoted to validated Trade objects
+        new_whale_trades = promote(whale_records)
+        
+        claimed: List[str] = []
+        if new_whale_trades and self.shared_seen is not None:
+            # Drop trades another instance has already handled
+            try:
+                claimed = await self.shared_seen.claim([t.id for t in new_whale_trades])
+                claimed_ids = set(claimed)
+                new_whale_trades = [t for t in new_whale_trades if t.id in claimed_ids]
+            except Exception as e:
+                logger.warning(f"Shared trade dedup unavailable: {e}")
+        
+        if new_whale_trades:
+            # Save the whole poll in one round-trip
+            try:
+                if settings.WHALE_STATS_MODE == "full":
+                    # Recompute each affected trader once from history
+                    inserted = await self.db.save_trades(new_whale_trades)
+                else:
+                    # Stats deltas are applied in the same statement for inserted rows only
+                    await self.db.save_trades(new_whale_trades, incremental_stats=True)
+            except Exception:
+                # Unclaim so this poll (or another instance) can retry them
+                await self.release_claims(claimed)
+                raise
+            if settings.WHALE_STATS_MODE == "full":
+                await self.update_whale_stats({t.trader_address for t in inserted})
+            # Trades arrive newest first; record oldest first so eviction order stays by age
+            self.seen_trade_ids.update(t.id for t in reversed(new_whale_trades))
             
-            # Clean up old trade IDs (keep last 1000)
-            if len(self.seen_trade_ids) > 1000:
-                self.seen_trade_ids = set(list(self.seen_trade_ids)[-1000:])
+            logger.info(f"Detected {len(new_whale_trades)} new whale trades")
+            logger.debug(f"Trade dedup stats: {self.seen_trade_ids.stats()}")
             
+            if self.alert_dispatcher is not None:
+                self.alert_dispatcher.dispatch(new_whale_trades)
+            if self.broadcast_feed is not None:
+                self.broadcast_feed.push(new_whale_trades)
+        
+        # Only now that the poll is persisted may the next one start after it
+        if mark is not None:
+            self.api.commit_high_water(*mark)
+        
+        return new_trades
+    
+    async def release_claims(self, trade_ids: List[str]):
+        """Give back shared dedup claims for trades that were not saved"""
+        if not trade_ids or self.shared_seen is None:
+            return
+        try:
+            await self.shared_seen.release(trade_ids)
         except Exception as e:
-            logger.error(f"Error checking for whale trades: {e}")
+            logger.warning(f"Could not release shared trade claims: {e}")
     
-    async def update_whale_stats(self, address: str):
-        """Update statistics for a whale"""
+    async def maybe_reconcile_stats(self):
+        """Run the full whale stats recompute when the reconciliation interval has elapsed"""
+        interval = settings.WHALE_STATS_RECONCILE_INTERVAL
+        if interval <= 0:
+            return
+        now = time.monotonic()
+        if self._last_reconciled_at is None:
+            # First loop iteration: start the clock, reconcile after one full interval
+            self._last_reconciled_at = now
+            return
+        if now - self._last_reconciled_at < interval:
+            return
+        self._last_reconciled_at = now
         try:
-            # Get or create whale
-            whale = await self.db.get_or_create_whale(address)
-            
-            # Update stats from database
-            await self.db.update_whale_stats(address)
+            fixed = await self.db.reconcile_whale_stats()
+            logger.info(f"Whale stats reconciliation corrected {fixed} whales")
+        except Exception as e:
+            logger.error(f"Error reconciling whale stats: {e}")
+    
+    async def update_whale_stats(self, addresses: Iterable[str]):
+        """Update statistics for the given whales"""
+        addresses = list(addresses)
+        if not addresses:
+            return
+        try:
+            # Creates missing whales and recalculates stats in one batch
+            await self.db.update_whales_stats(addresses)
             
             # Recalculate win rate (simplified - would need market outcomes)
             # For now, we'll just update the stats
             
-            logger.debug(f"Updated stats for whale {whale.short_address}")
+            logger.debug(f"Updated stats for {len(addresses)} whales")
             
         except Exception as e:
             logger.error(f"Error updating whale stats: {e}")
@@ -106,11 +297,16 @@ class WhaleTracker:
             rows = await conn.fetch(query, address, limit)
             return [Trade(**dict(row)) for row in rows]
     
-    async def get_whale_consensus(self, market_id: str) -> dict:
+    async def get_whale_consensus(self, market_id: str, live: bool = False) -> dict:
         """
         Get whale consensus for a market
         Returns percentage of whales betting YES vs NO
+        
+        With live, it is computed from the in-memory trade window instead of the last 7 days in Postgres.
         """
+        if live:
+            return self.trade_window.consensus(market_id)
+        
         query = """
             SELECT 
                 side,
@@ -149,64 +345,55 @@ class WhaleTracker:
             
             return consensus
     
-    async def get_smart_money_flow(self, hours: int = 24) -> dict:
+    async def get_smart_money_flow(self, hours: int = 24, live: bool = False) -> dict:
         """
         Get smart money flow (net buying/selling by whales)
+        
+        With live, it is computed from the in-memory trade window (limited to the last `hours`).
         """
-        query = """
-            SELECT 
-                market_id,
-                market_name,
-                side,
-                SUM(size) as volume
-            FROM trades
-            WHERE timestamp > NOW() - INTERVAL '1 hour' * $1
-                AND size >= $2
-            GROUP BY market_id, market_name, side
-            ORDER BY volume DESC
-            LIMIT 20
-        """
-        async with self.db.pool.acquire() as conn:
-            rows = await conn.fetch(query, hours, settings.WHALE_THRESHOLD)
-            
-            # Group by market and calculate net flow
-            markets = {}
-            for row in rows:
-                market_id = row["market_id"]
-                if market_id not in markets:
-                    markets[market_id] = {
-                        "market_name": row["market_name"],
-                        "YES": 0,
-                        "NO": 0
-                    }
-                
-                side = row["side"]
-                if side in ["YES", "BUY"]:
-                    markets[market_id]["YES"] += float(row["volume"])
-                elif side in ["NO", "SELL"]:
-                    markets[market_id]["NO"] += float(row["volume"])
-            
-            # Calculate net flow
-            flow = []
-            for market_id, data in markets.items():
-                net_flow = data["YES"] - data["NO"]
-                flow.append({
-                    "market_id": market_id,
-                    "market_name": data["market_name"],
-                    "net_flow": net_flow,
-                    "yes_volume": data["YES"],
-                    "no_volume": data["NO"]
-                })
-            
-            # Sort by absolute net flow
-            flow.sort(key=lambda x: abs(x["net_flow"]), reverse=True)
+        since = datetime.utcnow() - timedelta(hours=hours)
+        if live:
+            return self.trade_window.flow(since=since)
+        rows = await self.db.get_market_side_volumes_since(since, limit=20)
+
+        # Group by market and calculate net flow
+        markets = {}
+        for row in rows:
+            market_id = row["market_id"]
+            if market_id not in markets:
+                markets[market_id] = {
+                    "market_name": row["market_name"],
+                    "YES": 0,
+                    "NO": 0
+                }
             
-            return {
-                "buying": [f for f in flow if f["net_flow"] > 0][:5],
-                "selling": [f for f in flow if f["net_flow"] < 0][:5]
-            }
+            side = row["side"]
+            if side in ["YES", "BUY"]:
+                markets[market_id]["YES"] += float(row["volume"])
+            elif side in ["NO", "SELL"]:
+                markets[market_id]["NO"] += float(row["volume"])
+        
+        # Calculate net flow
+        flow = []
+        for market_id, data in markets.items():
+            net_flow = data["YES"] - data["NO"]
+            flow.append({
+                "market_id": market_id,
+                "market_name": data["market_name"],
+                "net_flow": net_flow,
+                "yes_volume": data["YES"],
+                "no_volume": data["NO"]
+            })
+        
+        # Sort by absolute net flow
+        flow.sort(key=lambda x: abs(x["net_flow"]), reverse=True)
+        
+        return {
+            "buying": [f for f in flow if f["net_flow"] > 0][:5],
+            "selling": [f for f in flow if f["net_flow"] < 0][:5]
+        }
     
-    def is_whale_trade(self, trade: Trade) -> bool:
+    def is_whale_trade(self, trade: Union[Trade, TradeRecord]) -> bool:
         """Check if a trade qualifies as a whale trade"""
         return trade.size >= settings.WHALE_THRESHOLD
     
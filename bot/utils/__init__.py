@@ -2,6 +2,16 @@
 Utility functions for PolyWhale bot
 """
 from .formatters import format_size, format_price, format_time_ago, shorten_address
+from .json_codec import JsonArrayStreamDecoder, get_decoder
+from .recent_ids import RecentIdSet
+from .singleflight import SingleFlight
+from .timer_wheel import TimerWheel
+from .top_k import TopK
+from .ttl_cache import TTLCache, cached
 
-__all__ = ["format_size", "format_price", "format_time_ago", "shorten_address"]
+__all__ = [
+    "format_size", "format_price", "format_time_ago", "shorten_address",
+    "JsonArrayStreamDecoder", "get_decoder",
+    "RecentIdSet", "SingleFlight", "TimerWheel", "TopK", "TTLCache", "cached",
+]
 
@@ -3,6 +3,8 @@ Formatting utilities
 """
 from datetime import datetime
 
+from telegram.helpers import escape_markdown
+
 
 def format_size(size: float) -> str:
     """Format trade size for display"""
@@ -25,6 +27,22 @@ def shorten_address(address: str) -> str:
     return f"{address[:6]}...{address[-4:]}"
 
 
+def escape_md(text: str) -> str:
+    """Escape user/API-supplied text for legacy Markdown messages"""
+    return escape_markdown(text or "", version=1)
+
+
+def md_link(text: str, url: str) -> str:
+    """Legacy Markdown link whose text is safe to come from the API.
+
+    Telegram does not parse markup inside a link's text, so escaping there would
+    show the backslashes; only a bracket can break the entity, and those are
+    swapped for parentheses.
+    """
+    text = (text or "").replace("[", "(").replace("]", ")")
+    return f"[{text}]({url})"
+
+
 def format_time_ago(timestamp: datetime) -> str:
     """Format timestamp as time ago (assumes naive UTC when tzinfo is None)."""
     from datetime import timezone
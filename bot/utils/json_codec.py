@@ -0,0 +1,111 @@
+"""
+Pluggable JSON decoding: orjson when installed, stdlib json otherwise
+"""
+import codecs
+import json
+from typing import Any, Callable, Dict, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; stdlib json is always available
+    orjson = None
+
+Decoder = Callable[[Union[bytes, str]], Any]
+
+# Characters that can continue a JSON number
+_NUMBER_TAIL = "0123456789+-.eE"
+
+
+def _stdlib_loads(data: Union[bytes, str]) -> Any:
+    return json.loads(data)
+
+
+DECODERS: Dict[str, Decoder] = {"json": _stdlib_loads}
+if orjson is not None:
+    DECODERS["orjson"] = orjson.loads
+
+
+def get_decoder(name: str = "auto") -> Decoder:
+    """Decoder by name ("json", "orjson"); "auto" picks the fastest one installed"""
+    if name == "auto":
+        return DECODERS.get("orjson", _stdlib_loads)
+    if name not in DECODERS:
+        raise ValueError(f"JSON decoder {name!r} is not available (installed: {', '.join(DECODERS)})")
+    return DECODERS[name]
+
+
+loads = get_decoder()
+
+
+class JsonArrayStreamDecoder:
+    """Incrementally decodes the elements of a top-level JSON array.
+
+    Feed raw byte chunks as they arrive; each call returns the elements completed
+    so far, so a large page never has to be held decoded (or even fully buffered)
+    at once. Elements are decoded with stdlib raw_decode, the only decoder able to
+    stop at the end of a value. If the document turns out not to be an array it is
+    buffered whole instead, and close() leaves the decoded value in `document`.
+    """
+
+    def __init__(self):
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self.is_array: Optional[bool] = None
+        self.finished = False
+        self.document: Any = None
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Add a chunk; returns the array elements it completed"""
+        self._buffer += self._utf8.decode(chunk)
+        if self.is_array is None:
+            stripped = self._buffer.lstrip()
+            if not stripped:
+                return []
+            self.is_array = stripped[0] == "["
+            self._buffer = stripped[1:] if self.is_array else stripped
+        if not self.is_array:
+            return []
+        return self._drain()
+
+    def _drain(self) -> List[Any]:
+        items: List[Any] = []
+        buffer = self._buffer
+        pos = 0
+        size = len(buffer)
+        while not self.finished:
+            # Skip whitespace and separators between elements
+            while pos < size and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= size:
+                break
+            if buffer[pos] == "]":
+                self.finished = True
+                pos += 1
+                break
+            try:
+                item, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # element not complete yet
+            if end >= size or (
+                isinstance(item, (int, float)) and not isinstance(item, bool)
+                and not buffer[end:].lstrip(_NUMBER_TAIL)
+            ):
+                break  # a number at the end of the buffer ("1", "-0.", "2e") may continue in the next chunk
+            items.append(item)
+            pos = end
+        self._buffer = buffer[pos:]
+        return items
+
+    def close(self) -> List[Any]:
+        """Finish the stream; returns any last elements (raises ValueError if truncated)"""
+        self._buffer += self._utf8.decode(b"", final=True)
+        if not self.is_array:
+            self.document = json.loads(self._buffer) if self._buffer.strip() else None
+            self._buffer = ""
+            return []
+        self._buffer += " "  # lets a trailing number complete
+        items = self._drain()
+        if not self.finished or self._buffer.strip():
+            raise ValueError("Truncated or malformed JSON array")
+        return items
@@ -0,0 +1,56 @@
+"""
+Bounded, insertion-ordered dedup set for recently seen ids
+"""
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable
+
+
+class RecentIdSet:
+    """Keeps the most recent `capacity` ids; insert, lookup and eviction are O(1).
+
+    Membership tests (`id in s`) are counted as hits/misses.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._items: "OrderedDict[Hashable, None]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, item: Hashable) -> bool:
+        if item in self._items:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, item: Hashable) -> None:
+        """Add an id as the most recent entry, evicting the oldest when full"""
+        if item in self._items:
+            self._items.move_to_end(item)
+            return
+        self._items[item] = None
+        if len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def update(self, items: Iterable[Hashable]) -> None:
+        """Add ids in order (oldest first)"""
+        for item in items:
+            self.add(item)
+
+    def stats(self) -> Dict[str, int]:
+        """Size and hit/miss counters"""
+        return {
+            "size": len(self._items),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,69 @@
+"""
+Hashed timer wheel - groups scheduled items into fixed-width time slots
+"""
+from typing import Dict, Hashable, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class TimerWheel:
+    """Items are scheduled into `slots` buckets of `resolution` seconds each.
+
+    Advancing the wheel touches only the slots between the last tick and now,
+    so the cost of a tick doesn't depend on how many keys have items pending.
+    Items further away than one revolution share a slot with nearer ones and
+    stay put until their own tick comes round. Due items come back grouped by
+    key so callers can handle each key's batch in one go.
+    """
+
+    def __init__(self, resolution: float = 60.0, slots: int = 1440):
+        if resolution <= 0 or slots <= 0:
+            raise ValueError("resolution and slots must be positive")
+        self.resolution = resolution
+        self.slots = slots
+        # slot -> key -> [(tick, item)]
+        self._wheel: List[Dict[Hashable, List[Tuple[int, T]]]] = [{} for _ in range(slots)]
+        self._last_tick: int = -1
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _tick(self, timestamp: float) -> int:
+        return int(timestamp // self.resolution)
+
+    def schedule(self, timestamp: float, key: Hashable, item: T) -> None:
+        """Schedule an item for a UNIX timestamp (past timestamps fire on the next advance)"""
+        tick = self._tick(timestamp)
+        if self._last_tick >= 0 and tick <= self._last_tick:
+            tick = self._last_tick + 1
+        self._wheel[tick % self.slots].setdefault(key, []).append((tick, item))
+        self._size += 1
+
+    def advance(self, now: float) -> Dict[Hashable, List[T]]:
+        """Pop every item due at or before `now`, grouped by key"""
+        now_tick = self._tick(now)
+        due: Dict[Hashable, List[T]] = {}
+        if self._last_tick < 0:
+            # First advance: everything scheduled so far is a candidate
+            self._last_tick = now_tick - self.slots
+        if now_tick <= self._last_tick:
+            return due
+
+        first = max(self._last_tick + 1, now_tick - self.slots + 1)
+        for tick in range(first, now_tick + 1):
+            slot = self._wheel[tick % self.slots]
+            for key in list(slot):
+                pending = slot[key]
+                ready = [item for item_tick, item in pending if item_tick <= now_tick]
+                if not ready:
+                    continue
+                due.setdefault(key, []).extend(ready)
+                remaining = [entry for entry in pending if entry[0] > now_tick]
+                if remaining:
+                    slot[key] = remaining
+                else:
+                    del slot[key]
+                self._size -= len(ready)
+        self._last_tick = now_tick
+        return due
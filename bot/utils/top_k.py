@@ -0,0 +1,49 @@
+"""
+Bounded streaming top-k - keeps the k highest-scoring items seen since the last drain
+"""
+import heapq
+import itertools
+from typing import Generic, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class TopK(Generic[T]):
+    """Min-heap of at most k (score, item) pairs.
+
+    push is O(log k) and rejects anything below the current k-th best in O(1),
+    so a burst of pushes stays cheap however many items arrive. drain hands the
+    survivors back best first and starts a new, empty window.
+    """
+
+    def __init__(self, k: int = 1):
+        if k <= 0:
+            raise ValueError("k must be positive")
+        self.k = k
+        self._heap: List[Tuple[float, int, T]] = []
+        # Ties keep the earlier item; the counter also keeps items from being compared
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, score: float, item: T) -> bool:
+        """Offer an item; returns True if it is (for now) among the top k"""
+        entry = (score, -next(self._seq), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return True
+        if entry[:2] <= self._heap[0][:2]:
+            return False
+        heapq.heapreplace(self._heap, entry)
+        return True
+
+    def peek(self) -> List[T]:
+        """Current top items, best first, without draining"""
+        return [item for _, _, item in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+    def drain(self) -> List[T]:
+        """Top items best first; empties the structure"""
+        items = self.peek()
+        self._heap = []
+        return items
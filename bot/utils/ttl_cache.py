@@ -0,0 +1,130 @@
+"""
+Size-bounded TTL cache and a decorator for caching async method results
+"""
+import functools
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from loguru import logger
+
+
+class TTLCache:
+    """LRU-evicting cache whose entries also expire after a per-entry TTL (seconds)"""
+
+    def __init__(self, max_entries: int = 1024, default_ttl: float = 300):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, key: Hashable) -> Tuple[bool, Any]:
+        """Return (found, value); expired entries count as misses"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self._entries[key]
+            self.expirations += 1
+        self.misses += 1
+        return False, None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        found, value = self.lookup(key)
+        return value if found else default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one key, or everything when no key is given"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def _key_part(value: Any, ttl: float) -> Hashable:
+    # Floor datetimes to the TTL bucket so rolling windows (now - 24h) share an entry
+    if isinstance(value, datetime) and ttl > 0:
+        return ("dt", int(value.timestamp() // ttl))
+    if isinstance(value, (list, set, tuple)):
+        return tuple(_key_part(v, ttl) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _key_part(v, ttl)) for k, v in value.items()))
+    return value
+
+
+def cached(ttl: float, cache_empty: bool = True) -> Callable:
+    """Cache an async method's result in `self.cache` (a TTLCache) for ttl seconds.
+
+    If the instance also has a `shared_cache` (async lookup/set, e.g. Redis), it is
+    consulted on local misses so several processes share one computation.
+    Results are shared between callers and must not be mutated. With
+    cache_empty=False, falsy results (e.g. [] after an upstream error) are not stored.
+    """
+    def decorator(fn: Callable) -> Callable:
+        name = fn.__qualname__
+
+        @functools.wraps(fn)
+        async def wrapper(self, *args, **kwargs):
+            cache: Optional[TTLCache] = getattr(self, "cache", None)
+            if cache is None or ttl <= 0:
+                return await fn(self, *args, **kwargs)
+            key = (name, _key_part(args, ttl), _key_part(kwargs, ttl))
+            found, value = cache.lookup(key)
+            if found:
+                return value
+
+            shared = getattr(self, "shared_cache", None)
+            if shared is not None:
+                try:
+                    found, value = await shared.lookup(key)
+                    if found:
+                        cache.set(key, value, ttl)
+                        return value
+                except Exception as e:
+                    logger.warning(f"Shared cache lookup failed for {name}: {e}")
+
+            value = await fn(self, *args, **kwargs)
+            if value or cache_empty:
+                cache.set(key, value, ttl)
+                if shared is not None:
+                    try:
+                        await shared.set(key, value, ttl)
+                    except Exception as e:
+                        logger.warning(f"Shared cache store failed for {name}: {e}")
+            return value
+
+        return wrapper
+    return decorator
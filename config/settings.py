@@ -24,8 +24,12 @@ class Settings:
     SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
     SUPABASE_KEY: str = os.getenv("SUPABASE_KEY", "")
 
-    # Redis Configuration
+    # Redis Configuration (optional: shared dedup, cache and poller election across instances)
     REDIS_URL: str = os.getenv("REDIS_URL", "")
+    REDIS_KEY_PREFIX: str = os.getenv("REDIS_KEY_PREFIX", "polywhale:")
+    REDIS_SEEN_TRADE_TTL: int = int(os.getenv("REDIS_SEEN_TRADE_TTL", "86400"))
+    # Lease (seconds) on the lock that elects the single instance polling Polymarket
+    POLLER_LOCK_TTL: int = int(os.getenv("POLLER_LOCK_TTL", "30"))
 
     # Polymarket API Configuration
     POLYMARKET_DATA_API: str = os.getenv(
@@ -37,15 +41,80 @@ class Settings:
         "https://gamma-api.polymarket.com"
     )
 
+    # Shared HTTP client (connection pool, DNS cache and timeouts in seconds)
+    HTTP_POOL_LIMIT: int = int(os.getenv("HTTP_POOL_LIMIT", "50"))
+    HTTP_POOL_LIMIT_PER_HOST: int = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))
+    HTTP_DNS_CACHE_TTL: int = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+    HTTP_KEEPALIVE_TIMEOUT: int = int(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))
+    HTTP_TIMEOUT_TOTAL: int = int(os.getenv("HTTP_TIMEOUT_TOTAL", "30"))
+    HTTP_TIMEOUT_CONNECT: int = int(os.getenv("HTTP_TIMEOUT_CONNECT", "10"))
+    # Response decoding: auto (orjson if installed), orjson or json
+    JSON_DECODER: str = os.getenv("JSON_DECODER", "auto")
+    JSON_STREAM_CHUNK_SIZE: int = int(os.getenv("JSON_STREAM_CHUNK_SIZE", "65536"))
+
     # Bot Configuration
     WHALE_THRESHOLD: int = int(os.getenv("WHALE_THRESHOLD", "500"))
     POLL_INTERVAL: int = int(os.getenv("POLL_INTERVAL", "10"))
+    # Adaptive polling: bounds for the interval, new trades per poll that count as "busy",
+    # and the cap for exponential backoff after errors
+    POLL_INTERVAL_MIN: int = int(os.getenv("POLL_INTERVAL_MIN", "2"))
+    POLL_INTERVAL_MAX: int = int(os.getenv("POLL_INTERVAL_MAX", "60"))
+    POLL_BUSY_THRESHOLD: int = int(os.getenv("POLL_BUSY_THRESHOLD", "50"))
+    POLL_MAX_BACKOFF: int = int(os.getenv("POLL_MAX_BACKOFF", "300"))
+    # Incremental polling: page size and max pages walked back to the last high-water mark
+    POLL_PAGE_SIZE: int = int(os.getenv("POLL_PAGE_SIZE", "100"))
+    POLL_MAX_PAGES: int = int(os.getenv("POLL_MAX_PAGES", "10"))
+    # Trades kept in the in-memory recent-trades window that handlers query
+    TRADE_WINDOW_SIZE: int = int(os.getenv("TRADE_WINDOW_SIZE", "5000"))
+    # How often a standby instance (not polling) refreshes that window from the newest trades
+    TRADE_WINDOW_REFRESH_SECONDS: int = int(os.getenv("TRADE_WINDOW_REFRESH_SECONDS", "30"))
+    # How many recent trade ids the tracker remembers for deduplication
+    SEEN_TRADE_IDS_CAPACITY: int = int(os.getenv("SEEN_TRADE_IDS_CAPACITY", "10000"))
     MAX_ALERTS_PER_USER: int = int(os.getenv("MAX_ALERTS_PER_USER", "50"))
 
+    # Whale stats: "incremental" applies per-trade deltas at ingest, "full" recomputes from history
+    WHALE_STATS_MODE: str = os.getenv("WHALE_STATS_MODE", "incremental").lower()
+    # Full recompute of all whale stats every N seconds (0 disables)
+    WHALE_STATS_RECONCILE_INTERVAL: int = int(os.getenv("WHALE_STATS_RECONCILE_INTERVAL", "3600"))
+
+    # Trades partitioning (database/migrations/001): partition width ("day" or "week"),
+    # days of partitions created ahead, and how often maintenance runs (seconds)
+    TRADES_PARTITION_INTERVAL: str = os.getenv("TRADES_PARTITION_INTERVAL", "day").lower()
+    TRADES_PARTITIONS_AHEAD_DAYS: int = int(os.getenv("TRADES_PARTITIONS_AHEAD_DAYS", "7"))
+    TRADES_PARTITION_MAINTENANCE_INTERVAL: int = int(os.getenv("TRADES_PARTITION_MAINTENANCE_INTERVAL", "3600"))
+    # Drop trade partitions older than N days (0 keeps everything). Hourly rollups keep the
+    # full history, but whale totals recomputed from trades then cover the retained days only
+    TRADES_RETENTION_DAYS: int = int(os.getenv("TRADES_RETENTION_DAYS", "0"))
+
+    # Alerts: full reload of the in-memory subscriber index every N seconds (0 = load once)
+    ALERT_INDEX_REFRESH_INTERVAL: int = int(os.getenv("ALERT_INDEX_REFRESH_INTERVAL", "300"))
+
+    # Telegram send limits: global messages/sec, per private chat/sec, per group or channel/min
+    TELEGRAM_GLOBAL_RATE: float = float(os.getenv("TELEGRAM_GLOBAL_RATE", "25"))
+    TELEGRAM_CHAT_RATE: float = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+    TELEGRAM_GROUP_RATE_PER_MINUTE: float = float(os.getenv("TELEGRAM_GROUP_RATE_PER_MINUTE", "20"))
+    TELEGRAM_SEND_MAX_ATTEMPTS: int = int(os.getenv("TELEGRAM_SEND_MAX_ATTEMPTS", "3"))
+    # Concurrent send workers sharing those limits (one slow send_message no longer stalls the queue)
+    TELEGRAM_SEND_WORKERS: int = int(os.getenv("TELEGRAM_SEND_WORKERS", "4"))
+
+    # Merge a whale's fills in one market within this many seconds into one alert (0 = off)
+    ALERT_COALESCE_SECONDS: float = float(os.getenv("ALERT_COALESCE_SECONDS", "20"))
+
+    # Quiet hours: alerts held during a user's quiet window go out as one digest when it ends
+    QUIET_HOURS_TICK_SECONDS: int = int(os.getenv("QUIET_HOURS_TICK_SECONDS", "60"))
+    QUIET_DIGEST_MAX_ITEMS: int = int(os.getenv("QUIET_DIGEST_MAX_ITEMS", "15"))
+    # How long an instance owns claimed digest rows before another may send them
+    QUIET_DIGEST_CLAIM_SECONDS: int = int(os.getenv("QUIET_DIGEST_CLAIM_SECONDS", "600"))
+    # A digest that could not be sent is retried after this long, doubling up to the max
+    QUIET_DIGEST_RETRY_SECONDS: int = int(os.getenv("QUIET_DIGEST_RETRY_SECONDS", "60"))
+    QUIET_DIGEST_RETRY_MAX_SECONDS: int = int(os.getenv("QUIET_DIGEST_RETRY_MAX_SECONDS", "3600"))
+
     # Broadcast / Realtime
     BROADCAST_ENABLED: bool = (os.getenv("BROADCAST_ENABLED", "true").lower() == "true")
     BROADCAST_INTERVAL_SECONDS: int = int(os.getenv("BROADCAST_INTERVAL_SECONDS", "60"))
     BROADCAST_MIN_USD: int = int(os.getenv("BROADCAST_MIN_USD", "500"))
+    # Trades per broadcast: 1 posts the biggest trade of the interval, N posts a "top N" list
+    BROADCAST_TOP_N: int = int(os.getenv("BROADCAST_TOP_N", "1"))
 
     # Environment
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
@@ -69,9 +138,15 @@ class Settings:
     CACHE_TTL_MARKETS: int = 300      # 5 minutes
     CACHE_TTL_WHALE_STATS: int = 600  # 10 minutes
     CACHE_TTL_LEADERBOARD: int = 1800 # 30 minutes
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
 
     # API Rate Limiting
     API_RATE_LIMIT: int = 1  # requests per second
+    # Shared request budget of the pipelined backfill (scripts/backfill_trades.py --pipeline)
+    BACKFILL_RATE_LIMIT: float = float(os.getenv("BACKFILL_RATE_LIMIT", "4"))
+    # Attempts per backfill page, with exponential backoff from BACKFILL_RETRY_DELAY seconds
+    BACKFILL_FETCH_ATTEMPTS: int = int(os.getenv("BACKFILL_FETCH_ATTEMPTS", "5"))
+    BACKFILL_RETRY_DELAY: float = float(os.getenv("BACKFILL_RETRY_DELAY", "1"))
 
     @classmethod
     def validate(cls) -> bool:
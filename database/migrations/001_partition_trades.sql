@@ -0,0 +1,142 @@
+-- Convert trades into a table range-partitioned by timestamp.
+-- Applied by scripts/migrate.py in a single transaction; fresh installs get this from schema.sql.
+--
+-- The primary key becomes (id, timestamp), since unique keys on a partitioned table
+-- must include the partition key. notifications.trade_id therefore loses its
+-- foreign key; it was informational only.
+
+-- Create (or fill gaps of) trades partitions covering [from_ts, to_ts).
+-- step is 'day' or 'week'. Partitions are named trades_dYYYYMMDD / trades_wYYYYMMDD
+-- after their lower bound. A week that overlaps existing daily partitions is filled
+-- day by day instead, so switching the interval never leaves a hole.
+-- Returns the number of partitions created.
+CREATE OR REPLACE FUNCTION ensure_trade_partitions(from_ts TIMESTAMP, to_ts TIMESTAMP, step TEXT DEFAULT 'day')
+RETURNS INTEGER AS $$
+DECLARE
+    bucket TIMESTAMP;
+    bucket_end TIMESTAMP;
+    day_start TIMESTAMP;
+    part_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    IF step NOT IN ('day', 'week') THEN
+        RAISE EXCEPTION 'unsupported partition step: %', step;
+    END IF;
+    bucket := date_trunc(step, from_ts);
+    WHILE bucket < to_ts LOOP
+        bucket_end := bucket + ('1 ' || step)::interval;
+        part_name := 'trades_' || left(step, 1) || to_char(bucket, 'YYYYMMDD');
+        IF to_regclass(part_name) IS NULL THEN
+            BEGIN
+                EXECUTE format('CREATE TABLE %I PARTITION OF trades FOR VALUES FROM (%L) TO (%L)',
+                               part_name, bucket, bucket_end);
+                created := created + 1;
+            EXCEPTION WHEN invalid_object_definition THEN
+                -- Overlaps partitions of another interval: fill the gaps day by day
+                day_start := bucket;
+                WHILE day_start < bucket_end LOOP
+                    part_name := 'trades_d' || to_char(day_start, 'YYYYMMDD');
+                    IF to_regclass(part_name) IS NULL THEN
+                        BEGIN
+                            EXECUTE format('CREATE TABLE %I PARTITION OF trades FOR VALUES FROM (%L) TO (%L)',
+                                           part_name, day_start, day_start + INTERVAL '1 day');
+                            created := created + 1;
+                        EXCEPTION WHEN invalid_object_definition THEN
+                            NULL;  -- already covered by a wider partition
+                        END;
+                    END IF;
+                    day_start := day_start + INTERVAL '1 day';
+                END LOOP;
+            END;
+        END IF;
+        bucket := bucket_end;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Drop every trades partition whose upper bound is at or before cutoff.
+-- Dropping a partition is a catalog operation, independent of its row count.
+-- Returns the number of partitions dropped.
+CREATE OR REPLACE FUNCTION drop_trade_partitions_before(cutoff TIMESTAMP)
+RETURNS INTEGER AS $$
+DECLARE
+    part RECORD;
+    dropped INTEGER := 0;
+BEGIN
+    FOR part IN
+        SELECT c.oid::regclass AS name,
+               substring(pg_get_expr(c.relpartbound, c.oid) FROM 'TO \(''([^'']+)''\)')::timestamp AS upper_bound
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'trades'::regclass
+    LOOP
+        IF part.upper_bound IS NOT NULL AND part.upper_bound <= cutoff THEN
+            EXECUTE format('DROP TABLE %s', part.name);
+            dropped := dropped + 1;
+        END IF;
+    END LOOP;
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Objects that depend on the old table
+ALTER TABLE notifications DROP CONSTRAINT IF EXISTS notifications_trade_id_fkey;
+DROP VIEW IF EXISTS market_activity;
+
+ALTER TABLE trades RENAME TO trades_unpartitioned;
+
+CREATE TABLE trades (
+    id VARCHAR(255) NOT NULL,
+    trader_address VARCHAR(66) NOT NULL,
+    market_id VARCHAR(255) NOT NULL,
+    market_name TEXT,
+    side VARCHAR(10),
+    size DECIMAL(20, 2) NOT NULL,
+    price DECIMAL(10, 6),
+    timestamp TIMESTAMP NOT NULL,
+    transaction_hash VARCHAR(255),
+    metadata JSONB DEFAULT '{}'::jsonb,
+    created_at TIMESTAMP DEFAULT NOW()
+) PARTITION BY RANGE (timestamp);
+
+-- Partitions for the existing history plus a week ahead
+SELECT ensure_trade_partitions(
+    COALESCE((SELECT MIN(timestamp) FROM trades_unpartitioned), NOW() AT TIME ZONE 'UTC'),
+    (NOW() AT TIME ZONE 'UTC') + INTERVAL '7 days',
+    'day'
+);
+
+INSERT INTO trades (id, trader_address, market_id, market_name, side, size, price, timestamp,
+                    transaction_hash, metadata, created_at)
+SELECT id, trader_address, market_id, market_name, side, size, price, timestamp,
+       transaction_hash, metadata, created_at
+FROM trades_unpartitioned;
+
+DROP TABLE trades_unpartitioned;
+
+-- Indexes are declared once on the parent and built per partition (after the copy)
+ALTER TABLE trades ADD PRIMARY KEY (id, timestamp);
+CREATE INDEX idx_trades_trader ON trades(trader_address);
+CREATE INDEX idx_trades_market ON trades(market_id);
+CREATE INDEX idx_trades_timestamp ON trades(timestamp DESC);
+CREATE INDEX idx_trades_size ON trades(size DESC);
+CREATE INDEX idx_trades_created ON trades(created_at DESC);
+
+CREATE OR REPLACE VIEW market_activity AS
+SELECT
+    m.market_id,
+    m.question,
+    m.category,
+    m.end_date,
+    COUNT(t.id) as whale_trades_24h,
+    SUM(t.size) as whale_volume_24h,
+    m.volume as total_volume
+FROM markets m
+LEFT JOIN trades t ON m.market_id = t.market_id
+    AND t.timestamp > NOW() - INTERVAL '24 hours'
+    AND t.size >= 10000
+GROUP BY m.market_id, m.question, m.category, m.end_date, m.volume
+ORDER BY whale_volume_24h DESC NULLS LAST;
+
+COMMENT ON TABLE trades IS 'All trades from Polymarket (range-partitioned by timestamp)';
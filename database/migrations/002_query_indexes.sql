@@ -0,0 +1,28 @@
+-- Composite, covering and partial indexes shaped after the hot queries.
+-- {{WHALE_THRESHOLD}} is substituted by scripts/migrate.py with the configured
+-- WHALE_THRESHOLD; after changing it, recreate idx_trades_whale_ts to match.
+--
+-- Window scans (timestamp >= $1 AND size >= $2, grouped by trader or market, e.g. the
+-- partial first hour of /top and /markets): index-only on (timestamp, size) + payload
+CREATE INDEX IF NOT EXISTS idx_trades_ts_size
+    ON trades (timestamp DESC, size DESC) INCLUDE (trader_address, market_id, side);
+
+-- Per-trader history and lifetime aggregates (whale profiles, whale stats recompute)
+CREATE INDEX IF NOT EXISTS idx_trades_trader_ts
+    ON trades (trader_address, timestamp DESC) INCLUDE (size);
+
+-- Per-market windows (whale consensus)
+CREATE INDEX IF NOT EXISTS idx_trades_market_ts
+    ON trades (market_id, timestamp DESC) INCLUDE (size, side, trader_address);
+
+-- Whale trades only: recent whale trades and largest trade in a window
+CREATE INDEX IF NOT EXISTS idx_trades_whale_ts
+    ON trades (timestamp DESC) INCLUDE (size, trader_address, market_id)
+    WHERE size >= {{WHALE_THRESHOLD}};
+
+-- Single-column indexes now covered by the leading columns above
+DROP INDEX IF EXISTS idx_trades_timestamp;
+DROP INDEX IF EXISTS idx_trades_trader;
+DROP INDEX IF EXISTS idx_trades_market;
+
+ANALYZE trades;
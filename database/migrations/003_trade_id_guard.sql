@@ -0,0 +1,136 @@
+-- Catch-all partition and an id-only uniqueness guard for the partitioned trades table.
+--
+-- trades_default takes rows whose timestamp has no partition yet (e.g. a backfill
+-- older than the partitioned range, or a clock far ahead), which would otherwise
+-- fail the whole insert. ensure_trade_partitions moves them out when it later
+-- creates their partition.
+--
+-- The primary key is (id, timestamp), so on its own it would accept the same trade
+-- id twice with different timestamps, and the rollups folded in by save_trades /
+-- bulk_load_trades would count it twice. trade_ids (not partitioned) holds one row
+-- per id; inserts claim the id there first and only claimed ids reach trades.
+
+-- Create one trades partition for [lo, hi). Rows of that range that landed in
+-- trades_default (written before the partition existed) are moved into it, since
+-- Postgres refuses to create a partition whose range the default partition holds.
+CREATE OR REPLACE FUNCTION create_trade_partition(part_name TEXT, lo TIMESTAMP, hi TIMESTAMP)
+RETURNS VOID AS $$
+DECLARE
+    stray BOOLEAN := FALSE;
+BEGIN
+    IF to_regclass('trades_default') IS NOT NULL THEN
+        EXECUTE 'SELECT EXISTS (SELECT 1 FROM trades_default WHERE timestamp >= $1 AND timestamp < $2)'
+            INTO stray USING lo, hi;
+    END IF;
+    IF stray THEN
+        EXECUTE 'CREATE TEMP TABLE IF NOT EXISTS trades_stray (LIKE trades) ON COMMIT DROP';
+        EXECUTE 'WITH moved AS (DELETE FROM trades_default WHERE timestamp >= $1 AND timestamp < $2 RETURNING *)
+                 INSERT INTO trades_stray SELECT * FROM moved' USING lo, hi;
+    END IF;
+    EXECUTE format('CREATE TABLE %I PARTITION OF trades FOR VALUES FROM (%L) TO (%L)', part_name, lo, hi);
+    IF stray THEN
+        EXECUTE 'INSERT INTO trades SELECT * FROM trades_stray';
+        EXECUTE 'TRUNCATE trades_stray';
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create (or fill gaps of) trades partitions covering [from_ts, to_ts).
+-- step is 'day' or 'week'. Partitions are named trades_dYYYYMMDD / trades_wYYYYMMDD
+-- after their lower bound. A week that overlaps existing daily partitions is filled
+-- day by day instead, so switching the interval never leaves a hole.
+-- Returns the number of partitions created.
+CREATE OR REPLACE FUNCTION ensure_trade_partitions(from_ts TIMESTAMP, to_ts TIMESTAMP, step TEXT DEFAULT 'day')
+RETURNS INTEGER AS $$
+DECLARE
+    bucket TIMESTAMP;
+    bucket_end TIMESTAMP;
+    day_start TIMESTAMP;
+    part_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    IF step NOT IN ('day', 'week') THEN
+        RAISE EXCEPTION 'unsupported partition step: %', step;
+    END IF;
+    bucket := date_trunc(step, from_ts);
+    WHILE bucket < to_ts LOOP
+        bucket_end := bucket + ('1 ' || step)::interval;
+        part_name := 'trades_' || left(step, 1) || to_char(bucket, 'YYYYMMDD');
+        IF to_regclass(part_name) IS NULL THEN
+            BEGIN
+                PERFORM create_trade_partition(part_name, bucket, bucket_end);
+                created := created + 1;
+            EXCEPTION WHEN invalid_object_definition THEN
+                -- Overlaps partitions of another interval: fill the gaps day by day
+                day_start := bucket;
+                WHILE day_start < bucket_end LOOP
+                    part_name := 'trades_d' || to_char(day_start, 'YYYYMMDD');
+                    IF to_regclass(part_name) IS NULL THEN
+                        BEGIN
+                            PERFORM create_trade_partition(part_name, day_start, day_start + INTERVAL '1 day');
+                            created := created + 1;
+                        EXCEPTION WHEN invalid_object_definition THEN
+                            NULL;  -- already covered by a wider partition
+                        END;
+                    END IF;
+                    day_start := day_start + INTERVAL '1 day';
+                END LOOP;
+            END;
+        END IF;
+        bucket := bucket_end;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Drop every trades partition whose upper bound is at or before cutoff, together
+-- with the default partition's rows and the trade_ids entries older than the
+-- newest dropped bound. Dropping a partition is a catalog operation, independent
+-- of its row count. Returns the number of partitions dropped.
+CREATE OR REPLACE FUNCTION drop_trade_partitions_before(cutoff TIMESTAMP)
+RETURNS INTEGER AS $$
+DECLARE
+    part RECORD;
+    dropped INTEGER := 0;
+    dropped_until TIMESTAMP;
+BEGIN
+    FOR part IN
+        SELECT c.oid::regclass AS name,
+               substring(pg_get_expr(c.relpartbound, c.oid) FROM 'TO \(''([^'']+)''\)')::timestamp AS upper_bound
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'trades'::regclass
+    LOOP
+        -- The default partition has no bounds and is never dropped
+        IF part.upper_bound IS NOT NULL AND part.upper_bound <= cutoff THEN
+            EXECUTE format('DROP TABLE %s', part.name);
+            dropped := dropped + 1;
+            dropped_until := GREATEST(dropped_until, part.upper_bound);
+        END IF;
+    END LOOP;
+    IF dropped_until IS NOT NULL THEN
+        IF to_regclass('trades_default') IS NOT NULL THEN
+            EXECUTE 'DELETE FROM trades_default WHERE timestamp < $1' USING dropped_until;
+        END IF;
+        IF to_regclass('trade_ids') IS NOT NULL THEN
+            EXECUTE 'DELETE FROM trade_ids WHERE timestamp < $1' USING dropped_until;
+        END IF;
+    END IF;
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TABLE IF NOT EXISTS trades_default PARTITION OF trades DEFAULT;
+
+CREATE TABLE IF NOT EXISTS trade_ids (
+    id VARCHAR(255) PRIMARY KEY,
+    timestamp TIMESTAMP NOT NULL
+);
+
+INSERT INTO trade_ids (id, timestamp)
+SELECT DISTINCT ON (id) id, timestamp
+FROM trades
+ORDER BY id, timestamp
+ON CONFLICT (id) DO NOTHING;
+
+CREATE INDEX IF NOT EXISTS idx_trade_ids_timestamp ON trade_ids(timestamp);
@@ -41,9 +41,9 @@ CREATE INDEX idx_whales_win_rate ON whales(win_rate DESC);
 CREATE INDEX idx_whales_tracked ON whales(is_tracked) WHERE is_tracked = TRUE;
 CREATE INDEX idx_whales_last_trade ON whales(last_trade_at DESC);
 
--- Trades table
+-- Trades table, range-partitioned by timestamp (see ensure_trade_partitions below)
 CREATE TABLE IF NOT EXISTS trades (
-    id VARCHAR(255) PRIMARY KEY,
+    id VARCHAR(255) NOT NULL,
     trader_address VARCHAR(66) NOT NULL,
     market_id VARCHAR(255) NOT NULL,
     market_name TEXT,
@@ -53,8 +53,9 @@ CREATE TABLE IF NOT EXISTS trades (
     timestamp TIMESTAMP NOT NULL,
     transaction_hash VARCHAR(255),
     metadata JSONB DEFAULT '{}'::jsonb,
-    created_at TIMESTAMP DEFAULT NOW()
-);
+    created_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
 
 CREATE INDEX idx_trades_trader ON trades(trader_address);
 CREATE INDEX idx_trades_market ON trades(market_id);
@@ -62,6 +63,159 @@ CREATE INDEX idx_trades_timestamp ON trades(timestamp DESC);
 CREATE INDEX idx_trades_size ON trades(size DESC);
 CREATE INDEX idx_trades_created ON trades(created_at DESC);
 
+-- Create one trades partition for [lo, hi). Rows of that range that landed in
+-- trades_default (written before the partition existed) are moved into it, since
+-- Postgres refuses to create a partition whose range the default partition holds.
+CREATE OR REPLACE FUNCTION create_trade_partition(part_name TEXT, lo TIMESTAMP, hi TIMESTAMP)
+RETURNS VOID AS $$
+DECLARE
+    stray BOOLEAN := FALSE;
+BEGIN
+    IF to_regclass('trades_default') IS NOT NULL THEN
+        EXECUTE 'SELECT EXISTS (SELECT 1 FROM trades_default WHERE timestamp >= $1 AND timestamp < $2)'
+            INTO stray USING lo, hi;
+    END IF;
+    IF stray THEN
+        EXECUTE 'CREATE TEMP TABLE IF NOT EXISTS trades_stray (LIKE trades) ON COMMIT DROP';
+        EXECUTE 'WITH moved AS (DELETE FROM trades_default WHERE timestamp >= $1 AND timestamp < $2 RETURNING *)
+                 INSERT INTO trades_stray SELECT * FROM moved' USING lo, hi;
+    END IF;
+    EXECUTE format('CREATE TABLE %I PARTITION OF trades FOR VALUES FROM (%L) TO (%L)', part_name, lo, hi);
+    IF stray THEN
+        EXECUTE 'INSERT INTO trades SELECT * FROM trades_stray';
+        EXECUTE 'TRUNCATE trades_stray';
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create (or fill gaps of) trades partitions covering [from_ts, to_ts).
+-- step is 'day' or 'week'. Partitions are named trades_dYYYYMMDD / trades_wYYYYMMDD
+-- after their lower bound. A week that overlaps existing daily partitions is filled
+-- day by day instead, so switching the interval never leaves a hole.
+-- Returns the number of partitions created.
+CREATE OR REPLACE FUNCTION ensure_trade_partitions(from_ts TIMESTAMP, to_ts TIMESTAMP, step TEXT DEFAULT 'day')
+RETURNS INTEGER AS $$
+DECLARE
+    bucket TIMESTAMP;
+    bucket_end TIMESTAMP;
+    day_start TIMESTAMP;
+    part_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    IF step NOT IN ('day', 'week') THEN
+        RAISE EXCEPTION 'unsupported partition step: %', step;
+    END IF;
+    bucket := date_trunc(step, from_ts);
+    WHILE bucket < to_ts LOOP
+        bucket_end := bucket + ('1 ' || step)::interval;
+        part_name := 'trades_' || left(step, 1) || to_char(bucket, 'YYYYMMDD');
+        IF to_regclass(part_name) IS NULL THEN
+            BEGIN
+                PERFORM create_trade_partition(part_name, bucket, bucket_end);
+                created := created + 1;
+            EXCEPTION WHEN invalid_object_definition THEN
+                -- Overlaps partitions of another interval: fill the gaps day by day
+                day_start := bucket;
+                WHILE day_start < bucket_end LOOP
+                    part_name := 'trades_d' || to_char(day_start, 'YYYYMMDD');
+                    IF to_regclass(part_name) IS NULL THEN
+                        BEGIN
+                            PERFORM create_trade_partition(part_name, day_start, day_start + INTERVAL '1 day');
+                            created := created + 1;
+                        EXCEPTION WHEN invalid_object_definition THEN
+                            NULL;  -- already covered by a wider partition
+                        END;
+                    END IF;
+                    day_start := day_start + INTERVAL '1 day';
+                END LOOP;
+            END;
+        END IF;
+        bucket := bucket_end;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Drop every trades partition whose upper bound is at or before cutoff, together
+-- with the default partition's rows and the trade_ids entries older than the
+-- newest dropped bound. Dropping a partition is a catalog operation, independent
+-- of its row count. Returns the number of partitions dropped.
+CREATE OR REPLACE FUNCTION drop_trade_partitions_before(cutoff TIMESTAMP)
+RETURNS INTEGER AS $$
+DECLARE
+    part RECORD;
+    dropped INTEGER := 0;
+    dropped_until TIMESTAMP;
+BEGIN
+    FOR part IN
+        SELECT c.oid::regclass AS name,
+               substring(pg_get_expr(c.relpartbound, c.oid) FROM 'TO \(''([^'']+)''\)')::timestamp AS upper_bound
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'trades'::regclass
+    LOOP
+        -- The default partition has no bounds and is never dropped
+        IF part.upper_bound IS NOT NULL AND part.upper_bound <= cutoff THEN
+            EXECUTE format('DROP TABLE %s', part.name);
+            dropped := dropped + 1;
+            dropped_until := GREATEST(dropped_until, part.upper_bound);
+        END IF;
+    END LOOP;
+    IF dropped_until IS NOT NULL THEN
+        IF to_regclass('trades_default') IS NOT NULL THEN
+            EXECUTE 'DELETE FROM trades_default WHERE timestamp < $1' USING dropped_until;
+        END IF;
+        IF to_regclass('trade_ids') IS NOT NULL THEN
+            EXECUTE 'DELETE FROM trade_ids WHERE timestamp < $1' USING dropped_until;
+        END IF;
+    END IF;
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Catch-all for rows whose timestamp has no partition yet (moved out by create_trade_partition)
+CREATE TABLE IF NOT EXISTS trades_default PARTITION OF trades DEFAULT;
+
+-- Initial partitions: 30 days back (for backfills) to a week ahead; the bot keeps extending them
+SELECT ensure_trade_partitions(
+    (NOW() AT TIME ZONE 'UTC') - INTERVAL '30 days',
+    (NOW() AT TIME ZONE 'UTC') + INTERVAL '7 days',
+    'day'
+);
+
+-- One row per trade id: the (id, timestamp) primary key alone would accept an id twice
+-- with different timestamps. Inserts claim the id here first (see trade_merge_ctes).
+CREATE TABLE IF NOT EXISTS trade_ids (
+    id VARCHAR(255) PRIMARY KEY,
+    timestamp TIMESTAMP NOT NULL
+);
+
+CREATE INDEX idx_trade_ids_timestamp ON trade_ids(timestamp);
+
+-- Hourly whale rollup (trades >= WHALE_THRESHOLD), summed for /top windows
+CREATE TABLE IF NOT EXISTS whale_hourly_stats (
+    hour TIMESTAMP NOT NULL,
+    trader_address VARCHAR(66) NOT NULL,
+    total_volume DECIMAL(20, 2) NOT NULL DEFAULT 0,
+    trade_count INTEGER NOT NULL DEFAULT 0,
+    largest_trade DECIMAL(20, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (hour, trader_address)
+);
+
+-- Hourly whale activity per (market, side), summed for /markets and smart-money flow
+CREATE TABLE IF NOT EXISTS market_hourly_stats (
+    hour TIMESTAMP NOT NULL,
+    market_id VARCHAR(255) NOT NULL,
+    side VARCHAR(10) NOT NULL DEFAULT '',
+    whale_trades INTEGER NOT NULL DEFAULT 0,
+    whale_volume DECIMAL(20, 2) NOT NULL DEFAULT 0,
+    last_trade_at TIMESTAMP,
+    market_name TEXT,
+    market_slug TEXT,
+    event_slug TEXT,
+    PRIMARY KEY (hour, market_id, side)
+);
+
 -- Markets table
 CREATE TABLE IF NOT EXISTS markets (
     market_id VARCHAR(255) PRIMARY KEY,
@@ -110,7 +264,7 @@ CREATE INDEX idx_tracked_whale ON tracked_whales(whale_address);
 CREATE TABLE IF NOT EXISTS notifications (
     id SERIAL PRIMARY KEY,
     user_id BIGINT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
-    trade_id VARCHAR(255) REFERENCES trades(id),
+    trade_id VARCHAR(255),
     notification_type VARCHAR(50) NOT NULL,
     sent_at TIMESTAMP DEFAULT NOW(),
     success BOOLEAN DEFAULT TRUE
@@ -120,6 +274,40 @@ CREATE INDEX idx_notifications_user ON notifications(user_id);
 CREATE INDEX idx_notifications_sent ON notifications(sent_at DESC);
 CREATE INDEX idx_notifications_trade ON notifications(trade_id);
 
+-- Alerts held back during users' quiet hours, delivered as a digest at deliver_at
+CREATE TABLE IF NOT EXISTS deferred_alerts (
+    id BIGSERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    trade_id VARCHAR(255),
+    notification_type VARCHAR(50) NOT NULL,
+    summary TEXT NOT NULL,
+    deliver_at TIMESTAMP NOT NULL,
+    claimed_until TIMESTAMP,  -- set while an instance is sending the digest
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX idx_deferred_alerts_user_deliver ON deferred_alerts(user_id, deliver_at);
+
+-- Resumable backfill checkpoints (scripts/backfill_trades.py --pipeline)
+CREATE TABLE IF NOT EXISTS backfill_state (
+    run_id VARCHAR(100) NOT NULL,
+    slice_key VARCHAR(100) NOT NULL,
+    slice_start TIMESTAMP,
+    slice_end TIMESTAMP,
+    position TEXT,
+    done BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (run_id, slice_key)
+);
+
+-- Applied migrations (database/migrations, see scripts/migrate.py); this schema already includes them
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(255) PRIMARY KEY,
+    applied_at TIMESTAMP DEFAULT NOW()
+);
+
+INSERT INTO schema_migrations (version) VALUES ('001_partition_trades'), ('003_trade_id_guard') ON CONFLICT DO NOTHING;
+
 -- Create a function to update last_active timestamp
 CREATE OR REPLACE FUNCTION update_last_active()
 RETURNS TRIGGER AS $$
@@ -175,7 +363,7 @@ ORDER BY whale_volume_24h DESC NULLS LAST;
 
 COMMENT ON TABLE users IS 'Telegram bot users';
 COMMENT ON TABLE whales IS 'Tracked whale traders';
-COMMENT ON TABLE trades IS 'All trades from Polymarket';
+COMMENT ON TABLE trades IS 'All trades from Polymarket (range-partitioned by timestamp)';
 COMMENT ON TABLE markets IS 'Polymarket markets';
 COMMENT ON TABLE alerts IS 'User alert configurations';
 COMMENT ON TABLE tracked_whales IS 'User-whale tracking relationships';
@@ -14,10 +14,16 @@ from config.settings import settings
 from bot.handlers import (
     start, help_command, whales, markets, whale_profile,
     top, track, untrack, mywhales, settings as settings_handler,
-    alerts, threshold, about
+    alerts, threshold, quiet, about
 )
 from bot.services.whale_tracker import WhaleTracker
 from bot.services.broadcast_service import BroadcastService
+from bot.services.alert_dispatcher import AlertDispatcher
+from bot.services.deferred_delivery import DeferredDeliveryQueue
+from bot.services.partition_maintenance import PartitionMaintainer
+from bot.services.send_queue import MessageScheduler
+from bot.services.polymarket_api import PolymarketAPI
+from bot.services.redis_backend import RedisCache, RedisLock, RedisSeenTrades, create_redis_backend
 
 # Use asyncpg Postgres (Neon) database
 from bot.services.database import Database
@@ -84,10 +90,73 @@ async def post_init(application: Application) -> None:
         logger.error(f"✗ Database connection failed: {e}")
         sys.exit(1)
 
+    try:
+        await db.ensure_rollup_tables()
+    except Exception as e:
+        logger.error(f"✗ Failed to create rollup tables: {e}")
+        sys.exit(1)
+
+    # Reads come from the rollups, so fill them from existing trades the first time round
+    try:
+        if await db.rollup_needs_rebuild("whale_hourly_stats"):
+            logger.info("Building whale_hourly_stats from existing trades...")
+            rows = await db.rebuild_whale_rollup()
+            logger.info(f"✓ whale_hourly_stats built ({rows} rows)")
+        if await db.rollup_needs_rebuild("market_hourly_stats"):
+            logger.info("Building market_hourly_stats from existing trades...")
+            rows = await db.rebuild_market_rollup()
+            logger.info(f"✓ market_hourly_stats built ({rows} rows)")
+    except Exception as e:
+        logger.error(f"✗ Failed to build rollups, run scripts/rebuild_rollups.py: {e}")
+
+    # Future trades partitions and retention (no-op until trades is partitioned)
+    partition_maintainer = PartitionMaintainer(db)
+    application.bot_data["partition_maintainer"] = partition_maintainer
+    application.create_task(partition_maintainer.start())
+
+    # Optional Redis coordination between bot instances
+    redis_backend = await create_redis_backend()
+    if redis_backend:
+        application.bot_data["redis"] = redis_backend
+        db.shared_cache = RedisCache(redis_backend)
+        logger.info("✓ Redis shared cache enabled")
+
+    # Shared Polymarket client (pooled keep-alive connections) for tracker and handlers
+    api = PolymarketAPI()
+    application.bot_data["polymarket_api"] = api
+
+    # Rate-limited, prioritized outbound message queue shared by alerts and broadcasts
+    sender = MessageScheduler(application.bot, db)
+    application.bot_data["message_scheduler"] = sender
+    application.create_task(sender.start())
+
+    # Quiet-hours queue: alerts held overnight go out as one digest per user
+    deferred_queue = DeferredDeliveryQueue(db, sender)
+    try:
+        await db.ensure_deferred_alerts_table()
+        await deferred_queue.load()
+        application.bot_data["deferred_queue"] = deferred_queue
+        application.create_task(deferred_queue.start())
+    except Exception as e:
+        logger.error(f"✗ Deferred delivery unavailable, quiet hours disabled: {e}")
+        deferred_queue = None
+
+    # Initialize alert dispatcher (subscriber index for tracked-whale / threshold alerts)
+    alert_dispatcher = AlertDispatcher(db, sender, deferred=deferred_queue)
+    application.bot_data["alert_dispatcher"] = alert_dispatcher
+    application.create_task(alert_dispatcher.start())
+
     # Initialize whale tracker
     try:
-        whale_tracker = WhaleTracker(db)
+        whale_tracker = WhaleTracker(db, api=api)
+        whale_tracker.alert_dispatcher = alert_dispatcher
+        if redis_backend:
+            # Only one instance polls; the rest stand by and share its dedup state
+            whale_tracker.leader_lock = RedisLock(redis_backend, "poller")
+            whale_tracker.shared_seen = RedisSeenTrades(redis_backend)
         application.bot_data["whale_tracker"] = whale_tracker
+        # Recent trades filled by the poll loop; handlers read it instead of re-fetching
+        application.bot_data["trade_window"] = whale_tracker.trade_window
         # Start whale tracker background loop
         application.create_task(whale_tracker.start())
         logger.info("✓ Whale tracker initialized and started")
@@ -96,7 +165,9 @@ async def post_init(application: Application) -> None:
         sys.exit(1)
     # Initialize broadcast service
     try:
-        broadcast = BroadcastService(db, application.bot)
+        broadcast = BroadcastService(db, application.bot, sender=sender)
+        # The tracker hands each interval's largest trades over directly (no DB query per tick)
+        whale_tracker.broadcast_feed = broadcast.feed
         application.bot_data["broadcast_service"] = broadcast
         application.create_task(broadcast.start(application))
         logger.info("\u2713 Broadcast service initialized and started")
@@ -123,15 +194,39 @@ async def post_shutdown(application: Application) -> None:
 
     logger.info("Shutting down PolyWhale bot...")
 
+    if "alert_dispatcher" in application.bot_data:
+        await application.bot_data["alert_dispatcher"].stop()
+
+    if "partition_maintainer" in application.bot_data:
+        await application.bot_data["partition_maintainer"].stop()
+
+    if "deferred_queue" in application.bot_data:
+        await application.bot_data["deferred_queue"].stop()
+
+    if "message_scheduler" in application.bot_data:
+        await application.bot_data["message_scheduler"].stop()
+
     # Stop whale tracker
     if "whale_tracker" in application.bot_data:
         whale_tracker = application.bot_data["whale_tracker"]
         await whale_tracker.stop()
         logger.info("\u2713 Whale tracker stopped")
 
+    # Close shared Polymarket client
+    if "polymarket_api" in application.bot_data:
+        api = application.bot_data["polymarket_api"]
+        logger.info(f"Polymarket API cache stats: {api.cache.stats()}")
+        await api.close()
+        logger.info("✓ Polymarket client closed")
+
+    # Close Redis connection
+    if "redis" in application.bot_data:
+        await application.bot_data["redis"].close()
+
     # Close database connection
     if "db" in application.bot_data:
         db = application.bot_data["db"]
+        logger.info(f"Database query cache stats: {db.cache.stats()}")
         await db.close()
         logger.info("✓ Database connection closed")
 
@@ -176,6 +271,7 @@ def main():
     application.add_handler(CommandHandler("settings", settings_handler.handle))
     application.add_handler(CommandHandler("alerts", alerts.handle))
     application.add_handler(CommandHandler("threshold", threshold.handle))
+    application.add_handler(CommandHandler("quiet", quiet.handle))
 
     # Register message handlers (for non-command messages)
     # application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
@@ -7,11 +7,20 @@ Usage examples:
 
   # Backfill last 30 days with a hard cap on pages
   python scripts/backfill_trades.py --days 30 --max-pages 500 --limit 200
+
+  # Bulk mode: COPY into a staging table, merge per chunk, recompute whale stats once
+  python scripts/backfill_trades.py --days 30 --bulk --chunk-size 10000
+
+  # Pipelined: concurrent page fetches, parse and COPY as separate stages, checkpointed
+  python scripts/backfill_trades.py --days 30 --pipeline --concurrency 4
+
+  # Continue an interrupted pipelined run where it stopped
+  python scripts/backfill_trades.py --days 30 --pipeline --resume
 """
 import argparse
 import asyncio
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import List, Optional
 
 import os
 import sys
@@ -19,243 +28,91 @@ import sys
 ROOT = os.path.dirname(os.path.dirname(__file__))
 sys.path.insert(0, ROOT)
 
-import aiohttp
 from loguru import logger
 
 from config.settings import settings
 from bot.models import Trade
+from bot.services.backfill_pipeline import BackfillPipeline
 from bot.services.database import Database
-
-DATA_API_BASE = settings.POLYMARKET_DATA_API.rstrip("/")
+from bot.services.polymarket_api import PolymarketAPI
+from bot.services.trade_pagination import TradePaginator, oldest_item_timestamp
+from bot.services.trade_parser import parse_trade_page, promote
 
 
-def parse_iso(dt: str) -> datetime:
-    try:
-        return datetime.fromisoformat(dt.replace("Z", "+00:00"))
-    except Exception:
-        return datetime.now(timezone.utc)
-
-
-def parse_trade_item(item: Dict[str, Any]) -> Optional[Trade]:
-    """Parse a Polymarket trade item into our Trade model.
-    Returns None if parsing fails.
-    """
-    try:
-        ts = item.get("timestamp")
-        if isinstance(ts, int):
-            # Convert to UTC then make naive (UTC)
-            ts_dt = datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None)
-        elif isinstance(ts, str):
-            # Parse as aware then convert to naive UTC
-            aware = parse_iso(ts)
-            if aware.tzinfo is not None:
-                ts_dt = aware.astimezone(timezone.utc).replace(tzinfo=None)
-            else:
-                ts_dt = aware
-        else:
-            ts_dt = datetime.utcnow()
-
-        size = float(item.get("size", 0) or 0)
-        price = float(item.get("price", 0) or 0)
-        value_usd = size * price
-
-        trade = Trade(
-            id=item.get("transactionHash", item.get("transaction_hash", "")),
-            trader_address=item.get("proxyWallet", item.get("trader_address", "")),
-            trader_name=item.get("name", None),
-            trader_pseudonym=item.get("pseudonym", None),
-            market_id=item.get("conditionId", item.get("asset", "")),
-            market_name=item.get("title", item.get("market", "Unknown Market")),
-            market_slug=item.get("slug", None),
-            event_slug=item.get("eventSlug", None),
-            outcome=item.get("outcome", None),
-            side=item.get("side", "BUY"),
-            size=value_usd,
-            price=price,
-            timestamp=ts_dt,
-            transaction_hash=item.get("transactionHash", item.get("transaction_hash", "")),
-        )
-        return trade
-    except Exception as e:
-        logger.warning(f"Failed to parse trade item: {e}")
-        return None
-
-
-async def fetch_trades_page(
-    session: aiohttp.ClientSession,
-    limit: int = 200,
-    before_iso: Optional[str] = None,
-    offset: Optional[int] = None,
-    cursor: Optional[str] = None,
-) -> Tuple[List[Dict[str, Any]], Optional[str]]:
-    """Fetch one page from the Polymarket trades endpoint.
-
-    Returns (items, next_cursor). Items are raw dicts from the API.
-    """
-    params: Dict[str, str] = {"limit": str(limit)}
-    if before_iso:
-        params["before"] = before_iso
-    if offset is not None:
-        params["offset"] = str(offset)
-    if cursor:
-        params["cursor"] = cursor
-
-    url = f"{DATA_API_BASE}/trades"
-    async with session.get(url, params=params, timeout=30) as resp:
-        if resp.status != 200:
-            text = await resp.text()
-            logger.error(f"GET {url} {params} -> {resp.status} {text[:200]}")
-            return [], None
-        data = await resp.json()
-
-    # Many variants: list of trades OR dict with data + next/ cursor
-    items: List[Dict[str, Any]]
-    next_cursor: Optional[str] = None
-
-    if isinstance(data, list):
-        items = data
-    elif isinstance(data, dict):
-        if isinstance(data.get("data"), list):
-            items = data.get("data", [])
-        elif isinstance(data.get("trades"), list):
-            items = data.get("trades", [])
-        else:
-            # best effort: try to find a list value
-            items = []
-            for v in data.values():
-                if isinstance(v, list):
-                    items = v
-                    break
-        next_cursor = (
-            data.get("next")
-            or data.get("cursor")
-            or data.get("nextCursor")
-            or data.get("next_page_token")
-        )
-    else:
-        items = []
-
-    return items, next_cursor
-
-
-async def backfill(days: int, limit: int, max_pages: int) -> None:
+async def backfill(days: int, limit: int, max_pages: int, bulk: bool = False, chunk_size: int = 5000) -> None:
     cutoff = datetime.utcnow() - timedelta(days=days)  # naive UTC to match DB TIMESTAMP
     logger.info(
         f"Starting backfill for last {days}d (cutoff {cutoff.isoformat()}) with limit={limit}, max_pages={max_pages}"
+        + (f", bulk chunks of {chunk_size}" if bulk else "")
     )
 
     db = Database()
     await db.connect()
+    if await db.trades_partitioned():
+        # Historical days may predate the partitions the bot keeps ahead of time
+        created = await db.ensure_trade_partitions(cutoff, datetime.utcnow() + timedelta(days=1))
+        if created:
+            logger.info(f"Created {created} trades partitions for the backfill window")
 
     total_seen = 0
     total_saved = 0
     total_whale = 0
-
-    strategy = "auto"  # will become one of: cursor | before | offset
-    cursor: Optional[str] = None
-    before_iso: Optional[str] = None
-    offset: int = 0
-
-    async with aiohttp.ClientSession() as session:
-        prev_oldest: Optional[datetime] = None
+    pending: List[Trade] = []
+
+    async def flush_pending() -> int:
+        """Merge the buffered trades in one chunk; returns how many were new"""
+        if not pending:
+            return 0
+        chunk = pending[:]
+        pending.clear()
+        try:
+            return await db.bulk_load_trades(chunk)
+        except Exception as e:
+            logger.warning(f"Failed to load chunk of {len(chunk)} trades: {e}")
+            return 0
+
+    paginator = TradePaginator(limit=limit)
+
+    # Same pooled client (keep-alive, DNS cache, timeouts) the bot uses
+    async with PolymarketAPI() as api:
         for page in range(1, max_pages + 1):
-            items, next_cursor = await fetch_trades_page(
-                session, limit=limit, before_iso=before_iso, offset=(offset if strategy == "offset" else None), cursor=cursor
-            )
+            try:
+                items, next_cursor = await api.fetch_trades_page(paginator.params())
+            except Exception as e:
+                logger.error(f"Failed to fetch page {page}: {e}")
+                break
             if not items:
                 logger.info("No items returned; stopping backfill.")
                 break
 
-            # Detect and lock in strategy if auto
-            if strategy == "auto":
-                if next_cursor:
-                    strategy = "cursor"
-                    cursor = next_cursor
-                    logger.info("Pagination strategy: cursor")
-                else:
-                    # Estimate using timestamps
-                    timestamps = []
-                    for it in items:
-                        ts = it.get("timestamp")
-                        if isinstance(ts, int):
-                            timestamps.append(datetime.fromtimestamp(ts, tz=timezone.utc))
-                        elif isinstance(ts, str):
-                            timestamps.append(parse_iso(ts))
-                    if timestamps:
-                        oldest = min(timestamps)
-                        before_iso = (oldest - timedelta(seconds=1)).isoformat()
-                        strategy = "before"
-                        prev_oldest = oldest
-                        logger.info("Pagination strategy: before=<iso>")
-                    else:
-                        strategy = "offset"
-                        offset += limit
-                        logger.info("Pagination strategy: offset")
-            else:
-                # Advance according to chosen strategy
-                if strategy == "cursor":
-                    cursor = next_cursor
-                    if not cursor:
-                        logger.info("Cursor exhausted; stopping.")
-                        break
-                elif strategy == "before":
-                    # compute next before from this page
-                    timestamps = []
-                    for it in items:
-                        ts = it.get("timestamp")
-                        if isinstance(ts, int):
-                            timestamps.append(datetime.fromtimestamp(ts, tz=timezone.utc))
-                        elif isinstance(ts, str):
-                            timestamps.append(parse_iso(ts))
-                    if timestamps:
-                        oldest = min(timestamps)
-                        # If not getting older, fallback to offset
-                        if prev_oldest and oldest >= prev_oldest:
-                            logger.warning("'before' did not yield older data; switching to offset")
-                            strategy = "offset"
-                            offset += limit
-                        else:
-                            prev_oldest = oldest
-                            before_iso = (oldest - timedelta(seconds=1)).isoformat()
-                    else:
-                        logger.warning("No timestamps found; switching to offset")
-                        strategy = "offset"
-                        offset += limit
-                elif strategy == "offset":
-                    offset += limit
-
-            # Parse and store
+            # Detect/lock in the pagination strategy and move to the next page
+            first_page = paginator.strategy == "auto"
+            has_more = paginator.advance(items, next_cursor)
+            if first_page:
+                logger.info(f"Pagination strategy: {paginator.strategy}")
+
+            # Parse only whale-sized items; promote the in-window ones to Trades
+            total_seen += len(items)
+            records = parse_trade_page(items, min_size=settings.WHALE_THRESHOLD)
+            whales = promote(r for r in records if r.timestamp >= cutoff)
+            page_whale = len(whales)
             page_saved = 0
-            page_whale = 0
-            page_earliest: Optional[datetime] = None
-
-            for item in items:
-                trade = parse_trade_item(item)
-                if not trade:
-                    continue
-                total_seen += 1
-
-                # Track earliest ts in this page
-                if not page_earliest or trade.timestamp < page_earliest:
-                    page_earliest = trade.timestamp
-
-                # Stop after we crossed the cutoff substantially
-                if trade.timestamp < cutoff:
-                    continue  # older than our window; we still check rest of items
-
-                # Filter to whales
-                if trade.size < settings.WHALE_THRESHOLD:
-                    continue
-                page_whale += 1
-
-                # Save
-                try:
-                    await db.save_trade(trade)
-                    await db.update_whale_stats(trade.trader_address)
-                    page_saved += 1
-                except Exception as e:
-                    logger.warning(f"Failed to save trade {trade.id[:10]}...: {e}")
+            oldest = oldest_item_timestamp(items)
+            page_earliest = oldest.astimezone(timezone.utc).replace(tzinfo=None) if oldest else None
 
+            if bulk:
+                pending.extend(whales)
+            else:
+                for trade in whales:
+                    try:
+                        await db.save_trade(trade)
+                        await db.update_whale_stats(trade.trader_address)
+                        page_saved += 1
+                    except Exception as e:
+                        logger.warning(f"Failed to save trade {trade.id[:10]}...: {e}")
+
+            if bulk and len(pending) >= chunk_size:
+                page_saved = await flush_pending()
             total_saved += page_saved
             total_whale += page_whale
 
@@ -264,21 +121,69 @@ async def backfill(days: int, limit: int, max_pages: int) -> None:
             )
 
             # Stop if earliest trade in the page is older than cutoff and we're not on cursor strategy
-            if page_earliest and page_earliest < cutoff and strategy in ("before", "offset"):
+            if page_earliest and page_earliest < cutoff and paginator.strategy in ("before", "offset"):
                 logger.info("Reached cutoff; stopping backfill.")
                 break
+            if not has_more:
+                logger.info("Cursor exhausted; stopping.")
+                break
 
             # Modest rate limit to be polite
             await asyncio.sleep(max(1.0 / max(settings.API_RATE_LIMIT, 1), 0.2))
 
+    if bulk:
+        total_saved += await flush_pending()
+        # One set-based recompute instead of a per-trade update
+        updated = await db.reconcile_whale_stats()
+        logger.info(f"Whale stats recomputed: {updated} whales updated")
+
     await db.close()
     logger.info(
         f"Backfill complete: seen={total_seen}, whales={total_whale}, saved={total_saved} (days={days})"
     )
 
 
+async def backfill_pipelined(days: int, limit: int, max_pages: int, chunk_size: int, concurrency: int,
+                             run_id: Optional[str] = None, resume: bool = False,
+                             rate: Optional[float] = None) -> None:
+    cutoff = datetime.utcnow() - timedelta(days=days)  # naive UTC to match DB TIMESTAMP
+    run_id = run_id or f"backfill-{days}d"
+    logger.info(
+        f"Starting pipelined backfill {run_id} for last {days}d (cutoff {cutoff.isoformat()}) "
+        f"with limit={limit}, concurrency={concurrency}, max_pages={max_pages}"
+    )
+
+    db = Database()
+    await db.connect()
+    try:
+        if await db.trades_partitioned():
+            created = await db.ensure_trade_partitions(cutoff, datetime.utcnow() + timedelta(days=1))
+            if created:
+                logger.info(f"Created {created} trades partitions for the backfill window")
+
+        async with PolymarketAPI() as api:
+            pipeline = BackfillPipeline(
+                db, api, cutoff, run_id,
+                limit=limit, concurrency=concurrency, chunk_size=chunk_size,
+                max_pages=max_pages, rate=rate, resume=resume,
+            )
+            stats = await pipeline.run()
+    finally:
+        await db.close()
+    logger.info(
+        f"Backfill complete: pages={stats['pages']}, seen={stats['seen']}, whales={stats['whales']}, "
+        f"saved={stats['saved']}, failed slices={stats['failed']} (days={days})"
+    )
+
+
 async def amain(args: argparse.Namespace) -> None:
-    await backfill(days=args.days, limit=args.limit, max_pages=args.max_pages)
+    if args.pipeline:
+        await backfill_pipelined(days=args.days, limit=args.limit, max_pages=args.max_pages,
+                                 chunk_size=args.chunk_size, concurrency=args.concurrency,
+                                 run_id=args.run_id, resume=args.resume, rate=args.rate)
+        return
+    await backfill(days=args.days, limit=args.limit, max_pages=args.max_pages,
+                   bulk=args.bulk, chunk_size=args.chunk_size)
 
 
 def main():
@@ -286,6 +191,14 @@ def main():
     parser.add_argument("--days", type=int, default=30, help="Days of history to backfill")
     parser.add_argument("--limit", type=int, default=200, help="Trades per page to request")
     parser.add_argument("--max-pages", type=int, default=1000, help="Max pages to fetch")
+    parser.add_argument("--bulk", action="store_true", help="COPY + set-based merge per chunk")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Trades per bulk chunk")
+    parser.add_argument("--pipeline", action="store_true", help="Concurrent fetch/parse/write stages, checkpointed")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent page fetches (--pipeline)")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Requests per second across all fetchers (default BACKFILL_RATE_LIMIT)")
+    parser.add_argument("--run-id", default=None, help="Checkpoint name (default backfill-<days>d)")
+    parser.add_argument("--resume", action="store_true", help="Continue the run's checkpoints instead of restarting")
     args = parser.parse_args()
 
     logger.remove()
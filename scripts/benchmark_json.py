@@ -0,0 +1,128 @@
+"""
+Micro-benchmark the JSON decoders used for Polymarket responses.
+
+Times each installed decoder (stdlib json, orjson) and the streaming array
+decoder on a /trades page, either synthetic or fetched live, and reports the
+median time per page and throughput.
+
+Usage examples:
+  # Synthetic page of 1000 trades
+  python scripts/benchmark_json.py
+
+  # A real page from the data API, more iterations
+  python scripts/benchmark_json.py --live --limit 1000 --repeat 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import Callable, List
+
+import os
+import sys
+# Ensure project root is on sys.path when running from scripts/
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from loguru import logger
+
+from config.settings import settings
+from bot.utils.json_codec import DECODERS, JsonArrayStreamDecoder
+
+
+def synthetic_page(trades: int) -> bytes:
+    """A /trades response body shaped like the data API's"""
+    now = int(time.time())
+    items = [
+        {
+            "proxyWallet": "0x" + "%040x" % random.getrandbits(160),
+            "side": random.choice(["BUY", "SELL"]),
+            "asset": str(random.getrandbits(250)),
+            "conditionId": "0x" + "%064x" % random.getrandbits(256),
+            "size": round(random.uniform(1, 50_000), 2),
+            "price": round(random.uniform(0.01, 0.99), 4),
+            "timestamp": now - i,
+            "title": "Will the benchmark finish before the heat death of the universe?",
+            "slug": "will-the-benchmark-finish",
+            "icon": "https://polymarket-upload.s3.us-east-2.amazonaws.com/icon.png",
+            "eventSlug": "benchmark-event",
+            "outcome": random.choice(["Yes", "No"]),
+            "outcomeIndex": random.randint(0, 1),
+            "name": "trader%d" % random.randint(1, 5000),
+            "pseudonym": "Bench-Trader",
+            "bio": "",
+            "profileImage": "",
+            "profileImageOptimized": "",
+            "transactionHash": "0x" + "%064x" % random.getrandbits(256),
+        }
+        for i in range(trades)
+    ]
+    return json.dumps(items).encode()
+
+
+async def live_page(limit: int) -> bytes:
+    import aiohttp
+    async with aiohttp.ClientSession() as session:
+        url = f"{settings.POLYMARKET_DATA_API}/trades"
+        async with session.get(url, params={"limit": str(limit)}) as response:
+            response.raise_for_status()
+            return await response.read()
+
+
+def time_call(call: Callable[[], object], repeat: int) -> float:
+    """Median wall time of call() in milliseconds"""
+    timings: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def stream_decode(body: bytes, chunk_size: int) -> int:
+    decoder = JsonArrayStreamDecoder()
+    count = 0
+    for start in range(0, len(body), chunk_size):
+        count += len(decoder.feed(body[start:start + chunk_size]))
+    return count + len(decoder.close())
+
+
+def run(body: bytes, repeat: int, chunk_size: int) -> None:
+    megabytes = len(body) / 1_000_000
+    print(f"Page: {len(body):,} bytes, {len(json.loads(body)):,} items, {repeat} runs each\n")
+    print(f"{'decoder':<28} {'ms/page':>9} {'MB/s':>9} {'vs json':>8}")
+    cases = [(name, (lambda decode=decode: decode(body))) for name, decode in DECODERS.items()]
+    # aiohttp's response.json(): decode to str first, then stdlib json
+    cases.append(("json (text, like .json())", lambda: json.loads(body.decode("utf-8"))))
+    cases.append((f"stream ({chunk_size // 1024} KiB chunks)", lambda: stream_decode(body, chunk_size)))
+
+    baseline = None
+    for name, call in cases:
+        ms = time_call(call, repeat)
+        baseline = baseline or ms
+        print(f"{name:<28} {ms:9.3f} {megabytes / (ms / 1000):9.1f} {baseline / ms:7.2f}x")
+    if "orjson" not in DECODERS:
+        print("\norjson is not installed (pip install orjson) - only stdlib decoders were measured")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON decoding of /trades pages")
+    parser.add_argument("--trades", type=int, default=1000, help="Items in the synthetic page")
+    parser.add_argument("--live", action="store_true", help="Benchmark a live page instead")
+    parser.add_argument("--limit", type=int, default=500, help="Page size for --live")
+    parser.add_argument("--repeat", type=int, default=50, help="Runs per decoder (median is reported)")
+    parser.add_argument("--chunk-size", type=int, default=settings.JSON_STREAM_CHUNK_SIZE,
+                        help="Chunk size fed to the streaming decoder")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(lambda msg: print(msg, end=""), level=settings.LOG_LEVEL)
+
+    body = asyncio.run(live_page(args.limit)) if args.live else synthetic_page(args.trades)
+    run(body, repeat=args.repeat, chunk_size=args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Benchmark the Database query methods before and after the index migration.
+
+Builds a throwaway `bench` schema from database/schema.sql, fills it with synthetic
+trades, and prints EXPLAIN ANALYZE timings for the SQL each Database method runs,
+first with the base schema and then after applying database/migrations. The SQL
+is captured from the methods themselves, so the benchmark follows code changes.
+
+Usage examples:
+  # 500k trades over 30 days
+  DATABASE_URL=... python scripts/benchmark_queries.py
+
+  # Bigger dataset, keep the bench schema afterwards
+  python scripts/benchmark_queries.py --trades 5000000 --keep
+"""
+import argparse
+import asyncio
+import json
+import statistics
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import os
+import sys
+# Ensure project root is on sys.path when running from scripts/
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+import asyncpg
+from loguru import logger
+
+from config.settings import settings
+from bot.services.database import Database
+from bot.utils.ttl_cache import TTLCache
+from scripts.migrate import apply_migrations
+
+SCHEMA = "bench"
+READ_PREFIXES = ("SELECT", "WITH")
+
+
+class RecordingConnection:
+    """Delegates to a real connection, remembering every read query it runs"""
+
+    def __init__(self, conn: asyncpg.Connection, queries: List[Tuple[str, tuple]]):
+        self._conn = conn
+        self._queries = queries
+
+    def _record(self, query: str, args: tuple) -> None:
+        if query.lstrip().upper().startswith(READ_PREFIXES):
+            self._queries.append((query, args))
+
+    async def fetch(self, query: str, *args: Any):
+        self._record(query, args)
+        return await self._conn.fetch(query, *args)
+
+    async def fetchrow(self, query: str, *args: Any):
+        self._record(query, args)
+        return await self._conn.fetchrow(query, *args)
+
+    async def fetchval(self, query: str, *args: Any):
+        self._record(query, args)
+        return await self._conn.fetchval(query, *args)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+
+class RecordingPool:
+    """Pool wrapper handing out RecordingConnections"""
+
+    def __init__(self, pool: asyncpg.Pool):
+        self.pool = pool
+        self.queries: List[Tuple[str, tuple]] = []
+
+    def acquire(self) -> "_RecordingAcquire":
+        return _RecordingAcquire(self)
+
+
+class _RecordingAcquire:
+    def __init__(self, owner: RecordingPool):
+        self.owner = owner
+        self.conn = None
+
+    async def __aenter__(self) -> RecordingConnection:
+        self.conn = await self.owner.pool.acquire()
+        return RecordingConnection(self.conn, self.owner.queries)
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.owner.pool.release(self.conn)
+
+
+def benchmark_cases(now: datetime) -> List[Tuple[str, Callable[[Database], Awaitable[Any]]]]:
+    """(label, call) for every Database read method worth measuring"""
+    day_ago = now - timedelta(hours=24, minutes=17)  # not on the hour: exercises the raw partial hour
+    week_ago = now - timedelta(days=7)
+    month_ago = now - timedelta(days=30)
+    trader = "0x" + "0" * 39 + "1"
+    return [
+        ("get_top_whales_since(24h)", lambda db: db.get_top_whales_since(day_ago, limit=10)),
+        ("get_top_whales_since(30d)", lambda db: db.get_top_whales_since(month_ago, limit=10)),
+        ("count_whale_trades_since(7d)", lambda db: db.count_whale_trades_since(week_ago)),
+        ("get_top_markets_from_trades_since(24h)", lambda db: db.get_top_markets_from_trades_since(day_ago)),
+        ("get_market_side_volumes_since(24h)", lambda db: db.get_market_side_volumes_since(day_ago)),
+        ("get_recent_whale_trades(24h)", lambda db: db.get_recent_whale_trades(day_ago)),
+        ("get_largest_whale_trade_since(24h)", lambda db: db.get_largest_whale_trade_since(day_ago)),
+        ("get_largest_whale_trade_between(1h)",
+         lambda db: db.get_largest_whale_trade_between(now - timedelta(hours=2), now - timedelta(hours=1))),
+        ("get_trader_aggregate", lambda db: db.get_trader_aggregate(trader)),
+        ("get_recent_trade_ids", lambda db: db.get_recent_trade_ids(1000)),
+    ]
+
+
+async def build_dataset(conn: asyncpg.Connection, trades: int, days: int) -> None:
+    logger.info(f"Creating schema {SCHEMA} with {trades:,} synthetic trades over {days}d...")
+    await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}")
+    schema_sql = (Path(ROOT) / "database" / "schema.sql").read_text()
+    await conn.execute(schema_sql)
+    now = datetime.utcnow()
+    await conn.execute(
+        "SELECT ensure_trade_partitions($1, $2, $3)",
+        now - timedelta(days=days + 1), now + timedelta(days=1), settings.TRADES_PARTITION_INTERVAL,
+    )
+    # Skewed traders and markets, log-uniform sizes from $10 to ~$80k
+    await conn.execute(
+        """
+        INSERT INTO trades (id, trader_address, market_id, market_name, side, size, price, timestamp)
+        SELECT
+            'bench-' || g,
+            '0x' || lpad(to_hex((power(random(), 3) * 5000)::int), 40, '0'),
+            'market-' || (power(random(), 2) * 800)::int,
+            'Bench market',
+            CASE WHEN random() < 0.5 THEN 'BUY' ELSE 'SELL' END,
+            round((10 * exp(random() * 9))::numeric, 2),
+            round((0.01 + random() * 0.98)::numeric, 4),
+            $2::timestamp - random() * make_interval(days => $3)
+        FROM generate_series(1, $1) g
+        """,
+        trades, now, days,
+    )
+    await conn.execute("INSERT INTO trade_ids (id, timestamp) SELECT id, timestamp FROM trades")
+    await conn.execute("ANALYZE trades")
+
+
+async def explain(conn: asyncpg.Connection, query: str, args: tuple, repeat: int) -> float:
+    """Median execution time (ms) of a query over `repeat` EXPLAIN ANALYZE runs"""
+    timings = []
+    for _ in range(repeat):
+        plan = await conn.fetchval(f"EXPLAIN (ANALYZE, FORMAT JSON) {query}", *args)
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        timings.append(plan[0]["Execution Time"])
+    return statistics.median(timings)
+
+
+async def measure(pool: asyncpg.Pool, repeat: int) -> Dict[str, float]:
+    """Run every case through a recording pool and EXPLAIN ANALYZE what it executed"""
+    results: Dict[str, float] = {}
+    now = datetime.utcnow()
+    for label, call in benchmark_cases(now):
+        recorder = RecordingPool(pool)
+        db = Database()
+        db.pool = recorder
+        db.cache = TTLCache(max_entries=1)
+        await call(db)
+        total = 0.0
+        async with pool.acquire() as conn:
+            for query, args in recorder.queries:
+                total += await explain(conn, query, args, repeat)
+        results[label] = total
+        logger.info(f"  {label:<42} {total:9.2f} ms")
+    return results
+
+
+async def run(trades: int, days: int, repeat: int, keep: bool) -> None:
+    server_settings = {"search_path": f"{SCHEMA},public"}
+    pool = await asyncpg.create_pool(settings.DATABASE_URL, min_size=1, max_size=2,
+                                     server_settings=server_settings)
+    try:
+        async with pool.acquire() as conn:
+            await build_dataset(conn, trades, days)
+        db = Database()
+        db.pool = pool
+        await db.rebuild_whale_rollup()
+        await db.rebuild_market_rollup()
+
+        logger.info("Before migrations:")
+        before = await measure(pool, repeat)
+
+        async with pool.acquire() as conn:
+            applied = await apply_migrations(conn)
+        logger.info(f"Applied {', '.join(applied) or 'nothing'}; after migrations:")
+        after = await measure(pool, repeat)
+
+        print()
+        print(f"{'method':<42} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+        for label, before_ms in before.items():
+            after_ms = after[label]
+            speedup = before_ms / after_ms if after_ms > 0 else float("inf")
+            print(f"{label:<42} {before_ms:10.2f} {after_ms:10.2f} {speedup:7.1f}x")
+    finally:
+        if not keep:
+            async with pool.acquire() as conn:
+                await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN ANALYZE Database queries before/after migrations")
+    parser.add_argument("--trades", type=int, default=500_000, help="Synthetic trades to generate")
+    parser.add_argument("--days", type=int, default=30, help="Days of history to spread them over")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per query (median is reported)")
+    parser.add_argument("--keep", action="store_true", help="Keep the bench schema afterwards")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(lambda msg: print(msg, end=""), level=settings.LOG_LEVEL)
+
+    asyncio.run(run(trades=args.trades, days=args.days, repeat=args.repeat, keep=args.keep))
+
+
+if __name__ == "__main__":
+    main()
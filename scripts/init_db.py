@@ -11,6 +11,7 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config.settings import settings
+from scripts.migrate import apply_migrations
 
 
 async def init_database():
@@ -32,6 +33,9 @@ async def init_database():
         # Execute schema
         await conn.execute(schema_sql)
         logger.info("✓ Schema executed successfully")
+
+        # Migrations not folded into schema.sql (e.g. threshold-dependent indexes)
+        await apply_migrations(conn)
         
         # Verify tables
         tables = await conn.fetch("""
@@ -0,0 +1,83 @@
+"""
+Apply pending SQL migrations from database/migrations in filename order.
+
+Each migration runs in its own transaction and is recorded in schema_migrations.
+Databases created from database/schema.sql already include every migration.
+
+Usage examples:
+  # Show which migrations are pending
+  DATABASE_URL=... python scripts/migrate.py --list
+
+  # Apply them
+  python scripts/migrate.py
+"""
+import argparse
+import asyncio
+from pathlib import Path
+from typing import List
+
+import os
+import sys
+# Ensure project root is on sys.path when running from scripts/
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+import asyncpg
+from loguru import logger
+
+from config.settings import settings
+
+MIGRATIONS_DIR = Path(ROOT) / "database" / "migrations"
+
+
+def render_migration(path: Path) -> str:
+    """Migration SQL with {{SETTING}} placeholders filled from settings"""
+    return path.read_text().replace("{{WHALE_THRESHOLD}}", str(settings.WHALE_THRESHOLD))
+
+
+async def apply_migrations(conn: asyncpg.Connection, list_only: bool = False) -> List[str]:
+    """Apply (or with list_only, just report) pending migrations; returns their names"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version VARCHAR(255) PRIMARY KEY,
+            applied_at TIMESTAMP DEFAULT NOW()
+        )
+    """)
+    applied = {row["version"] for row in await conn.fetch("SELECT version FROM schema_migrations")}
+    pending = [path for path in sorted(MIGRATIONS_DIR.glob("*.sql")) if path.stem not in applied]
+
+    for path in pending:
+        if list_only:
+            logger.info(f"pending: {path.stem}")
+            continue
+        logger.info(f"Applying {path.stem}...")
+        async with conn.transaction():
+            await conn.execute(render_migration(path))
+            await conn.execute("INSERT INTO schema_migrations (version) VALUES ($1)", path.stem)
+        logger.info(f"✓ Applied {path.stem}")
+    return [path.stem for path in pending]
+
+
+async def migrate(list_only: bool = False) -> None:
+    conn = await asyncpg.connect(settings.DATABASE_URL)
+    try:
+        pending = await apply_migrations(conn, list_only=list_only)
+        if not pending:
+            logger.info("✓ Database is up to date")
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply pending database migrations")
+    parser.add_argument("--list", action="store_true", help="Only list pending migrations")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(lambda msg: print(msg, end=""), level=settings.LOG_LEVEL)
+
+    asyncio.run(migrate(list_only=args.list))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Rebuild the hourly rollup tables from raw trades.
+
+The bot keeps rollups current as it ingests trades; run this after loading trades
+by other means, after changing WHALE_THRESHOLD, or when first deploying rollups.
+
+Usage examples:
+  # Rebuild everything
+  DATABASE_URL=... python scripts/rebuild_rollups.py
+
+  # Rebuild only the last 2 days
+  python scripts/rebuild_rollups.py --days 2
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+
+import os
+import sys
+# Ensure project root is on sys.path when running from scripts/
+ROOT = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, ROOT)
+
+from loguru import logger
+
+from config.settings import settings
+from bot.services.database import Database
+
+
+async def rebuild(days: int = 0) -> None:
+    since = datetime.utcnow() - timedelta(days=days) if days > 0 else None
+
+    db = Database()
+    await db.connect()
+    try:
+        await db.ensure_rollup_tables()
+        scope = "all time" if since is None else f"last {days}d"
+        rows = await db.rebuild_whale_rollup(since)
+        logger.info(f"whale_hourly_stats rebuilt: {rows} rows ({scope})")
+        rows = await db.rebuild_market_rollup(since)
+        logger.info(f"market_hourly_stats rebuilt: {rows} rows ({scope})")
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild hourly rollup tables from trades")
+    parser.add_argument("--days", type=int, default=0, help="Only rebuild the last N days (0 = everything)")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(lambda msg: print(msg, end=""), level=settings.LOG_LEVEL)
+
+    asyncio.run(rebuild(days=args.days))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Test CompiledAlertMatcher against Alert.matches_trade on randomized alerts and trades
+"""
+import random
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.models import Alert
+from bot.services.alert_matcher import CompiledAlertMatcher
+
+WHALES = [f"0x{i:040x}" for i in range(8)]
+MARKETS = [f"market-{i}" for i in range(8)]
+CATEGORIES = ["politics", "sports", "crypto", "pop-culture"]
+SIZES = [None, 0, 1000, 5000, 10000, 25000, 50000]
+
+
+def random_alert(rng: random.Random, alert_id: int) -> Alert:
+    filters = {}
+    size = rng.choice(SIZES)
+    if size is not None:
+        filters["min_size"] = size
+    for name, pool in (("whales", WHALES), ("markets", MARKETS), ("categories", CATEGORIES)):
+        if rng.random() < 0.4:
+            filters[name] = rng.sample(pool, rng.randint(0, 3))
+    return Alert(
+        id=alert_id,
+        user_id=rng.randint(1, 50),
+        alert_type="custom",
+        filters=filters,
+        is_active=rng.random() < 0.9,
+    )
+
+
+def random_trade(rng: random.Random) -> SimpleNamespace:
+    trade = SimpleNamespace(
+        size=rng.choice([500, 999.99, 1000, 5000, 9999, 10000, 30000, 100000]),
+        trader_address=rng.choice(WHALES),
+        market_id=rng.choice(MARKETS),
+    )
+    # Trades without a category (like Trade today) and with a None category are both exercised
+    roll = rng.random()
+    if roll < 0.4:
+        trade.category = rng.choice(CATEGORIES)
+    elif roll < 0.6:
+        trade.category = None
+    return trade
+
+
+def test_matches_reference(seed: int = 7, alerts: int = 300, trades: int = 3000) -> None:
+    """Compiled matches equal the per-alert reference for every trade"""
+    rng = random.Random(seed)
+    rules = [random_alert(rng, alert_id) for alert_id in range(1, alerts + 1)]
+    matcher = CompiledAlertMatcher(rules)
+    active = [alert for alert in rules if alert.is_active]
+    batch = [random_trade(rng) for _ in range(trades)]
+
+    for trade, matched in zip(batch, matcher.match_batch(batch)):
+        expected = sorted(alert.id for alert in active if alert.matches_trade(trade))
+        assert sorted(matched) == expected, f"{trade}: got {sorted(matched)}, expected {expected}"
+    print(f"✓ {trades} trades x {alerts} alerts match Alert.matches_trade")
+
+
+def test_skips_malformed_alerts() -> None:
+    """Bad filters skip that alert only; a null min_size means the default"""
+    good = Alert(id=1, user_id=1, alert_type="custom", filters={"min_size": None})
+    bad = [
+        Alert(id=2, user_id=2, alert_type="custom", filters={"min_size": "lots"}),
+        Alert(id=3, user_id=3, alert_type="custom", filters={"whales": WHALES[0]}),
+        Alert(id=4, user_id=4, alert_type="custom", filters={"markets": [1, 2]}),
+    ]
+    matcher = CompiledAlertMatcher([good] + bad)
+    assert len(matcher) == 1
+    trade = SimpleNamespace(size=10000, trader_address=WHALES[0], market_id=MARKETS[0])
+    assert matcher.match(trade) == [1]
+    assert matcher.match(SimpleNamespace(size=9999, trader_address=WHALES[0], market_id=MARKETS[0])) == []
+    print("✓ Malformed alerts are skipped")
+
+
+def test_zero_min_size() -> None:
+    """An explicit min_size of 0 matches trades of any size"""
+    alerts = [
+        Alert(id=1, user_id=1, alert_type="custom", filters={"min_size": 0}),
+        Alert(id=2, user_id=2, alert_type="custom", filters={"min_size": 0.0, "whales": [WHALES[0]]}),
+        Alert(id=3, user_id=3, alert_type="custom", filters={}),
+    ]
+    matcher = CompiledAlertMatcher(alerts)
+    trade = SimpleNamespace(size=5, trader_address=WHALES[0], market_id=MARKETS[0])
+    assert sorted(matcher.match(trade)) == [1, 2]
+    assert [alert.id for alert in alerts if alert.matches_trade(trade)] == [1, 2]
+    print("✓ min_size=0 matches any size")
+
+
+if __name__ == "__main__":
+    test_matches_reference()
+    test_skips_malformed_alerts()
+    test_zero_min_size()
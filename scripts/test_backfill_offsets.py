@@ -0,0 +1,89 @@
+"""
+Test the backfill's offset checkpoint watermark with pages completing out of order
+"""
+import random
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.services.backfill_pipeline import BackfillPipeline, BackfillSlice
+
+LIMIT = 100
+
+
+def make_pipeline(position: str = "0") -> BackfillPipeline:
+    pipeline = BackfillPipeline(db=None, api=None, cutoff=datetime(2026, 1, 1), run_id="test", limit=LIMIT)
+    pipeline.slices["offset"] = BackfillSlice(key="offset", position=position)
+    return pipeline
+
+
+def test_watermark_waits_for_gaps() -> None:
+    pipeline = make_pipeline()
+    assert pipeline._apply_token(("offset", "100", False)).position == "0"
+    assert pipeline._apply_token(("offset", "200", False)).position == "0"
+    # Offset 0 fills the gap, so the checkpoint jumps past everything contiguous
+    assert pipeline._apply_token(("offset", "0", False)).position == "300"
+    assert pipeline._apply_token(("offset", "400", False)).position == "300"
+    assert pipeline._apply_token(("offset", "300", False)).position == "500"
+    assert not pipeline.slices["offset"].done
+    print("✓ Checkpoint only covers the contiguous prefix of completed offsets")
+
+
+def test_done_after_final_page() -> None:
+    pipeline = make_pipeline()
+    # The last page arrives first; the slice is done only once everything before it is in
+    slice_ = pipeline._apply_token(("offset", "200", True))
+    assert slice_.position == "0" and not slice_.done
+    pipeline._apply_token(("offset", "0", False))
+    assert not pipeline.slices["offset"].done
+    slice_ = pipeline._apply_token(("offset", "100", False))
+    assert slice_.position == "300" and slice_.done
+    print("✓ Slice is done once every page up to the final one is written")
+
+
+def test_earliest_final_page_wins() -> None:
+    pipeline = make_pipeline()
+    # Workers past the end also report finished (empty pages); the smallest end counts
+    pipeline._apply_token(("offset", "300", True))
+    pipeline._apply_token(("offset", "100", True))
+    slice_ = pipeline._apply_token(("offset", "0", False))
+    assert slice_.position == "200" and slice_.done
+    print("✓ Earliest final page ends the slice")
+
+
+def test_resumes_from_checkpoint() -> None:
+    pipeline = make_pipeline(position="500")
+    assert pipeline._apply_token(("offset", "600", False)).position == "500"
+    assert pipeline._apply_token(("offset", "500", False)).position == "700"
+    print("✓ Watermark continues from a resumed checkpoint")
+
+
+def test_random_completion_order(seed: int = 3, runs: int = 200) -> None:
+    rng = random.Random(seed)
+    for _ in range(runs):
+        pages = rng.randint(1, 20)
+        offsets = [page * LIMIT for page in range(pages)]
+        rng.shuffle(offsets)
+        pipeline = make_pipeline()
+        completed = set()
+        for offset in offsets:
+            completed.add(offset)
+            slice_ = pipeline._apply_token(("offset", str(offset), offset == (pages - 1) * LIMIT))
+            prefix = 0
+            while prefix in completed:
+                prefix += LIMIT
+            assert slice_.position == str(prefix)
+            assert slice_.done == (prefix == pages * LIMIT)
+        assert pipeline.slices["offset"].done
+    print(f"✓ {runs} random completion orders checkpoint the contiguous prefix")
+
+
+if __name__ == "__main__":
+    test_watermark_waits_for_gaps()
+    test_done_after_final_page()
+    test_earliest_final_page_wins()
+    test_resumes_from_checkpoint()
+    test_random_completion_order()
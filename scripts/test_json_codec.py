@@ -0,0 +1,122 @@
+"""
+Test JsonArrayStreamDecoder on chunked input and the decoder registry
+"""
+import json
+import random
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.utils.json_codec import DECODERS, JsonArrayStreamDecoder, get_decoder
+
+PAGE = [
+    {"transactionHash": "0xabc", "size": 12500.5, "price": 0.42, "title": "Will it rain? ☔", "outcome": "Yes"},
+    {"transactionHash": "0xdef", "size": 1e6, "price": 1, "title": "Ünïcödé \"quoted\" [brackets], {braces}", "tags": []},
+    12345678901234567890,
+    -0.5e-3,
+    "plain string",
+    [1, [2, [3]]],
+    None,
+    True,
+]
+
+
+def decode_in_chunks(data: bytes, sizes) -> tuple:
+    decoder = JsonArrayStreamDecoder()
+    items = []
+    pos = 0
+    for size in sizes:
+        items.extend(decoder.feed(data[pos:pos + size]))
+        pos += size
+    items.extend(decoder.feed(data[pos:]))
+    items.extend(decoder.close())
+    return items, decoder
+
+
+def test_single_chunk() -> None:
+    data = json.dumps(PAGE, ensure_ascii=False).encode()
+    items, decoder = decode_in_chunks(data, [])
+    assert items == PAGE
+    assert decoder.is_array and decoder.finished
+    print("✓ Whole array in one chunk")
+
+
+def test_every_split_point() -> None:
+    """Numbers, strings, escapes and multibyte characters split at every byte"""
+    data = json.dumps(PAGE, ensure_ascii=False).encode()
+    for cut in range(len(data) + 1):
+        items, _ = decode_in_chunks(data, [cut])
+        assert items == PAGE, cut
+    print(f"✓ Every one of {len(data) + 1} split points decodes the same")
+
+
+def test_random_chunks(seed: int = 5, runs: int = 200) -> None:
+    rng = random.Random(seed)
+    data = json.dumps(PAGE * 5, indent=2, ensure_ascii=False).encode()
+    for _ in range(runs):
+        sizes = [rng.randint(1, 16) for _ in range(len(data) // 4)]
+        items, _ = decode_in_chunks(data, sizes)
+        assert items == PAGE * 5
+    print(f"✓ {runs} random chunkings decode the same")
+
+
+def test_elements_arrive_early() -> None:
+    decoder = JsonArrayStreamDecoder()
+    assert decoder.feed(b' [{"a": 1}, {"b"') == [{"a": 1}]
+    assert decoder.feed(b': 2}, 4') == [{"b": 2}]
+    # The trailing number might continue, so it waits for the next chunk
+    assert decoder.feed(b'2') == []
+    assert decoder.feed(b']') == [42]
+    assert decoder.finished
+    assert decoder.close() == []
+    print("✓ Completed elements are returned as soon as they arrive")
+
+
+def test_non_array_document() -> None:
+    items, decoder = decode_in_chunks(b'{"data": [{"a": 1}], "next": "c"}', [3, 5])
+    assert items == [] and decoder.is_array is False
+    assert decoder.document == {"data": [{"a": 1}], "next": "c"}
+    items, decoder = decode_in_chunks(b"", [])
+    assert items == [] and decoder.document is None
+    items, decoder = decode_in_chunks(b"[]", [1])
+    assert items == [] and decoder.finished
+    print("✓ Objects and empty bodies are buffered into `document`")
+
+
+def test_truncated() -> None:
+    for data in (b'[{"a": 1}, {"b": ', b'[1, 2', b'[1, -0.', b'["unterminated'):
+        decoder = JsonArrayStreamDecoder()
+        decoder.feed(data)
+        try:
+            decoder.close()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{data!r} should be rejected")
+    print("✓ Truncated arrays raise ValueError")
+
+
+def test_get_decoder() -> None:
+    assert get_decoder("json")(b'{"a": [1]}') == {"a": [1]}
+    assert get_decoder()('[1, 2]') == [1, 2]
+    try:
+        get_decoder("nope")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown decoder should be rejected")
+    if "orjson" in DECODERS:
+        assert get_decoder("orjson") is get_decoder()
+    print("✓ Decoder registry")
+
+
+if __name__ == "__main__":
+    test_single_chunk()
+    test_every_split_point()
+    test_random_chunks()
+    test_elements_arrive_early()
+    test_non_array_document()
+    test_truncated()
+    test_get_decoder()
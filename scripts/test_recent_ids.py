@@ -0,0 +1,56 @@
+"""
+Test RecentIdSet eviction order and counters
+"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.utils.recent_ids import RecentIdSet
+
+
+def test_evicts_oldest() -> None:
+    seen = RecentIdSet(capacity=3)
+    seen.update(["a", "b", "c", "d"])
+    assert len(seen) == 3
+    assert "a" not in seen
+    assert all(trade_id in seen for trade_id in ("b", "c", "d"))
+    assert seen.stats()["evictions"] == 1
+    print("✓ Oldest id is evicted at capacity")
+
+
+def test_re_adding_refreshes() -> None:
+    seen = RecentIdSet(capacity=3)
+    seen.update(["a", "b", "c"])
+    seen.add("a")  # now the most recent
+    seen.add("d")
+    assert "a" in seen
+    assert "b" not in seen
+    print("✓ Re-adding an id makes it the most recent")
+
+
+def test_counters() -> None:
+    seen = RecentIdSet(capacity=2)
+    seen.add("x")
+    assert "x" in seen
+    assert "y" not in seen
+    assert "y" not in seen
+    assert seen.stats() == {"size": 1, "capacity": 2, "hits": 1, "misses": 2, "evictions": 0}
+    print("✓ Hit/miss counters")
+
+
+def test_rejects_bad_capacity() -> None:
+    try:
+        RecentIdSet(capacity=0)
+    except ValueError:
+        print("✓ Capacity must be positive")
+        return
+    raise AssertionError("capacity=0 was accepted")
+
+
+if __name__ == "__main__":
+    test_evicts_oldest()
+    test_re_adding_refreshes()
+    test_counters()
+    test_rejects_bad_capacity()
@@ -0,0 +1,86 @@
+"""
+Test SingleFlight request coalescing
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.utils.singleflight import SingleFlight
+
+
+async def test_coalesces_concurrent_calls() -> None:
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"page": calls}
+
+    results = await asyncio.gather(*(flight.do("trades", fetch) for _ in range(10)))
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert (flight.calls, flight.shared, len(flight)) == (1, 9, 0)
+
+    # Once finished, the next call goes upstream again
+    await flight.do("trades", fetch)
+    assert calls == 2
+    print("✓ Concurrent calls share one request")
+
+
+async def test_distinct_keys() -> None:
+    flight = SingleFlight()
+    keys = []
+
+    async def fetch(key):
+        keys.append(key)
+        await asyncio.sleep(0)
+        return key
+
+    results = await asyncio.gather(flight.do("a", lambda: fetch("a")), flight.do("b", lambda: fetch("b")))
+    assert results == ["a", "b"]
+    assert sorted(keys) == ["a", "b"]
+    print("✓ Different keys are not coalesced")
+
+
+async def test_shares_exceptions() -> None:
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.calls == 1 and len(flight) == 0
+    print("✓ Every waiter receives the error")
+
+
+async def test_cancelled_waiter_does_not_cancel_others() -> None:
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    first = asyncio.ensure_future(flight.do("k", fetch))
+    second = asyncio.ensure_future(flight.do("k", fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == "ok"
+    print("✓ A cancelled waiter leaves the request running for the rest")
+
+
+async def main() -> None:
+    await test_coalesces_concurrent_calls()
+    await test_distinct_keys()
+    await test_shares_exceptions()
+    await test_cancelled_waiter_does_not_cancel_others()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""
+Test TimerWheel scheduling against a sorted reference
+"""
+import random
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.utils.timer_wheel import TimerWheel
+
+
+def test_groups_due_items_by_key() -> None:
+    wheel = TimerWheel(resolution=60, slots=10)
+    wheel.schedule(120, "alice", "a1")
+    wheel.schedule(130, "alice", "a2")
+    wheel.schedule(200, "bob", "b1")
+    assert wheel.advance(100) == {}
+    assert wheel.advance(179) == {"alice": ["a1", "a2"]}
+    assert wheel.advance(240) == {"bob": ["b1"]}
+    assert len(wheel) == 0
+    print("✓ Due items come back grouped by key")
+
+
+def test_beyond_one_revolution() -> None:
+    wheel = TimerWheel(resolution=60, slots=10)
+    wheel.advance(0)
+    # 25 ticks ahead shares a slot with tick 5 but must wait for its own tick
+    wheel.schedule(25 * 60, "k", "late")
+    assert wheel.advance(5 * 60) == {}
+    assert wheel.advance(24 * 60) == {}
+    assert wheel.advance(25 * 60) == {"k": ["late"]}
+    print("✓ Items more than one revolution away wait for their tick")
+
+
+def test_past_items_fire_next() -> None:
+    wheel = TimerWheel(resolution=60, slots=10)
+    wheel.advance(600)
+    wheel.schedule(0, "k", "overdue")
+    assert wheel.advance(660) == {"k": ["overdue"]}
+    print("✓ Overdue items fire on the next advance")
+
+
+def test_matches_reference(seed: int = 11) -> None:
+    rng = random.Random(seed)
+    wheel = TimerWheel(resolution=60, slots=32)
+    pending = []
+    now = 100_000.0
+    wheel.advance(now)
+    for step in range(500):
+        for _ in range(rng.randint(0, 5)):
+            at = now + rng.uniform(-120, 60 * 100)
+            key = rng.randint(1, 8)
+            item = (step, at)
+            wheel.schedule(at, key, item)
+            pending.append((max(at, now + 60), key, item))
+        now += rng.uniform(0, 300)
+        due = wheel.advance(now)
+        expected = {}
+        # An item is due once its tick (not its exact time) has been reached
+        for entry in [p for p in pending if int(p[0] // 60) <= int(now // 60)]:
+            expected.setdefault(entry[1], []).append(entry[2])
+            pending.remove(entry)
+        assert {k: sorted(v) for k, v in due.items()} == {k: sorted(v) for k, v in expected.items()}, step
+        assert len(wheel) == len(pending)
+    print("✓ 500 random ticks match a sorted reference")
+
+
+if __name__ == "__main__":
+    test_groups_due_items_by_key()
+    test_beyond_one_revolution()
+    test_past_items_fire_next()
+    test_matches_reference()
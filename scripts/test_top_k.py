@@ -0,0 +1,79 @@
+"""
+Test TopK against a sorted reference
+"""
+import random
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.utils.top_k import TopK
+
+
+def test_matches_sorted_reference(seed: int = 9, runs: int = 300) -> None:
+    rng = random.Random(seed)
+    for _ in range(runs):
+        k = rng.randint(1, 10)
+        top = TopK(k)
+        pushed = []
+        for i in range(rng.randint(0, 60)):
+            # Few distinct scores, so ties are common
+            score = rng.randint(0, 15)
+            top.push(score, i)
+            pushed.append((score, i))
+        # Best score first; among equal scores the earlier push wins
+        expected = [i for _, i in sorted(pushed, key=lambda entry: (-entry[0], entry[1]))[:k]]
+        assert top.peek() == expected
+        assert len(top) == len(expected)
+    print(f"✓ {runs} random streams match a sorted reference")
+
+
+def test_push_result_and_ties() -> None:
+    top = TopK(2)
+    assert top.push(5, "a")
+    assert top.push(5, "b")
+    # An equal score does not displace an earlier item
+    assert not top.push(5, "c")
+    assert not top.push(1, "d")
+    assert top.push(6, "e")
+    assert top.peek() == ["e", "a"]
+    print("✓ push reports admission and ties keep the earlier item")
+
+
+def test_drain_resets() -> None:
+    top = TopK(3)
+    for score, item in [(1, "x"), (3, "y"), (2, "z"), (4, "w")]:
+        top.push(score, item)
+    assert top.drain() == ["w", "y", "z"]
+    assert len(top) == 0 and top.drain() == []
+    assert top.push(0, "fresh")
+    assert top.peek() == ["fresh"]
+    print("✓ drain returns best first and starts an empty window")
+
+
+def test_uncomparable_items() -> None:
+    top = TopK(2)
+    top.push(1, {"id": 1})
+    top.push(1, {"id": 2})
+    top.push(2, {"id": 3})
+    assert top.peek() == [{"id": 3}, {"id": 1}]
+    print("✓ Items themselves are never compared")
+
+
+def test_k_validation() -> None:
+    for k in (0, -1):
+        try:
+            TopK(k)
+        except ValueError:
+            continue
+        raise AssertionError(f"k={k} should be rejected")
+    print("✓ Non-positive k is rejected")
+
+
+if __name__ == "__main__":
+    test_matches_sorted_reference()
+    test_push_result_and_ties()
+    test_drain_resets()
+    test_uncomparable_items()
+    test_k_validation()
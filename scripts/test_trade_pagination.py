@@ -0,0 +1,85 @@
+"""
+Test TradePaginator strategy detection and advancement
+"""
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.services.trade_pagination import TradePaginator, extract_page, oldest_item_timestamp
+
+NOW = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def page(start_minutes: int, count: int = 3):
+    """Items newest first, one minute apart, starting start_minutes before NOW"""
+    return [
+        {"transactionHash": f"t{start_minutes + i}", "timestamp": int((NOW - timedelta(minutes=start_minutes + i)).timestamp())}
+        for i in range(count)
+    ]
+
+
+def test_cursor() -> None:
+    paginator = TradePaginator(limit=3)
+    assert paginator.params() == {"limit": "3"}
+    assert paginator.advance(page(0), "c1")
+    assert paginator.strategy == "cursor"
+    assert paginator.params() == {"limit": "3", "cursor": "c1"}
+    assert paginator.advance(page(3), "c2")
+    assert paginator.params()["cursor"] == "c2"
+    assert not paginator.advance(page(6), None)
+    print("✓ Cursor pagination")
+
+
+def test_before() -> None:
+    paginator = TradePaginator(limit=3)
+    assert paginator.advance(page(0), None)
+    assert paginator.strategy == "before"
+    # One second before the oldest item of the page
+    expected = NOW - timedelta(minutes=2, seconds=1)
+    assert paginator.params() == {"limit": "3", "before": expected.isoformat()}
+    assert paginator.advance(page(3), None)
+    assert paginator.params()["before"] == (NOW - timedelta(minutes=5, seconds=1)).isoformat()
+    print("✓ Before pagination")
+
+
+def test_before_falls_back_to_offset() -> None:
+    paginator = TradePaginator(limit=3)
+    paginator.advance(page(0), None)
+    # The API ignored `before` and returned the same page again
+    assert paginator.advance(page(0), None)
+    assert paginator.strategy == "offset"
+    assert paginator.params()["offset"] == "3"
+    print("✓ Ignored 'before' switches to offset")
+
+
+def test_offset() -> None:
+    paginator = TradePaginator(limit=3)
+    items = [{"transactionHash": "a"}, {"transactionHash": "b"}]
+    assert paginator.advance(items, None)
+    assert paginator.strategy == "offset"
+    assert paginator.params() == {"limit": "3", "offset": "3"}
+    paginator.advance(items, None)
+    assert paginator.params()["offset"] == "6"
+    print("✓ Offset pagination")
+
+
+def test_extract_page() -> None:
+    assert extract_page([{"a": 1}]) == ([{"a": 1}], None)
+    assert extract_page({"data": [{"a": 1}], "next": "n"}) == ([{"a": 1}], "n")
+    assert extract_page({"trades": [], "nextCursor": "c"}) == ([], "c")
+    assert extract_page("nonsense") == ([], None)
+    assert oldest_item_timestamp(page(0)) == NOW - timedelta(minutes=2)
+    assert oldest_item_timestamp([{"timestamp": "2026-01-01T10:00:00Z"}]) == datetime(2026, 1, 1, 10, tzinfo=timezone.utc)
+    assert oldest_item_timestamp([{}]) is None
+    print("✓ Page extraction")
+
+
+if __name__ == "__main__":
+    test_cursor()
+    test_before()
+    test_before_falls_back_to_offset()
+    test_offset()
+    test_extract_page()
@@ -0,0 +1,196 @@
+"""
+Test RecentTradeWindow aggregations against the equivalent SQL over the same trades
+"""
+import math
+import random
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.services.trade_parser import TradeRecord
+from bot.services.trade_window import RecentTradeWindow
+
+NOW = datetime(2026, 1, 1, 12, 0)
+TRADERS = [f"0x{i:040x}" for i in range(12)]
+MARKETS = [f"market-{i}" for i in range(10)]
+SIDES = ["BUY", "SELL", "YES", "NO"]
+MIN_SIZE = 10000
+
+
+def random_trades(rng: random.Random, count: int):
+    """Trades oldest first, as the poll loop feeds them"""
+    trades = []
+    for i in range(count):
+        raw = {"name": f"name-{i}", "title": f"title-{i}"}
+        trades.append(TradeRecord(
+            id=f"0x{i:064x}",
+            trader_address=rng.choice(TRADERS),
+            market_id=rng.choice(MARKETS),
+            side=rng.choice(SIDES),
+            # Mostly whales, some below the threshold
+            size=rng.uniform(1000, 80000),
+            price=rng.random(),
+            timestamp=NOW - timedelta(seconds=count - i),
+            raw=raw,
+        ))
+    return trades
+
+
+def load(trades) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE trades (
+            id TEXT PRIMARY KEY, trader_address TEXT, market_id TEXT,
+            side TEXT, size REAL, timestamp TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO trades VALUES (?, ?, ?, ?, ?, ?)",
+        [(t.id, t.trader_address, t.market_id, t.side, t.size, t.timestamp.isoformat()) for t in trades],
+    )
+    return conn
+
+
+def close(a: float, b: float) -> bool:
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+
+
+def test_leaderboard_matches_sql(seed: int = 1) -> None:
+    rng = random.Random(seed)
+    trades = random_trades(rng, 3000)
+    window = RecentTradeWindow(capacity=2000)
+    window.add_many(trades)
+    # Only the newest `capacity` trades survive in the window
+    conn = load(trades[-2000:])
+    since = NOW - timedelta(seconds=1500)
+
+    # Same aggregation as Database.get_top_whales_since over raw trades
+    rows = conn.execute("""
+        SELECT trader_address, SUM(size), COUNT(*), MAX(size)
+        FROM trades
+        WHERE timestamp >= ? AND size >= ?
+        GROUP BY trader_address
+        ORDER BY SUM(size) DESC
+        LIMIT 5
+    """, (since.isoformat(), MIN_SIZE)).fetchall()
+
+    leaders = window.leaderboard(since=since, limit=5, min_size=MIN_SIZE)
+    assert [address for address, _ in leaders] == [row[0] for row in rows]
+    for (address, stats), (_, volume, count, largest) in zip(leaders, rows):
+        assert close(stats["total_volume"], volume)
+        assert stats["trade_count"] == count
+        assert close(stats["largest_trade"], largest)
+        # Names come from the trader's newest qualifying trade
+        newest = max((t for t in trades[-2000:] if t.trader_address == address and t.size >= MIN_SIZE
+                      and t.timestamp >= since), key=lambda t: t.timestamp)
+        assert stats["trader_name"] == newest.raw["name"]
+    print("✓ Leaderboard matches GROUP BY trader_address")
+
+
+def test_flow_matches_sql(seed: int = 2) -> None:
+    rng = random.Random(seed)
+    trades = random_trades(rng, 1500)
+    window = RecentTradeWindow(capacity=5000)
+    window.add_many(trades)
+    conn = load(trades)
+    since = NOW - timedelta(seconds=1000)
+
+    rows = conn.execute("""
+        SELECT
+            market_id,
+            SUM(CASE WHEN side IN ('BUY', 'YES') THEN size ELSE 0 END) AS yes_volume,
+            SUM(CASE WHEN side IN ('SELL', 'NO') THEN size ELSE 0 END) AS no_volume
+        FROM trades
+        WHERE timestamp >= ? AND size >= ?
+        GROUP BY market_id
+    """, (since.isoformat(), MIN_SIZE)).fetchall()
+    net = {market: yes - no for market, yes, no in rows}
+    buying = sorted((m for m in net if net[m] > 0), key=lambda m: -net[m])[:3]
+    selling = sorted((m for m in net if net[m] < 0), key=lambda m: net[m])[:3]
+
+    flow = window.flow(since=since, limit=3, min_size=MIN_SIZE)
+    assert [entry["market_id"] for entry in flow["buying"]] == buying
+    assert [entry["market_id"] for entry in flow["selling"]] == selling
+    by_market = {market: (yes, no) for market, yes, no in rows}
+    for entry in flow["buying"] + flow["selling"]:
+        yes, no = by_market[entry["market_id"]]
+        assert close(entry["yes_volume"], yes) and close(entry["no_volume"], no)
+        assert close(entry["net_flow"], yes - no)
+    print("✓ Flow matches GROUP BY market_id")
+
+
+def test_consensus_matches_sql(seed: int = 3) -> None:
+    rng = random.Random(seed)
+    trades = random_trades(rng, 1500)
+    window = RecentTradeWindow(capacity=5000)
+    window.add_many(trades)
+    conn = load(trades)
+
+    for market in MARKETS:
+        rows = dict((side, (count, volume)) for side, count, volume in conn.execute("""
+            SELECT
+                CASE WHEN side IN ('BUY', 'YES') THEN 'YES' ELSE 'NO' END AS side,
+                COUNT(DISTINCT trader_address),
+                SUM(size)
+            FROM trades
+            WHERE market_id = ? AND size >= ?
+            GROUP BY 1
+        """, (market, MIN_SIZE)))
+        consensus = window.consensus(market, min_size=MIN_SIZE)
+        for side in ("YES", "NO"):
+            count, volume = rows.get(side, (0, 0.0))
+            assert consensus[side]["count"] == count
+            assert close(consensus[side]["volume"], volume)
+        total = sum(count for count, _ in rows.values())
+        assert close(consensus["YES"]["percentage"], rows.get("YES", (0,))[0] / total * 100)
+    print("✓ Consensus matches COUNT(DISTINCT trader_address) per side")
+
+
+def test_lookups_and_eviction() -> None:
+    rng = random.Random(4)
+    trades = random_trades(rng, 250)
+    window = RecentTradeWindow(capacity=100)
+    # Only the newest `capacity` of an oversized batch are kept (and counted)
+    assert window.add_many(trades[:150]) == 100
+    assert window.add_many(trades[100:]) == 100  # the first 50 are still in the window
+    assert len(window) == 100
+    assert not window.add(trades[-1])
+    kept = trades[-100:]
+    address = TRADERS[0]
+    mine = [t for t in reversed(kept) if t.trader_address == address]
+    assert [t.id for t in window.by_trader(address.upper())] == [t.id for t in mine]
+    volume, count = window.trader_totals(address)
+    assert close(volume, sum(t.size for t in mine)) and count == len(mine)
+    assert [t.id for t in window.recent(limit=3)] == [t.id for t in reversed(kept[-3:])]
+    assert window.by_trader("0xunknown") == []
+    print("✓ Lookups cover only the newest `capacity` trades")
+
+
+def test_recode_keeps_results() -> None:
+    """Re-encoding trader/market dictionaries after heavy churn leaves results unchanged"""
+    window = RecentTradeWindow(capacity=10)
+    trades = []
+    for i in range(200):
+        trades.append(TradeRecord(
+            id=f"t{i}", trader_address=f"0x{i:040x}", market_id=f"m{i}", side="BUY",
+            size=20000 + i, price=0.5, timestamp=NOW + timedelta(seconds=i), raw={},
+        ))
+        window.add(trades[-1])
+    leaders = window.leaderboard(limit=3, min_size=MIN_SIZE)
+    assert [address for address, _ in leaders] == [f"0x{i:040x}" for i in (199, 198, 197)]
+    assert [entry["market_id"] for entry in window.flow(limit=2, min_size=MIN_SIZE)["buying"]] == ["m199", "m198"]
+    assert window.by_trader(f"0x{190:040x}")[0].id == "t190"
+    assert window.by_trader(f"0x{150:040x}") == []
+    print("✓ Dictionary re-encoding keeps lookups and aggregates correct")
+
+
+if __name__ == "__main__":
+    test_leaderboard_matches_sql()
+    test_flow_matches_sql()
+    test_consensus_matches_sql()
+    test_lookups_and_eviction()
+    test_recode_keeps_results()
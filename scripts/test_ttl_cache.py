@@ -0,0 +1,100 @@
+"""
+Test TTLCache expiry/eviction and the @cached decorator
+"""
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bot.utils.ttl_cache import TTLCache, cached
+
+
+def test_expiry() -> None:
+    cache = TTLCache(max_entries=10)
+    cache.set("a", 1, ttl=0.05)
+    assert cache.lookup("a") == (True, 1)
+    time.sleep(0.06)
+    assert cache.lookup("a") == (False, None)
+    assert cache.stats()["expirations"] == 1
+    print("✓ Entries expire after their TTL")
+
+
+def test_lru_eviction() -> None:
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # a is now the most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    cache.invalidate()
+    assert len(cache) == 0
+    print("✓ Least recently used entry is evicted")
+
+
+class FakeSharedCache:
+    def __init__(self):
+        self.values = {}
+
+    async def lookup(self, key):
+        return (key in self.values), self.values.get(key)
+
+    async def set(self, key, value, ttl):
+        self.values[key] = value
+
+
+class Service:
+    def __init__(self):
+        self.cache = TTLCache()
+        self.calls = 0
+
+    @cached(ttl=60)
+    async def top(self, since: datetime, limit: int = 5):
+        self.calls += 1
+        return [since.isoformat(), limit, self.calls]
+
+    @cached(ttl=60, cache_empty=False)
+    async def maybe_empty(self):
+        self.calls += 1
+        return []
+
+
+async def test_cached_decorator() -> None:
+    service = Service()
+    bucket = datetime(2026, 1, 1, 12, 0, 1)
+    first = await service.top(bucket, limit=5)
+    # A rolling window a few seconds later falls in the same TTL bucket
+    assert await service.top(bucket + timedelta(seconds=5), limit=5) is first
+    assert service.calls == 1
+    await service.top(bucket, limit=10)
+    assert service.calls == 2
+
+    await service.maybe_empty()
+    await service.maybe_empty()
+    assert service.calls == 4
+    print("✓ @cached reuses results per arguments and skips empty ones when asked")
+
+
+async def test_shared_cache() -> None:
+    shared = FakeSharedCache()
+    one, two = Service(), Service()
+    one.shared_cache = shared
+    two.shared_cache = shared
+    since = datetime(2026, 1, 1)
+    assert await one.top(since) == await two.top(since)
+    assert (one.calls, two.calls) == (1, 0)
+    print("✓ A second instance is served from the shared cache")
+
+
+if __name__ == "__main__":
+    test_expiry()
+    test_lru_eviction()
+    asyncio.run(test_cached_decorator())
+    asyncio.run(test_shared_cache())